@@ -1,33 +1,292 @@
 #!/bin/python
 
 import datetime
+import functools
 import getopt
 import json
-import oci
 import os
+import signal
 import sys
 import time
 from utils.mdsconfigbuilder import ConfigBuilder
 from utils.mdsconfigbuilder import ConfigIterator
+from utils.mdsconfigindex import MdsConfigIndex
+from utils.mdsconfigindex import MdsConfigIndexError
 from utils.mdsargs import Mdsargs
 from utils.mdsargs import MdsargsError
+from utils.mdsanswers import MdsAnswers
+from utils.mdsanswers import MdsAnswersError
+from utils.mdscache import MdsCatalogCache
+from utils.mdsclients import MdsClientFactory
 from utils.mdscreds import MdsCredentials
 from utils.mdscreds import MdsCredentialsError
 from utils.mdsdatabase import MdsDatabase
 from utils.mdsdatabase import MdsMetaDatabase
+from utils.mdshistory import MdsDurationHistory
+from utils.mdsimport import lazy_import
+from utils.mdsjournal import MdsJournal
+from utils.mdslimits import MdsCompartmentLimiter
+from utils.mdslimits import MdsSharedTokenBucket
+from utils.mdsmanifest import MdsCloneEntry
+from utils.mdsmanifest import MdsCloneManifest
+from utils.mdsmanifest import MdsManifest
+from utils.mdsmetrics import MdsMetrics
+from utils.mdsmetrics import MdsMetricsContext
+from utils.mdsplan import MdsPlan
+from utils.mdspoller import MdsPollCoordinator
+from utils.mdspreflight import MdsPlannedDatabase
+from utils.mdspreflight import MdsPreflight
+from utils.mdspreflight import MdsPreflightError
+from utils.mdspreflight import check_subnet_address
+from utils.mdspreflight import free_addresses
+from utils.mdspreflight import limit_demand
+from utils.mdsretry import MdsRetryPolicy
+from utils.mdsretry import retry_token
+from utils.mdsrevert import MdsRevertError
+from utils.mdsrevert import MdsRevertIndex
+from utils.mdsrevert import read_revert_file
+from utils.mdsrevert import write_revert_file
 from utils.spinner import Spinner
+from utils.mdswaiter import MdsWaiter
+from utils.mdswaiter import MdsWaiterError
+from utils.mdswaiter import format_elapsed
 from utils.tio import Tio
+from utils.tio import TioContext
+
+# The OCI SDK, asyncio and the thread pool are slow to import, so they are
+# only loaded once they are used. This keeps help and argument errors fast.
+asyncio = lazy_import("asyncio")
+futures = lazy_import("concurrent.futures")
+oci = lazy_import("oci")
 
 # Constants
 DESTRUCTIVE = True
 NON_DESTRUCTIVE = False
 MAX_DESC_LEN = 399
+# Threads available for blocking OCI SDK calls
+EXECUTOR_THREADS = 16
+# Sustained rate (calls per second) and burst size of OCI SDK calls
+API_RATE = 10
+API_BURST = 20
+# Deadlines (in seconds) for each lifecycle transition
+SHUTDOWN_DEADLINE = 60 * 60
+BACKUP_DEADLINE = 12 * 60 * 60
+UPDATE_DEADLINE = 6 * 60 * 60
+DELETE_DEADLINE = 60 * 60
+CREATE_DEADLINE = 24 * 60 * 60
+CHANNEL_DEADLINE = 60 * 60
+CATCH_UP_DEADLINE = 6 * 60 * 60
+CHANNEL_STATUS_DEADLINE = 10 * 60
+SPARE_ADDRESS_ATTEMPTS = 5
+
+# The error codes, and a word their message must contain, with which the
+# service refuses an in-place change of shape it cannot make, i.e. to a shape
+# the database cannot be moved to without a rebuild. The same codes are used
+# for other invalid requests (e.g. an unknown configuration), which must not
+# lead to a rebuild.
+IN_PLACE_REFUSALS = (("InvalidParameter", "shape"),)
+
+# The errors with which the service refuses an address that is already in use
+ADDRESS_CONFLICTS = ((409, "Conflict"), (400, "InvalidParameter"))
 # Effective constants (variables set once outside of main())
 TIMESTAMP = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
 OUTPUT_REVERT_FILE = "revert." + TIMESTAMP
+OUTPUT_JOURNAL_FILE = "journal." + TIMESTAMP
+OUTPUT_REPORT_FILE = "report." + TIMESTAMP + ".json"
+OUTPUT_PLAN_FILE = "plan." + TIMESTAMP + ".json"
+OUTPUT_PLAN_TEXT = "plan." + TIMESTAMP + ".txt"
 SESSION_LOG = "session.log"
-# Global: object to handle both the printing to screen and session logging
-tio = None    
+SESSION_RECORDS = "session.jsonl"
+# Global: object to handle both the printing to screen and session logging.
+# Each execution context (e.g. a batch worker) binds its own Tio to it.
+tio = TioContext()
+# Global: phase and API call timings, bound per execution context like tio
+metrics = MdsMetricsContext()
+# Global: shared, thread-safe registry of OCI service clients
+clients = MdsClientFactory()
+# Global: persistent cache of the shape and configuration catalogs
+catalog = MdsCatalogCache()
+# Global: durations of earlier lifecycle operations, used to predict them
+history = MdsDurationHistory()
+# Global: coalesces the polls of in-flight operations by compartment
+poller = MdsPollCoordinator()
+# Global: paces and retries every OCI SDK call (see oci_call()). The rate is
+# shared with the other mdsac processes using the same cache directory.
+rate_limiter = MdsSharedTokenBucket(API_RATE,API_BURST)
+retry_policy = MdsRetryPolicy()
+# Global: answers to the interactive questions, loaded for unattended runs
+answers = MdsAnswers()
+
+async def oci_call(fn, *args, **kwargs):
+    # Runs a blocking OCI SDK call on the executor so the event loop is free
+    # to drive other operations while it is in flight. The current context is
+    # copied to the executor thread so tio logs to the right session.
+    # Every OCI call goes through here. Each attempt takes a token from the
+    # shared rate limiter, and attempts that fail with throttling or a
+    # transient error are retried with backoff. Non-idempotent requests must
+    # pass an opc_retry_token so that a retried request is applied only once.
+    name = fn.__name__
+    if fn is oci.pagination.list_call_get_all_results:
+        name = args[0].__name__
+    attempt = 0
+    while True:
+        await rate_limiter.acquire()
+        start = time.monotonic()
+        try:
+            result = await asyncio.to_thread(fn,*args,**kwargs)
+            metrics.record_call(name,time.monotonic() - start)
+            return result
+        except Exception as e:
+            metrics.record_call(name,time.monotonic() - start,failed=True)
+            attempt += 1
+            if attempt >= retry_policy.max_attempts or not retry_policy.retryable(e):
+                raise
+            await asyncio.sleep(retry_policy.delay(attempt,e))
+
+
+async def oci_data(fn, *args, **kwargs):
+    return (await oci_call(fn,*args,**kwargs)).data
+
+
+def duration_estimate(operation):
+    # Returns an estimate for MdsWaiter that predicts the duration of the
+    # operation from the shape and storage size of the resource it polls.
+    return lambda data: history.estimate(
+            operation,
+            getattr(data,"shape_name",None),
+            getattr(data,"data_storage_size_in_gbs",None))
+
+
+def record_duration(operation, waiter, data, resumed=False):
+    # A resumed wait only saw the end of the operation, so is not recorded
+    if not resumed:
+        history.record(operation,data.shape_name,data.data_storage_size_in_gbs,waiter.elapsed)
+
+
+def waited(waiter):
+    if waiter.expected is None:
+        return "Done (%s)." % format_elapsed(waiter.elapsed)
+    return "Done (%s, expected %s)." % (format_elapsed(waiter.elapsed),format_elapsed(waiter.expected))
+
+
+def timed_phase(name):
+    # Records the duration of each call of an async phase function. The
+    # session log is synced to disk as each phase ends.
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def timed(*args, **kwargs):
+            try:
+                with metrics.phase(name):
+                    return await fn(*args,**kwargs)
+            finally:
+                tio.flush(durable=True)
+        return timed
+    return decorate
+
+
+def journal_model(oci_cfg, model):
+    # SDK models are journalled in their wire format so that a resumed run
+    # reads them back into the same model types.
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    return client.base_client.sanitize_for_serialization(model)
+
+
+def journal_load_model(oci_cfg, data, response_type):
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    return client.base_client.deserialize_response_data(json.dumps(data).encode("utf-8"),response_type)
+
+
+def new_journal(oci_cfg, output_dir, action, src, **params):
+    # The header holds everything needed to resume the action other than the
+    # administrator credentials, which are never written to disk.
+    header = dict(params)
+    header["action"] = action
+    header["database"] = journal_model(oci_cfg,src.database)
+    header["configuration"] = journal_model(oci_cfg,src.config)
+    return MdsJournal(os.path.join(output_dir,OUTPUT_JOURNAL_FILE),header)
+
+
+def journal_source_db(oci_cfg, header):
+    return MdsDatabase(
+        journal_load_model(oci_cfg,header["database"],"DbSystem"),
+        journal_load_model(oci_cfg,header["configuration"],"Configuration"))
+
+
+async def journal_step(journal, step, run, fetch=None):
+    # Runs one step of an action. run is called with the OCID of a resource
+    # the step created in an earlier, interrupted run (or None) and a
+    # callback that records the OCID of a resource as soon as it is created.
+    # A step that completed in an earlier run is not repeated; instead fetch,
+    # if given, is used to read its result again by its recorded OCID.
+    if journal is None:
+        result = run(None,None)
+    elif journal.is_done(step):
+        tio.writeln("Skipping step %s, which completed in an earlier run." % (step))
+        result_id = journal.data(step).get("id")
+        if fetch is None or result_id is None:
+            return None
+        return await fetch(result_id)
+    else:
+        resume_id = journal.data(step).get("id")
+        result = run(resume_id,lambda ocid: journal.started(step,id=ocid))
+    if asyncio.iscoroutine(result):
+        result = await result
+    if journal is not None:
+        journal.done(step,id=getattr(result,"id",None))
+    # The log of a completed step reaches the operating system before the
+    # next step starts
+    tio.flush()
+    return result
+
+
+def coordinated_poll(key, resource_id, get_one, list_all, compartment_id=None):
+    # Returns a poll for MdsWaiter.wait(). Unless the compartment is known the
+    # first poll reads the resource directly to learn it; later polls are
+    # coalesced with those of every other in-flight operation on the same
+    # compartment into one list call (see MdsPollCoordinator).
+    compartment = [compartment_id]
+    async def poll():
+        if compartment[0] is None:
+            data = await get_one(resource_id)
+            compartment[0] = data.compartment_id
+            return data
+        return await poller.poll(key + (compartment[0],),resource_id,lambda: list_all(compartment[0]),get_one)
+    return poll
+
+
+def db_system_poll(oci_cfg, dbid, compartment_id=None):
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    return coordinated_poll(
+            clients.key(oci.mysql.DbSystemClient,oci_cfg),
+            dbid,
+            lambda ocid: oci_data(client.get_db_system,ocid),
+            lambda cid: oci_data(oci.pagination.list_call_get_all_results,client.list_db_systems,cid),
+            compartment_id)
+
+
+def backup_poll(oci_cfg, backup_id, compartment_id=None):
+    client = clients.get(oci.mysql.DbBackupsClient,oci_cfg)
+    return coordinated_poll(
+            clients.key(oci.mysql.DbBackupsClient,oci_cfg),
+            backup_id,
+            lambda ocid: oci_data(client.get_backup,ocid),
+            lambda cid: oci_data(
+                oci.pagination.list_call_get_all_results,
+                client.list_backups,
+                cid,
+                creation_type = oci.mysql.models.Backup.CREATION_TYPE_MANUAL),
+            compartment_id)
+
+
+async def get_db(oci_cfg, dbid):
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    return await oci_data(client.get_db_system,dbid)
+
+
+async def get_backup(oci_cfg, backup_id):
+    client = clients.get(oci.mysql.DbBackupsClient,oci_cfg)
+    return await oci_data(client.get_backup,backup_id)
+
 
 def get_source_shape(src_shape_name, shape_list):
     for shape in shape_list:
@@ -44,10 +303,25 @@ def get_shape_menu(src_shape_name, shape_list):
     return menu
 
 
+def answered_shape(src_shape_name, menu_list):
+    if answers.shape_name is None:
+        raise MdsAnswersError("The answers file does not give a shape_name.")
+    for shape in menu_list:
+        if shape.name == answers.shape_name:
+            tio.writeln("Target shape: %s [%d ocpu, %dGB] (from answers file)" % (shape.name,shape.cpu_core_count,shape.memory_size_in_gbs))
+            return shape
+    if answers.shape_name == src_shape_name:
+        raise MdsAnswersError("The answered shape, %s, is the current shape." % answers.shape_name)
+    raise MdsAnswersError("The answered shape, %s, is not available." % answers.shape_name)
+
+
 def get_target_shape(src_shape_name, shape_list):
     src_shape = get_source_shape(src_shape_name,shape_list)
     menu_list = get_shape_menu(src_shape_name,shape_list)
     selected = -1
+
+    if answers.active:
+        return answered_shape(src_shape_name,menu_list)
       
     tio.writeln("Resize Shape Menu")
     tio.writeln("Current shape: %s [%d ocpu, %dGB]" % (src_shape.name,src_shape.cpu_core_count,src_shape.memory_size_in_gbs))
@@ -110,27 +384,121 @@ def select_cfg_item(choices):
     return cfg_item
 
 
-def cfg_id_for_name(cfg_list, shape_name):
-    for cfg in cfg_list:
-        if cfg.shape_name == shape_name:
-            return cfg.id
+def answered_config(cfg_builder, variables):
+    # Options that differ between the source and target take their suggested
+    # value unless the answers override them. An answer may also override an
+    # option that does not differ.
+    overrides = dict(answers.configuration)
+    it = cfg_builder.iterator()
+    while True:
+        choices = it.next()
+        if choices is None:
+            break
+        option = choices[ConfigBuilder.OPTION]
+        value = overrides.pop(option,choices[ConfigBuilder.SUGGESTED])
+        cfg_builder.set_config_item(option,answered_config_value(variables,option,value))
+        tio.writeln("  %-48s %s" % (option,value))
+    for option, value in overrides.items():
+        cfg_builder.set_config_item(option,answered_config_value(variables,option,value))
+        tio.writeln("  %-48s %s" % (option,value))
+
+
+def answered_config_value(variables, option, value):
+    if option not in variables.attribute_map:
+        raise MdsAnswersError("Unknown configuration option %s in answers file." % option)
+    current = getattr(variables,option)
+    if isinstance(current,float) and isinstance(value,int) and not isinstance(value,bool):
+        value = float(value)
+    if current is not None and type(value) != type(current):
+        raise MdsAnswersError("Configuration option %s must be of the same type as %s." % (option,repr(current)))
+    return value
+
+
+def cfg_id_for_name(cfg_index, shape_name, highly_available=False):
+    # Returns the default configuration for the shape, never a custom one
+    cfg = cfg_index.default_for(shape_name,highly_available)
+    if cfg is None:
+        return None
+    return cfg.id
+
+
+def catalog_key(oci_cfg, compartment_id, kind, *extra):
+    return [oci_cfg.get("tenancy"), oci_cfg.get("region"), compartment_id, kind] + list(extra)
+
+
+async def cached_catalog(client, key, response_type, fetch):
+    # Catalog data is cached in its wire format so that it deserializes back
+    # into the same SDK model types that the service returns.
+    data = catalog.get(key)
+    if data is not None:
+        return client.base_client.deserialize_response_data(json.dumps(data).encode("utf-8"),response_type)
+    result = await fetch()
+    catalog.put(key,client.base_client.sanitize_for_serialization(result))
+    return result
+
+
+async def list_shapes(oci_cfg, compartment_id):
+    client = clients.get(oci.mysql.MysqlaasClient,oci_cfg)
+    return await cached_catalog(
+            client,
+            catalog_key(oci_cfg,compartment_id,"shapes"),
+            "list[ShapeSummary]",
+            lambda: oci_data(client.list_shapes,compartment_id))
+
+
+async def list_configurations(oci_cfg, compartment_id):
+    client = clients.get(oci.mysql.MysqlaasClient,oci_cfg)
+    return await cached_catalog(
+            client,
+            catalog_key(oci_cfg,compartment_id,"configurations.all"),
+            "list[ConfigurationSummary]",
+            lambda: oci_data(
+                oci.pagination.list_call_get_all_results,
+                client.list_configurations,
+                compartment_id,
+                lifecycle_state = oci.mysql.models.Configuration.LIFECYCLE_STATE_ACTIVE))
+
+
+async def get_config_index(oci_cfg, compartment_id):
+    return MdsConfigIndex(await list_configurations(oci_cfg,compartment_id),ConfigBuilder.HASH_TAG)
+
+
+async def find_custom_config(oci_cfg, cfg_index, shape_name, digest):
+    # Custom configurations created by this tool carry their content hash in
+    # a freeform tag. Older, untagged ones are hashed from their variables,
+    # which are read concurrently (within the API rate limit); the reads are
+    # cached so this is only paid for once.
+    cfg = cfg_index.by_hash(shape_name,digest)
+    if cfg is not None:
+        return cfg
+    untagged = [cfg for cfg in cfg_index.customs(shape_name)
+            if ConfigBuilder.HASH_TAG not in (cfg.freeform_tags or dict())]
+    full_cfgs = await asyncio.gather(*[get_configuration(oci_cfg,cfg.id) for cfg in untagged])
+    for cfg, full_cfg in zip(untagged,full_cfgs):
+        if ConfigBuilder.variables_hash(full_cfg.variables) == digest:
+            return cfg
     return None
 
 
-def get_target_config_id(svc_client, shape_name, src):
-    cfg_list_response = svc_client.list_configurations(
-            src.database.compartment_id,
-            lifecycle_state = oci.mysql.models.Configuration.LIFECYCLE_STATE_ACTIVE)
-    tgt_cfg_response = svc_client.get_configuration(cfg_id_for_name(cfg_list_response.data,shape_name))
+async def get_configuration(oci_cfg, config_id):
+    # A configuration's variables cannot change once it has been created, so
+    # it can be cached for as long as any other catalog entry.
+    client = clients.get(oci.mysql.MysqlaasClient,oci_cfg)
+    return await cached_catalog(
+            client,
+            catalog_key(oci_cfg,None,"configuration",config_id),
+            "Configuration",
+            lambda: oci_data(client.get_configuration,config_id))
 
-    cfg_builder = None
+
+def select_config(src, tgt_cfg):
     while True:
         tio.writeln("\nAccept or change database configuration options.\n")
         tio.writeln("In order to achieve optimal performance it is suggested that you accept the")
         tio.writeln("default values. Only enter a different value for an option if you have a")
         tio.writeln("valid reason, otherwise press enter to accept the suggested default value.")
 
-        cfg_builder = ConfigBuilder(src.config,tgt_cfg_response.data)
+        cfg_builder = ConfigBuilder(src.config,tgt_cfg)
         it = cfg_builder.iterator()
         while True:
             choices = it.next()
@@ -143,107 +511,292 @@ def get_target_config_id(svc_client, shape_name, src):
             confirmation = tio.input("\nConfirm the configuration options [yes|no|quit]: ")
 
         if confirmation in ("Yes","yes","Y","y"):
-            break
+            return cfg_builder
         elif confirmation in ("Quit","quit","Q","q"):
             tio.writeln("\nApplication ended normally at user request.")
             sys.exit(0)
         else:
             continue
 
+
+@timed_phase("configuration")
+async def get_target_config_id(oci_cfg, shape_name, src):
+    svc_client = clients.get(oci.mysql.MysqlaasClient,oci_cfg)
+    cfg_index = await get_config_index(oci_cfg,src.database.compartment_id)
+    cfg_id = cfg_id_for_name(cfg_index,shape_name,src.database.is_highly_available)
+    if cfg_id is None:
+        raise MdsConfigIndexError("No active default configuration found for shape %s." % shape_name)
+    tgt_cfg = await get_configuration(oci_cfg,cfg_id)
+
+    if answers.active:
+        tio.writeln("\nConfiguration options (from answers file):")
+        cfg_builder = ConfigBuilder(src.config,tgt_cfg)
+        answered_config(cfg_builder,tgt_cfg.variables)
+    else:
+        cfg_builder = select_config(src,tgt_cfg)
+
     if cfg_builder.requires_new_config():
-        name = shape_name + ".Custom." + TIMESTAMP
         tio.writeln("\nConfiguration changes require a custom configuration.")
+        variables = cfg_builder.get_config()
+        digest = ConfigBuilder.variables_hash(variables)
+        existing_cfg = await find_custom_config(oci_cfg,cfg_index,shape_name,digest)
+        if existing_cfg is not None:
+            tio.writeln("Reusing identical custom configuration, %s." % existing_cfg.display_name)
+            return existing_cfg.id
+
+        name = shape_name + ".Custom." + TIMESTAMP
         tio.write("Creating configuration, %s..." % name)
+        freeform_tags = dict(src.config.freeform_tags or dict())
+        freeform_tags[ConfigBuilder.HASH_TAG] = digest
         cfg_details = oci.mysql.models.CreateConfigurationDetails(
             compartment_id = src.database.compartment_id,
             defined_tags = src.config.defined_tags,
             description = "Created as part of the resizing of database, " + src.database.display_name,
-            freeform_tags = src.config.freeform_tags,
-            display_name = (shape_name + ".Custom." + TIMESTAMP),
+            freeform_tags = freeform_tags,
+            display_name = name,
             # parent_configuration_id = src_cfg.data.id,
             shape_name = shape_name,
-            variables = cfg_builder.get_config()
+            variables = variables
         )
-        tgt_cfg_response = svc_client.create_configuration(cfg_details)
-        if tgt_cfg_response.data.lifecycle_state != oci.mysql.models.Configuration.LIFECYCLE_STATE_ACTIVE:
-            raise(cfg.lifecycle_state)
+        tgt_cfg = await oci_data(svc_client.create_configuration,cfg_details,opc_retry_token=retry_token())
+        catalog.invalidate(catalog_key(oci_cfg,src.database.compartment_id,"configurations.all"))
+        if tgt_cfg.lifecycle_state != oci.mysql.models.Configuration.LIFECYCLE_STATE_ACTIVE:
+            raise MdsWaiterError("Configuration %s is in state %s." % (name,tgt_cfg.lifecycle_state))
         tio.writeln("Done.")
 
-    return tgt_cfg_response.data.id
-
+    return tgt_cfg.id
 
-def backup_db(oci_cfg, dbid):
-    client = oci.mysql.DbBackupsClient(oci_cfg)
 
-    backup_details = oci.mysql.models.CreateBackupDetails(
-        backup_type = oci.mysql.models.CreateBackupDetails.BACKUP_TYPE_FULL,
+def backup_request(dbid, incremental=False):
+    backup_type = oci.mysql.models.CreateBackupDetails.BACKUP_TYPE_FULL
+    if incremental:
+        backup_type = oci.mysql.models.CreateBackupDetails.BACKUP_TYPE_INCREMENTAL
+    return oci.mysql.models.CreateBackupDetails(
+        backup_type = backup_type,
         db_system_id = dbid,
         display_name = ("custom-" + TIMESTAMP),
         retention_in_days = 6
     )
 
-    tio.write("Backing up the existing database service...")
-    spinner = Spinner()
-    spinner.start()
-    backup_response = client.create_backup(backup_details)
-    while backup_response.data.lifecycle_state == oci.mysql.models.Backup.LIFECYCLE_STATE_CREATING:
-        time.sleep(20)
-        backup_response = client.get_backup(backup_response.data.id)
-    spinner.stop()
-
-    if backup_response.data.lifecycle_state != oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE:
-        raise(backup_response.data.lifecycle_details)
-    else:
-        tio.writeln("Done.")
 
-    return backup_response.data
+@timed_phase("backup")
+async def backup_db(oci_cfg, dbid, resume_id=None, on_started=None, incremental=False):
+    # If resume_id is given then the backup it identifies, started by an
+    # earlier run, is waited on rather than a new one being taken. on_started
+    # is called with the new backup's OCID as soon as it is known. An
+    # incremental backup holds only the changes since the last backup.
+    client = clients.get(oci.mysql.DbBackupsClient,oci_cfg)
 
+    backup_details = backup_request(dbid,incremental)
+    operation = "incremental_backup" if incremental else "backup"
 
-def shutdown_db(oci_cfg, dbid):
-    client = oci.mysql.DbSystemClient(oci_cfg)
-
-    shutdown_details = oci.mysql.models.StopDbSystemDetails(
+    tio.write("Backing up the existing database service...")
+    waiter = MdsWaiter(deadline=BACKUP_DEADLINE,estimate=duration_estimate(operation))
+    spinner = Spinner(tio.get_mode(Tio.SCREEN),lambda: waiter.remaining)
+    spinner.start()
+    try:
+        initial = None
+        compartment_id = None
+        backup_id = resume_id
+        if backup_id is None:
+            initial = await oci_data(client.create_backup,backup_details,opc_retry_token=retry_token())
+            backup_id = initial.id
+            compartment_id = initial.compartment_id
+            if on_started is not None:
+                on_started(backup_id)
+        backup = await waiter.wait(
+            backup_poll(oci_cfg,backup_id,compartment_id),
+            (oci.mysql.models.Backup.LIFECYCLE_STATE_CREATING,),
+            (oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE,),
+            initial = initial,
+            description = "backup",
+            refresh = lambda: oci_data(client.get_backup,backup_id))
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    record_duration(operation,waiter,backup,resume_id is not None)
+
+    return backup
+
+
+def shutdown_request():
+    return oci.mysql.models.StopDbSystemDetails(
         shutdown_type = oci.mysql.models.StopDbSystemDetails.SHUTDOWN_TYPE_FAST
     )
 
+
+@timed_phase("shutdown")
+async def shutdown_db(oci_cfg, dbid, resume_id=None, on_started=None):
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+
+    shutdown_details = shutdown_request()
+
     tio.write("Shutting down the existing database service...")
-    spinner = Spinner()
+    waiter = MdsWaiter(deadline=SHUTDOWN_DEADLINE,estimate=duration_estimate("shutdown"))
+    spinner = Spinner(tio.get_mode(Tio.SCREEN),lambda: waiter.remaining)
     spinner.start()
-    client.stop_db_system(dbid,shutdown_details)
-    db_response = client.get_db_system(dbid)
-    while db_response.data.lifecycle_state == oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING:
-        time.sleep(20)
-        db_response = client.get_db_system(dbid)
-    spinner.stop()
-
-    if db_response.data.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_INACTIVE:
-        raise(db_response.data.lifecycle_details)
-    else:
-        tio.writeln("Done.")
-    return
+    try:
+        if resume_id is None:
+            await oci_call(client.stop_db_system,dbid,shutdown_details,opc_retry_token=retry_token())
+            if on_started is not None:
+                on_started(dbid)
+        # The database may still report ACTIVE immediately after the stop
+        # request has been accepted, so treat it as pending too.
+        db = await waiter.wait(
+            db_system_poll(oci_cfg,dbid),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE, oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_INACTIVE,),
+            description = "database shutdown",
+            refresh = lambda: oci_data(client.get_db_system,dbid))
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    record_duration("shutdown",waiter,db,resume_id is not None)
+    return db
+
+
+def update_request(shape_name, config_id):
+    return oci.mysql.models.UpdateDbSystemDetails(
+        shape_name = shape_name,
+        configuration_id = config_id
+    )
 
- 
-def delete_db(oci_cfg, dbid):
-    client = oci.mysql.DbSystemClient(oci_cfg)
+
+def in_place_refused(e):
+    message = (e.message or "").lower()
+    return e.status == 400 and any(e.code == code and word in message for code, word in IN_PLACE_REFUSALS)
+
+
+@timed_phase("update")
+async def update_db(oci_cfg, dbid, shape_name, config_id, resume_id=None, on_started=None):
+    # Attempt to change the shape and configuration of a database service in
+    # place. Returns the updated database or None if the service refused the
+    # change, in which case the caller should fall back to a rebuild. Any
+    # other error, or an accepted change that fails, is raised. If resume_id
+    # is given it is the OCID of the update's work request.
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    wr_client = clients.get(oci.mysql.WorkRequestsClient,oci_cfg)
+
+    update_details = update_request(shape_name,config_id)
+
+    tio.write("Changing the shape of the existing database service in place...")
+    wr_waiter = MdsWaiter(deadline=UPDATE_DEADLINE,attribute=MdsWaiter.STATUS)
+    db_waiter = MdsWaiter(deadline=UPDATE_DEADLINE)
+    spinner = Spinner(tio.get_mode(Tio.SCREEN))
+    spinner.start()
+    try:
+        wr_id = resume_id
+        if wr_id is None:
+            try:
+                update_response = await oci_call(client.update_db_system,dbid,update_details)
+            except oci.exceptions.ServiceError as e:
+                # Only a refusal of the change of shape itself falls back to
+                # a rebuild. Any other invalid request, an authorization
+                # failure or a conflict, e.g. with a running backup, must
+                # never lead to the database being deleted, so is raised.
+                if not in_place_refused(e):
+                    raise
+                await spinner.stop()
+                tio.writeln("Rejected.")
+                tio.writeln("The service refused the in-place change: %s" % (e.message))
+                return None
+            wr_id = update_response.headers.get("opc-work-request-id")
+            if on_started is not None:
+                on_started(wr_id)
+
+        await wr_waiter.wait(
+            lambda: oci_data(wr_client.get_work_request,wr_id),
+            (oci.mysql.models.WorkRequest.STATUS_ACCEPTED, oci.mysql.models.WorkRequest.STATUS_IN_PROGRESS),
+            (oci.mysql.models.WorkRequest.STATUS_SUCCEEDED,),
+            description = "in-place update")
+        db = await db_waiter.wait(
+            db_system_poll(oci_cfg,dbid),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING,),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE,),
+            description = "database update",
+            refresh = lambda: oci_data(client.get_db_system,dbid))
+    finally:
+        await spinner.stop()
+
+    if db.shape_name != shape_name:
+        raise MdsWaiterError("The in-place update completed but the database has shape %s, not %s." % (db.shape_name,shape_name))
+    tio.writeln("Done (%s)." % format_elapsed(wr_waiter.elapsed + db_waiter.elapsed))
+    if resume_id is None:
+        history.record("update",db.shape_name,db.data_storage_size_in_gbs,wr_waiter.elapsed + db_waiter.elapsed)
+
+    return db
+
+
+@timed_phase("cutover")
+async def change_db(oci_cfg, dbid, details, description, resume_id=None, on_started=None):
+    # Applies details (e.g. a new address or database mode) to a database
+    # service and waits for the change to complete. If resume_id is given it
+    # is the OCID of the change's work request, started by an earlier run.
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    wr_client = clients.get(oci.mysql.WorkRequestsClient,oci_cfg)
+
+    tio.write("%s..." % (description))
+    wr_waiter = MdsWaiter(deadline=UPDATE_DEADLINE,attribute=MdsWaiter.STATUS)
+    db_waiter = MdsWaiter(deadline=UPDATE_DEADLINE)
+    spinner = Spinner(tio.get_mode(Tio.SCREEN))
+    spinner.start()
+    try:
+        wr_id = resume_id
+        if wr_id is None:
+            update_response = await oci_call(client.update_db_system,dbid,details)
+            wr_id = update_response.headers.get("opc-work-request-id")
+            if on_started is not None:
+                on_started(wr_id)
+        await wr_waiter.wait(
+            lambda: oci_data(wr_client.get_work_request,wr_id),
+            (oci.mysql.models.WorkRequest.STATUS_ACCEPTED, oci.mysql.models.WorkRequest.STATUS_IN_PROGRESS),
+            (oci.mysql.models.WorkRequest.STATUS_SUCCEEDED,),
+            description = "database change")
+        db = await db_waiter.wait(
+            db_system_poll(oci_cfg,dbid),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING,),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE,),
+            description = "database change",
+            refresh = lambda: oci_data(client.get_db_system,dbid))
+    finally:
+        await spinner.stop()
+    tio.writeln("Done (%s)." % format_elapsed(wr_waiter.elapsed + db_waiter.elapsed))
+    if resume_id is None:
+        history.record("change",db.shape_name,db.data_storage_size_in_gbs,wr_waiter.elapsed + db_waiter.elapsed)
+    return db
+
+
+@timed_phase("delete")
+async def delete_db(oci_cfg, dbid, resume_id=None, on_started=None):
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
 
     tio.write("Deleting the existing database service...")
-    spinner = Spinner()
+    waiter = MdsWaiter(deadline=DELETE_DEADLINE,estimate=duration_estimate("delete"))
+    spinner = Spinner(tio.get_mode(Tio.SCREEN),lambda: waiter.remaining)
     spinner.start()
-    client.delete_db_system(dbid)
-    db_response = client.get_db_system(dbid)
-    while db_response.data.lifecycle_state == oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETING:
-        time.sleep(20)
-        db_response = client.get_db_system(dbid)
-    spinner.stop()
-    
-    if db_response.data.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED:
-        raise(db_response.data.lifecycle_details)
-    else:
-        tio.writeln("Done.")
-    return
+    try:
+        if resume_id is None:
+            await oci_call(client.delete_db_system,dbid)
+            if on_started is not None:
+                on_started(dbid)
+        db = await waiter.wait(
+            db_system_poll(oci_cfg,dbid),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE, oci.mysql.models.DbSystem.LIFECYCLE_STATE_INACTIVE, oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETING),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED,),
+            description = "database deletion",
+            refresh = lambda: oci_data(client.get_db_system,dbid))
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    record_duration("delete",waiter,db,resume_id is not None)
+    return db
 
 
 def get_db_creds():
+    if answers.active:
+        creds = answers.credentials()
+        tio.writeln("Credentials for %s read as given by answers file." % creds.get_username())
+        return creds
 
     creds = MdsCredentials()
     while True:
@@ -267,86 +820,324 @@ def get_db_creds():
     return creds
 
 
-def create_db(oci_cfg, db_details):
-    client = oci.mysql.DbSystemClient(oci_cfg)
+@timed_phase("create")
+async def create_db(oci_cfg, db_details, resume_id=None, on_started=None):
+    # If resume_id is given then the database it identifies, whose creation
+    # was started by an earlier run, is waited on rather than a new one being
+    # created.
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
 
     tio.write("Creating a new database service...")
-    spinner = Spinner()
+    waiter = MdsWaiter(deadline=CREATE_DEADLINE,estimate=duration_estimate("create"))
+    spinner = Spinner(tio.get_mode(Tio.SCREEN),lambda: waiter.remaining)
     spinner.start()
-    db_response = client.create_db_system(db_details)
-    while db_response.data.lifecycle_state == oci.mysql.models.DbSystem.LIFECYCLE_STATE_CREATING:
-        time.sleep(20)
-        db_response = client.get_db_system(db_response.data.id)
-    spinner.stop()
-
-    if db_response.data.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE:
-        raise(db_response.data.lifecycle_details)
-    else:
-        tio.writeln("Done.")
-
-    return db_response.data
-
-
-def get_target_db(oci_cfg, src):
-    client = oci.mysql.MysqlaasClient(oci_cfg)
-    available_shapes_response = client.list_shapes(src.database.compartment_id)
-    shape = get_target_shape(src.database.shape_name,available_shapes_response.data)
-    cfg_id = get_target_config_id(client,shape.name,src)
+    try:
+        initial = None
+        db_id = resume_id
+        if db_id is None:
+            initial = await oci_data(client.create_db_system,db_details,opc_retry_token=retry_token())
+            db_id = initial.id
+            if on_started is not None:
+                on_started(db_id)
+        db = await waiter.wait(
+            db_system_poll(oci_cfg,db_id,db_details.compartment_id),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_CREATING,),
+            (oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE,),
+            initial = initial,
+            description = "database creation",
+            refresh = lambda: oci_data(client.get_db_system,db_id))
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    record_duration("create",waiter,db,resume_id is not None)
+
+    return db
+
+
+async def get_target_db(oci_cfg, src):
+    available_shapes = await list_shapes(oci_cfg,src.database.compartment_id)
+    shape = get_target_shape(src.database.shape_name,available_shapes)
+    cfg_id = await get_target_config_id(oci_cfg,shape.name,src)
     return MdsMetaDatabase(shape.name,cfg_id)
     
 
-def get_source_db(oci_cfg, db_ocid):
-    db_client = oci.mysql.DbSystemClient(oci_cfg)
-    svc_client = oci.mysql.MysqlaasClient(oci_cfg)
-    db_response = db_client.get_db_system(db_ocid)
-    cfg_response = svc_client.get_configuration(db_response.data.configuration_id)
-    return MdsDatabase(db_response.data,cfg_response.data)
+async def get_source_db(oci_cfg, db_ocid):
+    db_client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    db_response = await oci_call(db_client.get_db_system,db_ocid)
+    cfg = await get_configuration(oci_cfg,db_response.data.configuration_id)
+    return MdsDatabase(db_response.data,cfg)
 
 
 def create_revert_file(src, backup, revert_filename):
-    f = open(revert_filename,"w")
-    f.write("{\n")
-    f.write("\"backup\": {\n")
-    f.write("  \"display_name\": \"" + backup.display_name + "\",\n")
-    f.write("  \"id\": \"" + backup.id + "\"\n")
-    f.write("},\n")
-    f.write("\"database\": " + src.database.__str__())
-    f.write(",\n")
-    # JSON is purposely not concluded here with a final close bracket, '}'
-    # because we will later need to append a metadata object to it.
-    # See update_revert_file()
-    f.flush()
-    f.close()
+    # The metadata object is added by update_revert_file() once the new
+    # database exists. Until then the file is valid JSON but is not treated
+    # as a revert point.
+    write_revert_file(revert_filename,{
+        "backup": {
+            "display_name": backup.display_name,
+            "id": backup.id
+        },
+        "database": oci.util.to_dict(src.database)
+    })
+    return
+
+
+def update_revert_file(src, db, revert_filename, original=None):
+    # original is the database service a blue/green resize kept for rollback
+    with open(revert_filename,"r") as f:
+        rvt = json.load(f)
+    rvt["metadata"] = {
+        "created": TIMESTAMP,
+        "display_name": src.database.display_name,
+        "from": {
+            "shape_name": src.database.shape_name
+        },
+        "to": {
+            "id": db.id,
+            "shape_name": db.shape_name
+        }
+    }
+    if original is not None:
+        rvt["metadata"]["original"] = {
+            "id": original.id,
+            "display_name": original.display_name,
+            "ip_address": original.ip_address
+        }
+    write_revert_file(revert_filename,rvt)
     return
 
-def update_revert_file(src, db, revert_filename):
-    f = open(revert_filename,"a")
-    f.write("\"metadata\": {\n")
-    f.write("  \"created\": \"" + TIMESTAMP + "\",\n")
-    f.write("  \"display_name\": \"" + src.database.display_name + "\",\n")
-    f.write("  \"from\": {\n")
-    f.write("    \"shape_name\": \"" + src.database.shape_name + "\"\n")
-    f.write("  },\n")
-    f.write("  \"to\": {\n")
-    f.write("    \"id\": \"" + db.id + "\",\n")
-    f.write("    \"shape_name\": \"" + db.shape_name + "\"\n")
-    f.write("  }\n")
-    f.write("}\n")
-    f.write("}")
-    f.flush()
-    f.close()
+
+def find_revert_file(args):
+    # Finds the latest revert point for the database in the output directory
+    # using its revert index rather than parsing every revert file.
+    index = MdsRevertIndex(args.output_dir)
+    try:
+        index.refresh()
+        fname = index.latest(args.db_ocid,args.display_name)
+    finally:
+        index.close()
+    if fname is None:
+        raise MdsRevertError("No revert file found for %s in %s." % (args.db_ocid or args.display_name,args.output_dir))
+    return fname
+
+
+@timed_phase("start")
+async def start_db(oci_cfg, db_ocid):
+    client = clients.get(oci.mysql.DbSystemClient,oci_cfg)
+    await oci_call(client.start_db_system,db_ocid,opc_retry_token=retry_token())
     return
 
 
-def start_db(oci_cfg, db_ocid):
-    client = oci.mysql.DbSystemClient(oci_cfg)
-    client.start_db_system(db_ocid)
+async def restart_source(oci_cfg, src):
+    # The source is only needed offline until its backup is ACTIVE, so it is
+    # restarted before the copy is restored rather than after.
+    tio.writeln("Restarting original (existing) database service instance in the background.")
+    tio.writeln("This process will continue/complete while the copy is being created.")
+    await start_db(oci_cfg,src.database.id)
     return
 
 
-def accept_changes(destructive):
+async def check_compartment(oci_cfg, comp_id):
+    client = clients.get(oci.identity.IdentityClient,oci_cfg)
+    try:
+        compartment = await oci_data(client.get_compartment,comp_id)
+    except oci.exceptions.ServiceError as e:
+        raise MdsPreflightError("Compartment %s cannot be read: %s" % (comp_id,e.message))
+    if compartment.lifecycle_state != oci.identity.models.Compartment.LIFECYCLE_STATE_ACTIVE:
+        raise MdsPreflightError("Compartment %s is %s, not ACTIVE." % (compartment.name,compartment.lifecycle_state))
+
+
+async def check_subnet(oci_cfg, subnet_id, addresses, availability_domain):
+    # The subnet must be usable from the availability domain that databases
+    # are created in, and each address must be in the subnet and free.
+    if subnet_id is None:
+        raise MdsPreflightError("No subnet was given for the new database.")
+    client = clients.get(oci.core.VirtualNetworkClient,oci_cfg)
+    try:
+        subnet = await oci_data(client.get_subnet,subnet_id)
+    except oci.exceptions.ServiceError as e:
+        raise MdsPreflightError("Subnet %s cannot be read: %s" % (subnet_id,e.message))
+    if subnet.lifecycle_state != oci.core.models.Subnet.LIFECYCLE_STATE_AVAILABLE:
+        raise MdsPreflightError("Subnet %s is %s, not AVAILABLE." % (subnet.display_name,subnet.lifecycle_state))
+    if subnet.availability_domain is not None and subnet.availability_domain != availability_domain:
+        raise MdsPreflightError("Subnet %s is in %s, not %s." % (subnet.display_name,subnet.availability_domain,availability_domain))
+
+    problems = list()
+    for address in addresses:
+        try:
+            check_subnet_address(address,subnet)
+        except MdsPreflightError as e:
+            problems.append(e.__str__())
+    if problems:
+        raise MdsPreflightError("\n  ".join(problems))
+    in_use = await asyncio.gather(*[oci_data(
+            oci.pagination.list_call_get_all_results,
+            client.list_private_ips,
+            subnet_id = subnet_id,
+            ip_address = address) for address in addresses])
+    for address, private_ips in zip(addresses,in_use):
+        if len(private_ips) > 0:
+            problems.append("IP address %s is already in use in subnet %s." % (address,subnet.display_name))
+    if problems:
+        raise MdsPreflightError("\n  ".join(problems))
+
+
+async def list_limit_definitions(oci_cfg):
+    client = clients.get(oci.limits.LimitsClient,oci_cfg)
+    return await cached_catalog(
+            client,
+            catalog_key(oci_cfg,oci_cfg.get("tenancy"),"limits.mysql"),
+            "list[LimitDefinitionSummary]",
+            lambda: oci_data(
+                oci.pagination.list_call_get_all_results,
+                client.list_limit_definitions,
+                oci_cfg.get("tenancy"),
+                service_name = "mysql"))
+
+
+async def check_limits(oci_cfg, comp_id, availability_domain, planned):
+    # The availability of a limit in a compartment accounts for both the
+    # tenancy's service limit and any compartment quota. Limits that cannot
+    # be read (e.g. for want of permission) are reported but not enforced.
+    client = clients.get(oci.limits.LimitsClient,oci_cfg)
+    try:
+        demands = list()
+        for definition in await list_limit_definitions(oci_cfg):
+            if definition.is_deprecated or definition.is_resource_availability_supported == False:
+                continue
+            demand = limit_demand(definition.name,planned)
+            if demand is not None:
+                demands.append((definition,demand))
+        available = await asyncio.gather(*[oci_data(
+                client.get_resource_availability,
+                "mysql",
+                definition.name,
+                comp_id,
+                availability_domain = availability_domain if definition.scope_type == "AD" else None)
+            for definition, demand in demands])
+    except oci.exceptions.ServiceError as e:
+        return "Service limits cannot be read, so were not checked: %s" % e.message
+
+    problems = list()
+    for (definition, demand), availability in zip(demands,available):
+        if availability.available is not None and availability.available < demand:
+            problems.append("Service limit %s has %d available in compartment %s but %d are needed." % (definition.name,availability.available,comp_id,demand))
+    if problems:
+        raise MdsPreflightError("\n  ".join(problems))
+    return None
+
+
+async def check_backup(oci_cfg, backup_id):
+    try:
+        backup = await get_backup(oci_cfg,backup_id)
+    except oci.exceptions.ServiceError as e:
+        raise MdsPreflightError("Backup %s cannot be read: %s" % (backup_id,e.message))
+    if backup.lifecycle_state != oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE:
+        raise MdsPreflightError("Backup %s is %s, not ACTIVE." % (backup_id,backup.lifecycle_state))
+
+
+def forget_configuration(oci_cfg, comp_id, config_id):
+    # Removes a configuration that no longer exists from the catalog cache,
+    # so that the next run chooses from the configurations that do
+    catalog.invalidate(catalog_key(oci_cfg,None,"configuration",config_id))
+    catalog.invalidate(catalog_key(oci_cfg,comp_id,"configurations.all"))
+
+
+async def check_configuration(oci_cfg, tgt, comp_id):
+    # The configuration is read from the service rather than the catalog
+    # cache, which may hold one that has since been deleted. comp_id is the
+    # compartment whose configurations it was chosen from.
+    client = clients.get(oci.mysql.MysqlaasClient,oci_cfg)
+    try:
+        cfg = await oci_data(client.get_configuration,tgt.config_id)
+    except oci.exceptions.ServiceError as e:
+        if e.status == 404:
+            forget_configuration(oci_cfg,comp_id,tgt.config_id)
+        raise MdsPreflightError("Configuration %s cannot be read: %s" % (tgt.config_id,e.message))
+    if cfg.lifecycle_state != oci.mysql.models.Configuration.LIFECYCLE_STATE_ACTIVE:
+        forget_configuration(oci_cfg,comp_id,tgt.config_id)
+        raise MdsPreflightError("Configuration %s is %s, not ACTIVE." % (cfg.display_name,cfg.lifecycle_state))
+    if cfg.shape_name != tgt.shape_name:
+        raise MdsPreflightError("Configuration %s is for shape %s, not %s." % (cfg.display_name,cfg.shape_name,tgt.shape_name))
+
+
+def planned_resize(src, shape_name, comp_id=None, subnet_id=None):
+    # A resized database takes up no more storage and no new instance
+    # unless its shape changes
+    if shape_name == src.database.shape_name:
+        shape_name = None
+    return MdsPlannedDatabase(
+            comp_id or src.database.compartment_id,
+            subnet_id or src.database.subnet_id,
+            shape_name,
+            0,
+            src.database.is_highly_available)
+
+
+def planned_copy(src, tgt, comp_id, subnet_id, address):
+    return MdsPlannedDatabase(
+            comp_id,
+            subnet_id,
+            tgt.shape_name,
+            src.database.data_storage_size_in_gbs,
+            src.database.is_highly_available,
+            address)
+
+
+async def preflight(oci_cfg, availability_domain, planned, backup_ids=(), targets=(), catalog_comp_id=None):
+    # Checks that every database in planned can be created or changed, so
+    # that a plan that OCI would reject is rejected before the source is
+    # shut down, backed up or deleted, and that the configuration of each of
+    # the targets, chosen from those of catalog_comp_id, exists and suits
+    # its shape. The checks run concurrently and every problem found is
+    # reported.
+    checks = MdsPreflight()
+    compartments = dict()
+    subnets = dict()
+    for db in planned:
+        compartments.setdefault(db.comp_id,list()).append(db)
+        addresses = subnets.setdefault(db.subnet_id,list())
+        if db.address is not None:
+            addresses.append(db.address)
+    for comp_id, comp_planned in compartments.items():
+        checks.add(check_compartment(oci_cfg,comp_id))
+        checks.add(check_limits(oci_cfg,comp_id,availability_domain,comp_planned))
+    for subnet_id, addresses in subnets.items():
+        checks.add(check_subnet(oci_cfg,subnet_id,addresses,availability_domain))
+    for backup_id in backup_ids:
+        checks.add(check_backup(oci_cfg,backup_id))
+    checked = set()
+    for tgt in targets:
+        if (tgt.config_id, tgt.shape_name) not in checked:
+            checked.add((tgt.config_id,tgt.shape_name))
+            checks.add(check_configuration(oci_cfg,tgt,catalog_comp_id))
+
+    tio.write("Running pre-flight checks...")
+    warnings = await checks.run()
+    tio.writeln("Done.")
+    for warning in warnings:
+        tio.writeln("  Warning: %s" % (warning))
+
+
+def accept_changes(destructive, in_place=False, copy_source=Mdsargs.COLD):
     tio.writeln("The following operations will occur:")
-    if destructive:
+    if not destructive and copy_source == Mdsargs.ONLINE:
+        tio.writeln("  1. The existing database service will be backed up while it is running.")
+        tio.writeln("  2. A new database service will be created and the backup will be restored to it.")
+    elif not destructive and copy_source == Mdsargs.LATEST:
+        tio.writeln("  1. The latest automatic backup of the existing database service will be used,")
+        tio.writeln("     or if there is none it will be backed up while it is running.")
+        tio.writeln("  2. A new database service will be created and the backup will be restored to it.")
+    elif not destructive and copy_source == Mdsargs.PITR:
+        tio.writeln("  1. A new database service will be created by a point-in-time restore of the")
+        tio.writeln("     latest recovery point of the existing database service.")
+    elif in_place:
+        tio.writeln("  1. The existing database service will be backed up while it is running.")
+        tio.writeln("  2. The shape and configuration of the existing database service will be changed in place.")
+        tio.writeln("  3. If the service refuses the in-place change then the existing database service")
+        tio.writeln("     will be shutdown, its changes since the first backup will be backed up, and it")
+        tio.writeln("     will be DELETED and recreated from the backups instead.")
+    elif destructive:
         tio.writeln("  1. The existing database service will be shutdown.")
         tio.writeln("  2. The existing database service will then be backed up.")
         tio.writeln("  3. The existing database service will then be DELETED.")
@@ -354,10 +1145,97 @@ def accept_changes(destructive):
     else:
         tio.writeln("  1. The existing database service will be shutdown.")
         tio.writeln("  2. The existing database service will then be backed up")
-        tio.writeln("  3. A new database service will be created and the backup will be restored to it.")
-        tio.writeln("  4. The original (existing) database service will be restarted.")
+        tio.writeln("  3. The original (existing) database service will be restarted.")
+        tio.writeln("  4. A new database service will be created and the backup will be restored to it.")
+    return confirm_changes()
+
+
+def accept_clones(count, copy_source, backup_id):
+    tio.writeln("The following operations will occur:")
+    if backup_id is not None:
+        tio.writeln("  1. The existing backup %s will be used." % backup_id)
+    elif copy_source == Mdsargs.ONLINE:
+        tio.writeln("  1. The existing database service will be backed up once while it is running.")
+    elif copy_source == Mdsargs.LATEST:
+        tio.writeln("  1. The latest automatic backup of the existing database service will be used,")
+        tio.writeln("     or if there is none it will be backed up once while it is running.")
+    elif copy_source == Mdsargs.PITR:
+        tio.writeln("  1. The latest recovery point of the existing database service will be used.")
+    else:
+        tio.writeln("  1. The existing database service will be shutdown, backed up once and then")
+        tio.writeln("     restarted.")
+    tio.writeln("  2. %d new database services will be created concurrently and restored from it." % count)
+    return confirm_changes()
+
+
+def batch_operation(entry):
+    # Describes, a line at a time, what a batch will do to the database of a
+    # manifest entry
+    shape = entry.shape_name or "its current shape"
+    if entry.action == Mdsargs.RESIZE and entry.resize_method == Mdsargs.INPLACE:
+        return ["Backed up while it is running and changed in place to %s." % (shape),
+                "If the service refuses the change it will be shutdown, DELETED and recreated."]
+    if entry.action == Mdsargs.RESIZE:
+        return ["Shutdown, backed up, DELETED and recreated with %s." % (shape)]
+    if entry.copy_source == Mdsargs.ONLINE:
+        source = "a backup taken while it is running"
+    elif entry.copy_source == Mdsargs.LATEST:
+        source = "its latest automatic backup"
+    elif entry.copy_source == Mdsargs.PITR:
+        source = "its latest recovery point"
+    else:
+        source = "a backup taken while it is shutdown"
+    return ["Copied from %s to a new database service" % (source),
+            "with %s." % (shape)]
+
+
+def accept_batch(manifest):
+    resized = len([entry for entry in manifest.entries if entry.action == Mdsargs.RESIZE])
+    tio.writeln("The following operations will occur, %d at a time and at most %d per compartment:" % (manifest.max_workers,manifest.max_per_compartment))
+    for n, entry in enumerate(manifest.entries,1):
+        tio.writeln("  %d. %s %s" % (n,entry.action,entry.db_ocid))
+        for line in batch_operation(entry):
+            tio.writeln("     %s" % (line))
+    if resized > 0:
+        tio.writeln("Up to %d of these database services may be DELETED and recreated." % (resized))
+    return confirm_changes()
+
+
+def answered_confirmation(question):
+    tio.writeln("%s [yes|no]: %s (from answers file)" % (question,"yes" if answers.confirm else "no"))
+    return answers.confirm
+
+
+def accept_bluegreen(keep_original):
+    steps = list()
+    steps.append("The existing database service will be backed up while it is running.")
+    steps.append("A new database service with the new shape will be created from the backup under\n     a temporary name and address, and will replicate from the existing one.")
+    steps.append("At cutover the existing database service will be made read-only until the new\n     one has caught up.")
+    steps.append("The existing database service will be moved to a spare address, and the new one\n     will take over its name and address.")
+    if keep_original:
+        steps.append("The existing database service will be kept, read-only, so that REVERT can swap\n     them back.")
+    else:
+        steps.append("The existing database service will then be DELETED.")
+    tio.writeln("The following operations will occur:")
+    for n, step in enumerate(steps,1):
+        tio.writeln("  %d. %s" % (n,step))
+    return confirm_changes()
+
+
+def accept_rollback(original):
+    tio.writeln("The following operations will occur:")
+    tio.writeln("  1. The resized database service will be made read-only and moved to a spare address.")
+    tio.writeln("  2. The original database service, %s, will take back its name and address and" % (original.display_name))
+    tio.writeln("     will be made writable again.")
+    tio.writeln("  3. The resized database service will then be DELETED. Changes made to it since it")
+    tio.writeln("     was resized are lost.")
+    return confirm_changes()
 
+
+def confirm_changes():
     tio.writeln("\nEach of the above operations may take a number of minutes to complete.\n")
+    if answers.active:
+        return answered_confirmation("Do you want to proceed")
     confirmation = None
     while confirmation not in ("Yes","yes","Y","y","No","no","N","n"):
         confirmation = tio.input("Do you want to proceed [yes|no]: ")
@@ -368,6 +1246,9 @@ def accept_changes(destructive):
 
 def resize_copy():
     tio.writeln("\n")
+    if answers.active:
+        tio.writeln("Do you want to resize the copy database [yes|no]: %s (from answers file)" % ("yes" if answers.resize_copy else "no"))
+        return answers.resize_copy
     confirmation = None
     while confirmation not in ("Yes","yes","Y","y","No","no","N","n"):
         confirmation = tio.input("Do you want to resize the copy database [yes|no]: ")
@@ -376,12 +1257,185 @@ def resize_copy():
     return False
 
 
-def rcopy(oci_cfg, args):
-    copy_db = None
+def copy_description(src, tgt):
+    desc = "Copy " + TIMESTAMP
+    if tgt.shape_name != src.database.shape_name or tgt.config_id != src.database.configuration_id:
+        desc = "Resized copy " + TIMESTAMP
+    if src.database.description is not None:
+        desc = desc + ". " + src.database.description
+    if len(desc) > MAX_DESC_LEN:
+        desc = desc[0:MAX_DESC_LEN]
+    return desc
+
+
+def pitr_enabled(src):
+    pitr_policy = getattr(src.database.backup_policy,"pitr_policy",None)
+    return pitr_policy is not None and pitr_policy.is_enabled == True
+
+
+async def latest_backup(oci_cfg, src):
+    client = clients.get(oci.mysql.DbBackupsClient,oci_cfg)
+    backups = await oci_data(
+            client.list_backups,
+            src.database.compartment_id,
+            db_system_id = src.database.id,
+            lifecycle_state = oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE,
+            creation_type = oci.mysql.models.Backup.CREATION_TYPE_AUTOMATIC,
+            sort_by = "timeCreated",
+            sort_order = "DESC",
+            limit = 1)
+    if len(backups) == 0:
+        return None
+    return backups[0]
+
+
+def move_backup_request(comp_id):
+    return oci.mysql.models.ChangeBackupCompartmentDetails(
+        compartment_id = comp_id
+    )
+
+
+def backup_source_details(backup_id):
+    return oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
+        source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
+        backup_id = backup_id
+    )
+
+
+def pitr_source_details(src):
+    return oci.mysql.models.CreateDbSystemSourceFromPitrDetails(
+        source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_PITR,
+        db_system_id = src.database.id
+    )
+
+
+async def get_copy_source(oci_cfg, src, copy_source, comp_id, journal=None):
+    # Returns the source details for the copy. Only the COLD copy source
+    # takes the source database offline; the others leave it serving traffic.
+    dbid = src.database.id
+    fetch_backup = lambda backup_id: get_backup(oci_cfg,backup_id)
+    if copy_source == Mdsargs.PITR:
+        return pitr_source_details(src)
+
+    backup = None
+    if copy_source == Mdsargs.LATEST:
+        backup = await journal_step(journal,"latest_backup",lambda rid, started: latest_backup(oci_cfg,src),fetch_backup)
+        if backup is None:
+            tio.writeln("No automatic backup found; backing up the running database service instead.")
+        else:
+            tio.writeln("Using automatic backup %s created %s." % (backup.display_name,backup.time_created))
+
+    if backup is None:
+        if copy_source == Mdsargs.COLD:
+            await journal_step(journal,"shutdown",lambda rid, started: shutdown_db(oci_cfg,dbid,rid,started))
+            backup = await journal_step(journal,"backup",lambda rid, started: backup_db(oci_cfg,dbid,rid,started),fetch_backup)
+            await journal_step(journal,"restart",lambda rid, started: restart_source(oci_cfg,src))
+        else:
+            backup = await journal_step(journal,"backup",lambda rid, started: backup_db(oci_cfg,dbid,rid,started),fetch_backup)
+
+        if comp_id != src.database.compartment_id:
+            # Copy is to another compartment, so move the backup to it. An
+            # automatic backup belongs to the source's backup policy and so is
+            # left where it is.
+            client = clients.get(oci.mysql.DbBackupsClient,oci_cfg)
+            await journal_step(journal,"move_backup",lambda rid, started: oci_call(
+                client.change_backup_compartment,
+                backup.id,
+                move_backup_request(comp_id),
+                opc_retry_token = retry_token()
+            ))
+
+    return backup_source_details(backup.id)
+
+
+def copy_details(src, tgt, name, credentials, comp_id, subnet_id, address, source_details):
+    # The details of a copy of src, restored from source_details, which keeps
+    # the source's settings other than those given.
+    details = oci.mysql.models.CreateDbSystemDetails(
+        admin_password = credentials.get_password(),
+        admin_username = credentials.get_username(),
+        compartment_id = comp_id,
+        shape_name = tgt.shape_name,
+        source = source_details,
+        subnet_id = subnet_id,
+        availability_domain = src.database.availability_domain,
+        backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
+            is_enabled = src.database.backup_policy.is_enabled,
+            window_start_time = src.database.backup_policy.window_start_time,
+            retention_in_days = src.database.backup_policy.retention_in_days,
+            defined_tags = src.database.backup_policy.defined_tags,
+            freeform_tags = src.database.backup_policy.freeform_tags
+        ), 
+        configuration_id = tgt.config_id,
+        data_storage_size_in_gbs = src.database.data_storage_size_in_gbs, 
+        defined_tags = src.database.defined_tags,
+        description = copy_description(src,tgt),
+        display_name = name,
+        freeform_tags = src.database.freeform_tags,
+        hostname_label = src.database.hostname_label,
+        is_highly_available = src.database.is_highly_available,
+        maintenance = oci.mysql.models.CreateMaintenanceDetails(
+            window_start_time = src.database.maintenance.window_start_time
+        ),
+        mysql_version = src.database.mysql_version,
+        port = src.database.port,
+        port_x = src.database.port_x
+        # Unassigned attribute: fault_domain
+    )
+    if address is not None:
+        details.ip_address = address
+    return details
+
+
+async def copy_db(oci_cfg, src, tgt, name, credentials, comp_id, subnet_id, address, copy_source, journal=None):
+    # IP address is only set in the copy_db_details if one was specified,
+    # otherwise OCI will give the copied database an IP address. It is
+    # checked before any changes are made to the source.
+    if address is not None and address == src.database.ip_address:
+        raise MdsargsError("IP address, %s, cannot be the same as the source in a copy." % address)
+    if copy_source == Mdsargs.PITR and not pitr_enabled(src):
+        raise MdsargsError("Point-in-time recovery is not enabled for %s." % src.database.display_name)
+
+    source_details = await get_copy_source(oci_cfg,src,copy_source,comp_id,journal)
+
+    # Now create the details for the (new) copy database 
+    copy_db_details = copy_details(src,tgt,name,credentials,comp_id,subnet_id,address,source_details)
+
+    return await journal_step(journal,"create",
+            lambda rid, started: create_db(oci_cfg,copy_db_details,rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+
+
+def copy_journal(oci_cfg, args, src, tgt, name, comp_id, subnet_id):
+    journal = new_journal(oci_cfg,args.output_dir,args.action,src,
+            shape_name = tgt.shape_name,
+            config_id = tgt.config_id,
+            name = name,
+            compartment_id = comp_id,
+            subnet_id = subnet_id,
+            address = args.address,
+            copy_source = args.copy_source)
+    args.journal_file = journal.fname
+    return journal
+
+
+async def get_copy_target_db(oci_cfg, src):
+    # Get values for attributes which may vary according to whether the 
+    # copied database is to be resized.
+    if resize_copy():
+        tio.writeln("\nGet resize information.\n")
+        return await get_target_db(oci_cfg,src)
+    tio.write("\n")
+    return MdsMetaDatabase(src.database.shape_name,src.database.configuration_id)
+
+
+async def rcopy(oci_cfg, args):
+    copy_instance = None
     tio.writeln("\nINFORMATION GATHERING PHASE\n")
+    gathering = metrics.begin("information_gathering")
 
     tio.write("Getting existing database's details...")
-    src = get_source_db(oci_cfg,args.db_ocid)
+    src = await get_source_db(oci_cfg,args.db_ocid)
     tio.writeln("Done.")
 
     # Get values for attributes that have been specified on the command line
@@ -392,369 +1446,1229 @@ def rcopy(oci_cfg, args):
     else:
         name = "copy-" + src.database.display_name
 
-    # Get values for attributes which may vary according to whether the 
-    # copied database is to be resized.
-    desc = None
-    shape = None
-    config_id = None
-    if resize_copy():
-        tio.writeln("\nGet resize information.\n")
-        tgt = get_target_db(oci_cfg,src)
-        shape = tgt.shape_name
-        config_id = tgt.config_id
-        desc = "Resized copy " + TIMESTAMP
-    else:
-        shape = src.database.shape_name
-        config_id = src.database.configuration_id
-        desc = "Copy " + TIMESTAMP
-    if src.database.description is not None:
-        desc = desc + ". " + src.database.description
-    if len(desc) > MAX_DESC_LEN:
-        desc = desc[0:MAX_DESC_LEN]
+    # Posit that the remote copy is to another subnet in the same
+    # compartment, then test and alter accordingly
+    comp_id = src.database.compartment_id
+    if args.comp_ocid is not None:
+        comp_id = args.comp_ocid
+
+    tgt = await get_copy_target_db(oci_cfg,src)
+    await preflight(oci_cfg,src.database.availability_domain,[planned_copy(src,tgt,comp_id,args.subnet_ocid,args.address)],targets=[tgt],catalog_comp_id=src.database.compartment_id)
+    if args.plan:
+        metrics.end(gathering)
+        write_plan(await plan_copy(oci_cfg,args.action,src,tgt,name,comp_id,args.subnet_ocid,args.address,args.copy_source),args)
+        return copy_instance
 
     tio.writeln("\nProvide credentials for the database administrator.")
     credentials = get_db_creds()
 
+    metrics.end(gathering)
     tio.writeln("\nEXECUTION PHASE\n")
-    if accept_changes(NON_DESTRUCTIVE):
+    if accept_changes(NON_DESTRUCTIVE,copy_source=args.copy_source):
         tio.write("\n")
-        shutdown_db(oci_cfg,src.database.id)
-        backup = backup_db(oci_cfg,src.database.id)
-
-        # Posit that the remote copy is to another subnet in the same
-        # compartment, then test and alter accordingly
-        comp_id = src.database.compartment_id
-        if args.comp_ocid is not None:
-            # Remote copy is to another compartment, so move the backup to it
-            comp_id = args.comp_ocid
-            client = oci.mysql.DbBackupsClient(oci_cfg)
-            client.change_backup_compartment(
-                backup.id,
-                oci.mysql.models.ChangeBackupCompartmentDetails(
-                    compartment_id = args.comp_ocid
-                )
-            )
-
-        # Now create the details for the (new) resized database 
-        copy_db_details = oci.mysql.models.CreateDbSystemDetails(
-            admin_password = credentials.get_password(),
-            admin_username = credentials.get_username(),
-            compartment_id = comp_id,
-            shape_name = shape,
-            source = oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
-                source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
-                backup_id = backup.id
-            ),
-            subnet_id = args.subnet_ocid,
-            availability_domain = src.database.availability_domain,
-            backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
-                is_enabled = src.database.backup_policy.is_enabled,
-                window_start_time = src.database.backup_policy.window_start_time,
-                retention_in_days = src.database.backup_policy.retention_in_days,
-                defined_tags = src.database.backup_policy.defined_tags,
-                freeform_tags = src.database.backup_policy.freeform_tags
-            ), 
-            configuration_id = config_id,
-            data_storage_size_in_gbs = src.database.data_storage_size_in_gbs, 
-            defined_tags = src.database.defined_tags,
-            description = desc,
-            display_name = name,
-            freeform_tags = src.database.freeform_tags,
-            hostname_label = src.database.hostname_label,
-            is_highly_available = src.database.is_highly_available,
-            maintenance = oci.mysql.models.CreateMaintenanceDetails(
-                window_start_time = src.database.maintenance.window_start_time
-            ),
-            mysql_version = src.database.mysql_version,
-            port = src.database.port,
-            port_x = src.database.port_x
-            # Unassigned attribute: fault_domain
-        )
-        # IP address has not been specified in the above construction of
-        # the copy_db_details. If we leave it unspecified then OCI will give
-        # the copied database an IP address, however if an IP address was
-        # specified on the command line then we should use it.
-        if args.address is not None:
-            if args.address != src.database.ip_address:
-                copy_db_details.ip_address = args.address
-            else:
-                raise MdsargsError("IP address, %s, cannot be the same as the source in a local copy." % args.address)
-
-        copy_instance = create_db(oci_cfg,copy_db_details)
-        tio.writeln("\nRestarting original (existing) database service instance in the background.")
-        tio.writeln("This process will continue/complete after the application shuts down.")
-        start_db(oci_cfg,src.database.id)
+        journal = copy_journal(oci_cfg,args,src,tgt,name,comp_id,args.subnet_ocid)
+        copy_instance = await copy_db(oci_cfg,src,tgt,name,credentials,comp_id,args.subnet_ocid,args.address,args.copy_source,journal)
     else:
         tio.writeln("\nRemote copy has been aborted by user.")
 
     return copy_instance
 
 
-def lcopy(oci_cfg, args):
+def local_copy_name(src, display_name):
+    if display_name is None:
+        return "copy-" + src.database.display_name
+    if display_name == src.database.display_name:
+        raise MdsargsError("Display name, %s, cannot be the same as the source in a local copy." % display_name)
+    return display_name
+
+
+async def lcopy(oci_cfg, args):
     copy_instance = None
     tio.writeln("\nINFORMATION GATHERING PHASE\n")
+    gathering = metrics.begin("information_gathering")
 
     tio.write("Getting existing database's details...")
-    src = get_source_db(oci_cfg,args.db_ocid)
+    src = await get_source_db(oci_cfg,args.db_ocid)
     tio.writeln("Done.")
 
     # Get values for attributes that have been specified on the command line
     # otherwise assign their value from the source database
-    name = None
-    if args.display_name is not None:
-        if args.display_name != src.database.display_name:
-            name = args.display_name
-        else:
-            raise MdsargsError("Display name, %s, cannot be the same as the source in a local copy." % args.display_name)
-    else:
-        name = "copy-" + src.database.display_name
-
-    # Get values for attributes which may vary according to whether the 
-    # copied database is to be resized.
-    desc = None
-    shape = None
-    config_id = None
-
-    if resize_copy():
-        tio.writeln("\nGet resize information.\n")
-        tgt = get_target_db(oci_cfg,src)
-        shape = tgt.shape_name
-        config_id = tgt.config_id
-        desc = "Resized copy " + TIMESTAMP
-    else:
-        tio.write("\n")
-        shape = src.database.shape_name
-        config_id = src.database.configuration_id
-        desc = "Copy " + TIMESTAMP
+    name = local_copy_name(src,args.display_name)
 
-    if src.database.description is not None:
-        desc = desc + ". " + src.database.description
-    if len(desc) > MAX_DESC_LEN:
-        desc = desc[0:MAX_DESC_LEN]
+    tgt = await get_copy_target_db(oci_cfg,src)
+    await preflight(oci_cfg,src.database.availability_domain,[planned_copy(src,tgt,src.database.compartment_id,src.database.subnet_id,args.address)],targets=[tgt],catalog_comp_id=src.database.compartment_id)
+    if args.plan:
+        metrics.end(gathering)
+        write_plan(await plan_copy(oci_cfg,args.action,src,tgt,name,src.database.compartment_id,src.database.subnet_id,args.address,args.copy_source),args)
+        return copy_instance
 
     tio.writeln("\nProvide credentials for the database administrator.")
     credentials = get_db_creds()
 
+    metrics.end(gathering)
     tio.writeln("\nEXECUTION PHASE\n")
-    if accept_changes(NON_DESTRUCTIVE):
+    if accept_changes(NON_DESTRUCTIVE,copy_source=args.copy_source):
         tio.write("\n")
-        shutdown_db(oci_cfg,src.database.id)
-        backup = backup_db(oci_cfg,src.database.id)
-
-        # Now create the details for the (new) resized database 
-        copy_db_details = oci.mysql.models.CreateDbSystemDetails(
-            admin_password = credentials.get_password(),
-            admin_username = credentials.get_username(),
-            compartment_id = src.database.compartment_id,
-            shape_name = shape,
-            source = oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
-                source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
-                backup_id = backup.id
-            ),
-            subnet_id = src.database.subnet_id,
-            availability_domain = src.database.availability_domain,
-            backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
-                is_enabled = src.database.backup_policy.is_enabled,
-                window_start_time = src.database.backup_policy.window_start_time,
-                retention_in_days = src.database.backup_policy.retention_in_days,
-                defined_tags = src.database.backup_policy.defined_tags,
-                freeform_tags = src.database.backup_policy.freeform_tags
-            ), 
-            configuration_id = config_id,
-            data_storage_size_in_gbs = src.database.data_storage_size_in_gbs, 
-            defined_tags = src.database.defined_tags,
-            description = desc,
-            display_name = name,
-            freeform_tags = src.database.freeform_tags,
-            hostname_label = src.database.hostname_label,
-            is_highly_available = src.database.is_highly_available,
-            maintenance = oci.mysql.models.CreateMaintenanceDetails(
-                window_start_time = src.database.maintenance.window_start_time
-            ),
-            mysql_version = src.database.mysql_version,
-            port = src.database.port,
-            port_x = src.database.port_x
-            # Unassigned attribute: fault_domain
-        )
-        # IP address has not been specified in the above construction of
-        # the copy_db_details. If we leave it unspecified then OCI will give
-        # the copied database an IP address, however if an IP address was
-        # specified on the command line then we should use it.
-        if args.address is not None:
-            if args.address != src.database.ip_address:
-                copy_db_details.ip_address = args.address
-            else:
-                raise MdsargsError("IP address, %s, cannot be the same as the source in a local copy." % args.address)
-
-        copy_instance = create_db(oci_cfg,copy_db_details)
-        tio.writeln("\nRestarting original (existing) database service instance in the background.")
-        tio.writeln("This process will continue/complete after the application shuts down.")
-        start_db(oci_cfg,src.database.id)
+        journal = copy_journal(oci_cfg,args,src,tgt,name,src.database.compartment_id,src.database.subnet_id)
+        copy_instance = await copy_db(oci_cfg,src,tgt,name,credentials,src.database.compartment_id,src.database.subnet_id,args.address,args.copy_source,journal)
     else:
         tio.writeln("\nLocal copy has been aborted by user.")
 
     return copy_instance
 
 
-def revert(oci_cfg, args):
+def revert_details(rvt, credentials):
+    # The details of the database recorded in the revert file, restored from
+    # the backup taken before it was resized.
+    desc = "Reverted " + TIMESTAMP
+    if rvt["database"]["description"] is not None:
+        desc = desc + ". " + rvt["database"]["description"] 
+
+    if len(desc) > MAX_DESC_LEN:
+        desc = desc[0:MAX_DESC_LEN]
+
+    return oci.mysql.models.CreateDbSystemDetails(
+        admin_password = credentials.get_password(),
+        admin_username = credentials.get_username(),
+        compartment_id = rvt["database"]["compartment_id"],
+        shape_name = rvt["database"]["shape_name"],
+        source = oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
+            source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
+            backup_id = rvt["backup"]["id"]
+        ),
+        subnet_id = rvt["database"]["subnet_id"],
+        availability_domain = rvt["database"]["availability_domain"],
+        backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
+            is_enabled = rvt["database"]["backup_policy"]["is_enabled"],
+            window_start_time = rvt["database"]["backup_policy"]["window_start_time"],
+            retention_in_days = rvt["database"]["backup_policy"]["retention_in_days"],
+            defined_tags = rvt["database"]["backup_policy"]["defined_tags"],
+            freeform_tags = rvt["database"]["backup_policy"]["freeform_tags"]
+        ), 
+        configuration_id = rvt["database"]["configuration_id"],
+        data_storage_size_in_gbs = rvt["database"]["data_storage_size_in_gbs"], 
+        defined_tags = rvt["database"]["defined_tags"],
+        description = desc,
+        display_name = rvt["database"]["display_name"],
+        freeform_tags = rvt["database"]["freeform_tags"],
+        hostname_label = rvt["database"]["hostname_label"],
+        ip_address = rvt["database"]["ip_address"],
+        is_highly_available = rvt["database"]["is_highly_available"],
+        maintenance = oci.mysql.models.CreateMaintenanceDetails(
+            window_start_time = rvt["database"]["maintenance"]["window_start_time"]
+        ),
+        mysql_version = rvt["database"]["mysql_version"],
+        port = rvt["database"]["port"],
+        port_x = rvt["database"]["port_x"]
+        # Unassigned attribute: fault_domain
+    )
+
+
+async def revert_db(oci_cfg, rvt, src, credentials, revert_filename, journal=None):
+    src_id = src.database.id
+
+    async def revert_file_step(rid, started):
+        create_revert_file(await get_source_db(oci_cfg,src_id),backup,revert_filename)
+
+    await journal_step(journal,"shutdown",lambda rid, started: shutdown_db(oci_cfg,src_id,rid,started))
+    backup = await journal_step(journal,"backup",
+            lambda rid, started: backup_db(oci_cfg,src_id,rid,started),
+            lambda backup_id: get_backup(oci_cfg,backup_id))
+    await journal_step(journal,"revert_file",revert_file_step)
+
+    # Now create the details for the (new) resized database 
+    reverted_db_details = revert_details(rvt,credentials)
+    await journal_step(journal,"delete",lambda rid, started: delete_db(oci_cfg,src_id,rid,started))
+    reverted_instance = await journal_step(journal,"create",
+            lambda rid, started: create_db(oci_cfg,reverted_db_details,rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    await journal_step(journal,"revert_metadata",lambda rid, started: update_revert_file(src,reverted_instance,revert_filename))
+    return reverted_instance
+
+
+async def kept_original(oci_cfg, rvt):
+    # Returns the original database service that a blue/green resize kept,
+    # or None if there is none to swap back to
+    original = rvt["metadata"].get("original")
+    if original is None:
+        return None
+    try:
+        db = await get_db(oci_cfg,original["id"])
+    except oci.exceptions.ServiceError as e:
+        if e.status != 404:
+            raise
+        db = None
+    if db is None or db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE or db.ip_address == rvt["database"]["ip_address"]:
+        tio.writeln("The original database service, %s, is no longer available to swap back to." % (original["display_name"]))
+        return None
+    return db
+
+
+def restore_request(rvt):
+    return oci.mysql.models.UpdateDbSystemDetails(
+        ip_address = rvt["database"]["ip_address"],
+        display_name = rvt["database"]["display_name"],
+        database_mode = oci.mysql.models.DbSystem.DATABASE_MODE_READ_WRITE
+    )
+
+
+async def rollback_db(oci_cfg, rvt, src, original_id, journal=None):
+    # Reverts a blue/green resize by swapping the resized database service
+    # and the original it kept, so nothing has to be restored from a backup
+    dbid = src.database.id
+    paused = None
+    if journal is None or not journal.is_done("read_only"):
+        paused = time.monotonic()
+    await journal_step(journal,"read_only",
+            lambda rid, started: change_db(oci_cfg,dbid,database_mode_request(oci.mysql.models.DbSystem.DATABASE_MODE_READ_ONLY),"Making the resized database service read-only",rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    await journal_step(journal,"move_resized",
+            lambda rid, started: move_aside(oci_cfg,dbid,src.database.subnet_id,resized_name(src),"Moving the resized database service to a spare address",rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    original = await journal_step(journal,"move_original",
+            lambda rid, started: change_db(oci_cfg,original_id,restore_request(rvt),"Restoring the original database service's name and address",rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    if paused is not None:
+        tio.writeln("Writes were paused for %s." % format_elapsed(time.monotonic() - paused))
+    await journal_step(journal,"delete",lambda rid, started: delete_db(oci_cfg,dbid,rid,started))
+    return original
+
+
+async def revert(oci_cfg, args):
     reverted_instance = None
-    input_revert_file = args.revert_file
     output_revert_filename = os.path.join(args.output_dir,OUTPUT_REVERT_FILE)
 
     tio.writeln("INFORMATION GATHERING PHASE\n")
-    
-    rvt = json.load(open(input_revert_file,"r"))
-    tio.writeln("Revert details read and parsed.")
+    gathering = metrics.begin("information_gathering")
+
+    input_revert_file = args.revert_file
+    if input_revert_file is None:
+        if args.db_ocid is None and args.display_name is None:
+            raise MdsargsError("The REVERT action requires a revert file, database OCID or display name.")
+        input_revert_file = find_revert_file(args)
+    rvt = read_revert_file(input_revert_file)
+    tio.writeln("Revert details read from %s and parsed." % (input_revert_file))
 
     src_id = rvt["metadata"]["to"]["id"]
     tio.write("\nGetting existing database's details...")
-    src = get_source_db(oci_cfg,src_id)
+    src = await get_source_db(oci_cfg,src_id)
     tio.writeln("Done.")
 
+    original = await kept_original(oci_cfg,rvt)
+    if original is not None:
+        tio.writeln("The original database service, %s, was kept and will be swapped back." % (original.display_name))
+        if args.plan:
+            metrics.end(gathering)
+            write_plan(plan_rollback(oci_cfg,src,rvt,original),args)
+            return reverted_instance
+        metrics.end(gathering)
+        tio.writeln("\nEXECUTION PHASE\n")
+        if accept_rollback(original):
+            tio.write("\n")
+            journal = new_journal(oci_cfg,args.output_dir,args.action,src,
+                    revert = rvt,
+                    original_id = original.id)
+            args.journal_file = journal.fname
+            reverted_instance = await rollback_db(oci_cfg,rvt,src,original.id,journal)
+        else:
+            tio.writeln("\nReverting has been abandoned by the user.")
+        return reverted_instance
+
+    await preflight(oci_cfg,rvt["database"]["availability_domain"],
+            [planned_resize(src,rvt["database"]["shape_name"],rvt["database"]["compartment_id"],rvt["database"]["subnet_id"])],
+            [rvt["backup"]["id"]])
+    if args.plan:
+        metrics.end(gathering)
+        write_plan(plan_revert(oci_cfg,src,rvt),args)
+        return reverted_instance
+
     tio.writeln("\nProvide credentials for the database administrator.")
     credentials = get_db_creds()
 
+    metrics.end(gathering)
     tio.writeln("\nEXECUTION PHASE\n")
     if accept_changes(DESTRUCTIVE):
         tio.write("\n")
-        shutdown_db(oci_cfg,src_id)
-        backup = backup_db(oci_cfg,src_id)
-        create_revert_file(get_source_db(oci_cfg,src_id),backup,output_revert_filename)
-
-        # Now create the details for the (new) resized database 
-        desc = "Reverted " + TIMESTAMP
-        if rvt["database"]["description"] is not None:
-            desc = desc + ". " + rvt["database"]["description"] 
-
-        if len(desc) > MAX_DESC_LEN:
-            desc = desc[0:MAX_DESC_LEN]
-
-        reverted_db_details = oci.mysql.models.CreateDbSystemDetails(
-            admin_password = credentials.get_password(),
-            admin_username = credentials.get_username(),
-            compartment_id = rvt["database"]["compartment_id"],
-            shape_name = rvt["database"]["shape_name"],
-            source = oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
-                source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
-                backup_id = rvt["backup"]["id"]
-            ),
-            subnet_id = rvt["database"]["subnet_id"],
-            availability_domain = rvt["database"]["availability_domain"],
-            backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
-                is_enabled = rvt["database"]["backup_policy"]["is_enabled"],
-                window_start_time = rvt["database"]["backup_policy"]["window_start_time"],
-                retention_in_days = rvt["database"]["backup_policy"]["retention_in_days"],
-                defined_tags = rvt["database"]["backup_policy"]["defined_tags"],
-                freeform_tags = rvt["database"]["backup_policy"]["freeform_tags"]
-            ), 
-            configuration_id = rvt["database"]["configuration_id"],
-            data_storage_size_in_gbs = rvt["database"]["data_storage_size_in_gbs"], 
-            defined_tags = rvt["database"]["defined_tags"],
-            description = desc,
-            display_name = rvt["database"]["display_name"],
-            freeform_tags = rvt["database"]["freeform_tags"],
-            hostname_label = rvt["database"]["hostname_label"],
-            ip_address = rvt["database"]["ip_address"],
-            is_highly_available = rvt["database"]["is_highly_available"],
-            maintenance = oci.mysql.models.CreateMaintenanceDetails(
-                window_start_time = rvt["database"]["maintenance"]["window_start_time"]
-            ),
-            mysql_version = rvt["database"]["mysql_version"],
-            port = rvt["database"]["port"],
-            port_x = rvt["database"]["port_x"]
-            # Unassigned attribute: fault_domain
-        )
-        delete_db(oci_cfg,src_id)
-        reverted_instance = create_db(oci_cfg,reverted_db_details)
-        update_revert_file(src,reverted_instance,output_revert_filename)
+        journal = new_journal(oci_cfg,args.output_dir,args.action,src,
+                revert = rvt,
+                revert_file = output_revert_filename)
+        args.journal_file = journal.fname
+        reverted_instance = await revert_db(oci_cfg,rvt,src,credentials,output_revert_filename,journal)
     else:
         tio.writeln("\nReverting has been abandoned by the user.")
 
     return reverted_instance
 
 
-def resize(oci_cfg, args): 
+def rebuild_details(src, tgt, credentials, backup_id):
+    # The details of src recreated from backup_id with the target's shape
+    # and configuration, keeping its name and IP address.
+    desc = "Resized " + TIMESTAMP
+    if src.database.description is not None:
+        desc = desc + ". " + src.database.description
+
+    if len(desc) > MAX_DESC_LEN:
+        desc = desc[0:MAX_DESC_LEN]
+
+    return oci.mysql.models.CreateDbSystemDetails(
+        admin_password = credentials.get_password(),
+        admin_username = credentials.get_username(),
+        compartment_id = src.database.compartment_id,
+        shape_name = tgt.shape_name,
+        source = oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
+            source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
+            backup_id = backup_id
+        ),
+        subnet_id = src.database.subnet_id,
+        availability_domain = src.database.availability_domain,
+        backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
+            is_enabled = src.database.backup_policy.is_enabled,
+            window_start_time = src.database.backup_policy.window_start_time,
+            retention_in_days = src.database.backup_policy.retention_in_days,
+            defined_tags = src.database.backup_policy.defined_tags,
+            freeform_tags = src.database.backup_policy.freeform_tags
+        ), 
+        configuration_id = tgt.config_id,
+        data_storage_size_in_gbs = src.database.data_storage_size_in_gbs, 
+        defined_tags = src.database.defined_tags,
+        description = desc,
+        display_name = src.database.display_name,
+        freeform_tags = src.database.freeform_tags,
+        hostname_label = src.database.hostname_label,
+        ip_address = src.database.ip_address,
+        is_highly_available = src.database.is_highly_available,
+        maintenance = oci.mysql.models.CreateMaintenanceDetails(
+            window_start_time = src.database.maintenance.window_start_time
+        ),
+        mysql_version = src.database.mysql_version,
+        port = src.database.port,
+        port_x = src.database.port_x
+        # Unassigned attribute: fault_domain
+    )
+
+
+async def rebuild_db(oci_cfg, src, tgt, credentials, revert_filename, journal=None, prior_backup=None):
+    # prior_backup is the backup taken by a refused in-place change, whose
+    # revert file entry is kept. The database served writes after it was
+    # taken, so the rebuild restores an incremental backup on top of it.
+    dbid = src.database.id
+    incremental = prior_backup is not None
+    await journal_step(journal,"shutdown",lambda rid, started: shutdown_db(oci_cfg,dbid,rid,started))
+    backup = await journal_step(journal,"rebuild_backup",
+            lambda rid, started: backup_db(oci_cfg,dbid,rid,started,incremental),
+            lambda backup_id: get_backup(oci_cfg,backup_id))
+    if not incremental:
+        await journal_step(journal,"rebuild_revert_file",lambda rid, started: create_revert_file(src,backup,revert_filename))
+
+    # Now create the details for the (new) resized database 
+    resized_db_details = rebuild_details(src,tgt,credentials,backup.id)
+    await journal_step(journal,"delete",lambda rid, started: delete_db(oci_cfg,dbid,rid,started))
+    return await journal_step(journal,"create",
+            lambda rid, started: create_db(oci_cfg,resized_db_details,rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+
+
+async def resize_db(oci_cfg, src, tgt, credentials, revert_filename, in_place, journal=None):
+    resized_instance = None
+    backup = None
+    dbid = src.database.id
+    if in_place:
+        # Take a pre-change backup of the running database so that the
+        # revert file provides a rollback path, then change it in place
+        backup = await journal_step(journal,"backup",
+                lambda rid, started: backup_db(oci_cfg,dbid,rid,started),
+                lambda backup_id: get_backup(oci_cfg,backup_id))
+        await journal_step(journal,"revert_file",lambda rid, started: create_revert_file(src,backup,revert_filename))
+        resized_instance = await journal_step(journal,"update",
+                lambda rid, started: update_db(oci_cfg,dbid,tgt.shape_name,tgt.config_id,rid,started),
+                lambda db_ocid: get_db(oci_cfg,db_ocid))
+        if resized_instance is None:
+            tio.writeln("\nFalling back to resizing by rebuilding the database service.\n")
+    if resized_instance is None:
+        resized_instance = await rebuild_db(oci_cfg,src,tgt,credentials,revert_filename,journal,backup)
+    await journal_step(journal,"revert_metadata",lambda rid, started: update_revert_file(src,resized_instance,revert_filename))
+    return resized_instance
+
+
+def resize_journal(oci_cfg, args, src, tgt, revert_filename, in_place):
+    journal = new_journal(oci_cfg,args.output_dir,args.action,src,
+            shape_name = tgt.shape_name,
+            config_id = tgt.config_id,
+            in_place = in_place,
+            method = args.resize_method,
+            replicate = args.replicate,
+            keep_original = args.keep_original,
+            revert_file = revert_filename)
+    args.journal_file = journal.fname
+    return journal
+
+
+def resized_name(src):
+    return src.database.display_name + "-resized"
+
+
+def original_name(src):
+    return src.database.display_name + "-original"
+
+
+def bluegreen_details(src, tgt, credentials, backup_id):
+    # The new database service runs alongside the original until cutover, so
+    # it is created under a temporary name and an address chosen by OCI. A
+    # hostname label cannot be shared, so it stays with the original.
+    details = rebuild_details(src,tgt,credentials,backup_id)
+    details.display_name = resized_name(src)
+    details.ip_address = None
+    details.hostname_label = None
+    return details
+
+
+def address_request(address, display_name):
+    return oci.mysql.models.UpdateDbSystemDetails(
+        ip_address = address,
+        display_name = display_name
+    )
+
+
+def database_mode_request(mode):
+    return oci.mysql.models.UpdateDbSystemDetails(
+        database_mode = mode
+    )
+
+
+async def spare_addresses(oci_cfg, subnet_id, count):
+    client = clients.get(oci.core.VirtualNetworkClient,oci_cfg)
+    subnet = await oci_data(client.get_subnet,subnet_id)
+    private_ips = await oci_data(
+            oci.pagination.list_call_get_all_results,
+            client.list_private_ips,
+            subnet_id = subnet_id)
+    return free_addresses(subnet,[private_ip.ip_address for private_ip in private_ips],count)
+
+
+async def move_aside(oci_cfg, dbid, subnet_id, display_name, description, resume_id=None, on_started=None):
+    # Moves a database service to a spare address, freeing its own. The
+    # address is chosen when the move starts so a resumed move keeps it.
+    if resume_id is not None:
+        return await change_db(oci_cfg,dbid,None,description,resume_id,on_started)
+    # The subnet's private IPs need not include every database endpoint, so
+    # an address is only known to be free once the service accepts it. The
+    # next highest is tried while the service refuses one as in use.
+    addresses = await spare_addresses(oci_cfg,subnet_id,SPARE_ADDRESS_ATTEMPTS)
+    for n, address in enumerate(addresses,1):
+        try:
+            return await change_db(oci_cfg,dbid,address_request(address,display_name),description,None,on_started)
+        except oci.exceptions.ServiceError as e:
+            if (e.status, e.code) not in ADDRESS_CONFLICTS or n == len(addresses):
+                raise
+            tio.writeln("Address %s is in use." % (address))
+
+
+def channel_request(src, target_id, credentials):
+    # Replicates from the original to the new database service. The source
+    # username must have replication privileges on the original, which its
+    # administrator has.
+    return oci.mysql.models.CreateChannelDetails(
+        compartment_id = src.database.compartment_id,
+        display_name = resized_name(src),
+        description = "Replicates " + src.database.display_name + " until its blue/green cutover " + TIMESTAMP,
+        is_enabled = True,
+        source = oci.mysql.models.CreateChannelSourceFromMysqlDetails(
+            hostname = src.database.ip_address,
+            port = src.database.port,
+            username = credentials.get_username(),
+            password = credentials.get_password(),
+            ssl_mode = oci.mysql.models.ChannelSourceMysql.SSL_MODE_REQUIRED
+        ),
+        target = oci.mysql.models.CreateChannelTargetFromDbSystemDetails(
+            db_system_id = target_id,
+            applier_username = credentials.get_username()
+        )
+    )
+
+
+async def get_channel(oci_cfg, channel_id):
+    client = clients.get(oci.mysql.ChannelsClient,oci_cfg)
+    return await oci_data(client.get_channel,channel_id)
+
+
+async def create_channel(oci_cfg, details, resume_id=None, on_started=None):
+    client = clients.get(oci.mysql.ChannelsClient,oci_cfg)
+
+    tio.write("Creating a replication channel from the existing database service...")
+    waiter = MdsWaiter(deadline=CHANNEL_DEADLINE)
+    spinner = Spinner(tio.get_mode(Tio.SCREEN))
+    spinner.start()
+    try:
+        channel_id = resume_id
+        initial = None
+        if channel_id is None:
+            initial = await oci_data(client.create_channel,details,opc_retry_token=retry_token())
+            channel_id = initial.id
+            if on_started is not None:
+                on_started(channel_id)
+        channel = await waiter.wait(
+            lambda: oci_data(client.get_channel,channel_id),
+            (oci.mysql.models.Channel.LIFECYCLE_STATE_CREATING,),
+            (oci.mysql.models.Channel.LIFECYCLE_STATE_ACTIVE,),
+            initial = initial,
+            description = "replication channel creation")
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    return channel
+
+
+async def catch_up(oci_cfg, channel_id, since):
+    # Waits until the new database service has applied every transaction it
+    # received. The original is read-only by now, so it sends no more. Only a
+    # status gathered after since (the time, by OCI's clock, the original
+    # became read-only) can show that, so older statuses are waited out and,
+    # if no fresh one is reported in time, the cutover is abandoned.
+    client = clients.get(oci.mysql.ChannelsClient,oci_cfg)
+    start = time.monotonic()
+
+    def fresh(status):
+        return status.time_updated is not None and status.time_updated >= since
+
+    def progress(status):
+        if not fresh(status):
+            return "STALE"
+        return status.channel_status_result.is_received_gtid_set_applied
+
+    async def poll():
+        await oci_call(client.generate_channel_status,channel_id,opc_retry_token=retry_token())
+        status = await oci_data(client.get_channel_status,channel_id)
+        if fresh(status) and not status.channel_status_result.is_healthy:
+            raise MdsWaiterError("The replication channel is unhealthy: %s" % ("; ".join(status.channel_status_result.errors or ["no details given"])))
+        if not fresh(status) and time.monotonic() - start > CHANNEL_STATUS_DEADLINE:
+            raise MdsWaiterError("The replication channel reported no status after the cutover began within %s." % format_elapsed(CHANNEL_STATUS_DEADLINE))
+        return status
+
+    tio.write("Waiting for the new database service to catch up...")
+    waiter = MdsWaiter(deadline=CATCH_UP_DEADLINE,first_delay=1.0,max_delay=15.0,attribute=progress)
+    spinner = Spinner(tio.get_mode(Tio.SCREEN))
+    spinner.start()
+    try:
+        await waiter.wait(poll,("STALE", False, None),(True,),description="replication catch-up")
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    return
+
+
+async def delete_channel(oci_cfg, channel_id, resume_id=None, on_started=None):
+    client = clients.get(oci.mysql.ChannelsClient,oci_cfg)
+
+    tio.write("Deleting the replication channel...")
+    waiter = MdsWaiter(deadline=CHANNEL_DEADLINE)
+    spinner = Spinner(tio.get_mode(Tio.SCREEN))
+    spinner.start()
+    try:
+        if resume_id is None:
+            await oci_call(client.delete_channel,channel_id)
+            if on_started is not None:
+                on_started(channel_id)
+        await waiter.wait(
+            lambda: oci_data(client.get_channel,channel_id),
+            (oci.mysql.models.Channel.LIFECYCLE_STATE_ACTIVE, oci.mysql.models.Channel.LIFECYCLE_STATE_INACTIVE, oci.mysql.models.Channel.LIFECYCLE_STATE_DELETING),
+            (oci.mysql.models.Channel.LIFECYCLE_STATE_DELETED,),
+            description = "replication channel deletion")
+    finally:
+        await spinner.stop()
+    tio.writeln(waited(waiter))
+    return
+
+
+async def bluegreen_db(oci_cfg, src, tgt, credentials, revert_filename, replicate, keep_original, journal=None):
+    # Resizes by restoring a copy of the database service with the new shape
+    # while the original keeps serving clients, then swapping their names and
+    # addresses. Writes are paused from the time the original is made
+    # read-only until the copy has its address: with replication only for
+    # the cutover itself. New runs always replicate; without replication,
+    # which only a journal written by an earlier version can ask for, the
+    # pause is from before the backup.
+    dbid = src.database.id
+    address = src.database.ip_address
+    display_name = src.database.display_name
+    read_only = database_mode_request(oci.mysql.models.DbSystem.DATABASE_MODE_READ_ONLY)
+    paused = None
+
+    async def make_read_only():
+        nonlocal paused
+        if journal is None or not journal.is_done("read_only"):
+            paused = time.monotonic()
+        return await journal_step(journal,"read_only",
+                lambda rid, started: change_db(oci_cfg,dbid,read_only,"Making the existing database service read-only",rid,started),
+                lambda db_ocid: get_db(oci_cfg,db_ocid))
+
+    if not replicate:
+        await make_read_only()
+    backup = await journal_step(journal,"backup",
+            lambda rid, started: backup_db(oci_cfg,dbid,rid,started),
+            lambda backup_id: get_backup(oci_cfg,backup_id))
+    await journal_step(journal,"revert_file",lambda rid, started: create_revert_file(src,backup,revert_filename))
+    resized_db_details = bluegreen_details(src,tgt,credentials,backup.id)
+    resized_instance = await journal_step(journal,"create",
+            lambda rid, started: create_db(oci_cfg,resized_db_details,rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    if replicate:
+        channel = await journal_step(journal,"channel",
+                lambda rid, started: create_channel(oci_cfg,channel_request(src,resized_instance.id,credentials),rid,started),
+                lambda channel_id: get_channel(oci_cfg,channel_id))
+        original = await make_read_only()
+        try:
+            await journal_step(journal,"catch_up",lambda rid, started: catch_up(oci_cfg,channel.id,original.time_updated))
+        except MdsWaiterError:
+            # Without a fresh, healthy status the copy may be missing writes,
+            # so the cutover is abandoned and the original takes writes again.
+            # A resumed run makes it read-only again before catching up.
+            tio.writeln("\nThe cutover has been abandoned.")
+            await change_db(oci_cfg,dbid,database_mode_request(oci.mysql.models.DbSystem.DATABASE_MODE_READ_WRITE),"Making the existing database service writable again")
+            if journal is not None:
+                journal.started("read_only",id=None)
+            raise
+        await journal_step(journal,"channel_delete",lambda rid, started: delete_channel(oci_cfg,channel.id,rid,started))
+
+    original = await journal_step(journal,"move_original",
+            lambda rid, started: move_aside(oci_cfg,dbid,src.database.subnet_id,original_name(src),"Moving the existing database service to a spare address",rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    resized_instance = await journal_step(journal,"move_resized",
+            lambda rid, started: change_db(oci_cfg,resized_instance.id,address_request(address,display_name),"Moving the new database service to the original's address",rid,started),
+            lambda db_ocid: get_db(oci_cfg,db_ocid))
+    if paused is not None:
+        tio.writeln("Writes were paused for %s." % format_elapsed(time.monotonic() - paused))
+
+    if keep_original:
+        tio.writeln("The original database service is kept, read-only, as %s at %s." % (original.display_name,original.ip_address))
+        original_kept = original
+    else:
+        await journal_step(journal,"delete",lambda rid, started: delete_db(oci_cfg,dbid,rid,started))
+        original_kept = None
+    await journal_step(journal,"revert_metadata",lambda rid, started: update_revert_file(src,resized_instance,revert_filename,original_kept))
+    return resized_instance
+
+
+async def resize(oci_cfg, args): 
     resized_instance = None
     revert_filename = os.path.join(args.output_dir,OUTPUT_REVERT_FILE)
+    in_place = (args.resize_method == Mdsargs.INPLACE)
+    bluegreen = (args.resize_method == Mdsargs.BLUEGREEN)
+    if (args.replicate or args.keep_original) and not bluegreen:
+        raise MdsargsError("The --replicate and --keep-original flags require the BLUEGREEN resize method.")
+    if bluegreen:
+        # Without replication the database would be read-only from before
+        # the backup until the cutover, so a blue/green resize always
+        # replicates
+        args.replicate = True
     
     tio.writeln("\nINFORMATION GATHERING PHASE\n")
+    gathering = metrics.begin("information_gathering")
 
     tio.write("Getting existing database's details...")
-    src = get_source_db(oci_cfg,args.db_ocid)
+    src = await get_source_db(oci_cfg,args.db_ocid)
     tio.writeln("Done.")
 
     tio.writeln("\nGet resize information.\n")
-    tgt = get_target_db(oci_cfg,src)
+    tgt = await get_target_db(oci_cfg,src)
+    if bluegreen:
+        # Both database services exist until the original is retired
+        planned = planned_copy(src,tgt,src.database.compartment_id,src.database.subnet_id,None)
+    else:
+        planned = planned_resize(src,tgt.shape_name)
+    await preflight(oci_cfg,src.database.availability_domain,[planned],targets=[tgt],catalog_comp_id=src.database.compartment_id)
+    if args.plan:
+        metrics.end(gathering)
+        if bluegreen:
+            write_plan(plan_bluegreen(oci_cfg,src,tgt,args.keep_original),args)
+        else:
+            write_plan(plan_resize(oci_cfg,src,tgt,in_place),args)
+        return resized_instance
     
+    # Credentials are only used if the database has to be rebuilt, but they
+    # are gathered now so that a refused in-place change can fall back to a
+    # rebuild without further user interaction.
     tio.writeln("\nProvide credentials for the database administrator.")
     credentials = get_db_creds()
 
+    metrics.end(gathering)
     tio.writeln("\nEXECUTION PHASE\n")
-    if accept_changes(DESTRUCTIVE):
+    if bluegreen:
+        accepted = accept_bluegreen(args.keep_original)
+    else:
+        accepted = accept_changes(DESTRUCTIVE,in_place)
+    if accepted:
         tio.write("\n")
-        shutdown_db(oci_cfg,src.database.id)
-        backup = backup_db(oci_cfg,src.database.id)
-        create_revert_file(src,backup,revert_filename)
+        journal = resize_journal(oci_cfg,args,src,tgt,revert_filename,in_place)
+        if bluegreen:
+            resized_instance = await bluegreen_db(oci_cfg,src,tgt,credentials,revert_filename,args.replicate,args.keep_original,journal)
+        else:
+            resized_instance = await resize_db(oci_cfg,src,tgt,credentials,revert_filename,in_place,journal)
+    else:
+        tio.writeln("\nResizing has been aborted by the user.")
+
+    return resized_instance
 
-        # Now create the details for the (new) resized database 
-        desc = "Resized " + TIMESTAMP
-        if src.database.description is not None:
-            desc = desc + ". " + src.database.description
 
-        if len(desc) > MAX_DESC_LEN:
-            desc = desc[0:MAX_DESC_LEN]
+def planned_backup(step):
+    return "<backup taken by step %s>" % (step)
 
-        resized_db_details = oci.mysql.models.CreateDbSystemDetails(
-            admin_password = credentials.get_password(),
-            admin_username = credentials.get_username(),
-            compartment_id = src.database.compartment_id,
-            shape_name = tgt.shape_name,
-            source = oci.mysql.models.CreateDbSystemSourceFromBackupDetails(
-                source_type = oci.mysql.models.CreateDbSystemSourceDetails.SOURCE_TYPE_BACKUP,
+
+def plan_database(src):
+    return {
+        "id": src.database.id,
+        "display_name": src.database.display_name,
+        "compartment_id": src.database.compartment_id,
+        "shape_name": src.database.shape_name,
+        "configuration_id": src.database.configuration_id,
+        "data_storage_size_in_gbs": src.database.data_storage_size_in_gbs}
+
+
+def plan_backup(oci_cfg, plan, step, src, offline=False, condition=None, incremental=False):
+    if incremental:
+        description = "Back up the changes to the database service since the last backup."
+    else:
+        description = "Back up the database service."
+    plan.add(step,description,"create_backup",
+            {"create_backup_details": journal_model(oci_cfg,backup_request(src.database.id,incremental))},
+            history.estimate("incremental_backup" if incremental else "backup",src.database.shape_name,src.database.data_storage_size_in_gbs),
+            offline,condition)
+
+
+def plan_shutdown(oci_cfg, plan, src, condition=None):
+    plan.add("shutdown","Shut down the database service.","stop_db_system",
+            {"db_system_id": src.database.id, "stop_db_system_details": journal_model(oci_cfg,shutdown_request())},
+            history.estimate("shutdown",src.database.shape_name,src.database.data_storage_size_in_gbs),
+            True,condition)
+
+
+def plan_delete(oci_cfg, plan, src, offline=True, condition=None):
+    plan.add("delete","Delete the database service.","delete_db_system",
+            {"db_system_id": src.database.id},
+            history.estimate("delete",src.database.shape_name,src.database.data_storage_size_in_gbs),
+            offline,condition)
+
+
+def plan_change(oci_cfg, plan, step, description, dbid, shape_name, storage_gb, details):
+    # Writes are paused during every change a blue/green resize makes
+    plan.add(step,description,"update_db_system",
+            {"db_system_id": dbid, "update_db_system_details": journal_model(oci_cfg,details)},
+            history.estimate("change",shape_name,storage_gb),
+            True)
+
+
+def plan_create(oci_cfg, plan, details, offline=False, condition=None):
+    # The administrator credentials are not asked for when planning, so are
+    # absent from the planned request
+    plan.add("create","Create the new database service and restore the backup to it.","create_db_system",
+            {"create_db_system_details": journal_model(oci_cfg,details)},
+            history.estimate("create",details.shape_name,details.data_storage_size_in_gbs),
+            offline,condition)
+
+
+def plan_rebuild(oci_cfg, plan, src, tgt, condition=None, incremental=False):
+    plan_shutdown(oci_cfg,plan,src,condition)
+    plan_backup(oci_cfg,plan,"rebuild_backup",src,True,condition,incremental)
+    if not incremental:
+        plan.add("rebuild_revert_file","Write the revert file.",condition=condition)
+    plan_delete(oci_cfg,plan,src,condition=condition)
+    plan_create(oci_cfg,plan,rebuild_details(src,tgt,MdsCredentials(),planned_backup("rebuild_backup")),True,condition)
+
+
+def plan_resize(oci_cfg, src, tgt, in_place):
+    plan = MdsPlan(Mdsargs.RESIZE,plan_database(src))
+    if in_place:
+        plan_backup(oci_cfg,plan,"backup",src)
+        plan.add("revert_file","Write the revert file.")
+        plan.add("update","Change the shape and configuration of the database service in place.","update_db_system",
+                {"db_system_id": src.database.id, "update_db_system_details": journal_model(oci_cfg,update_request(tgt.shape_name,tgt.config_id))},
+                history.estimate("update",tgt.shape_name,src.database.data_storage_size_in_gbs),
+                True)
+        plan_rebuild(oci_cfg,plan,src,tgt,"if the service refuses the in-place change",True)
+    else:
+        plan_rebuild(oci_cfg,plan,src,tgt)
+    plan.add("revert_metadata","Record the resized database in the revert file.")
+    return plan
+
+
+def plan_bluegreen(oci_cfg, src, tgt, keep_original):
+    # Steps during which the original is read-only are marked offline, as
+    # it only serves reads then
+    plan = MdsPlan(Mdsargs.RESIZE,plan_database(src))
+    read_only = database_mode_request(oci.mysql.models.DbSystem.DATABASE_MODE_READ_ONLY)
+    resized_id = "<database created by step create>"
+    storage_gb = src.database.data_storage_size_in_gbs
+    plan_backup(oci_cfg,plan,"backup",src)
+    plan.add("revert_file","Write the revert file.")
+    plan_create(oci_cfg,plan,bluegreen_details(src,tgt,MdsCredentials(),planned_backup("backup")))
+    plan.add("channel","Create a channel replicating from the database service to the new one.","create_channel",
+            {"create_channel_details": journal_model(oci_cfg,channel_request(src,resized_id,MdsCredentials()))})
+    plan_change(oci_cfg,plan,"read_only","Make the database service read-only. It still serves reads.",
+            src.database.id,src.database.shape_name,storage_gb,read_only)
+    plan.add("catch_up","Wait for the new database service to apply every transaction it received.","get_channel_status",
+            offline=True)
+    plan.add("channel_delete","Delete the replication channel.","delete_channel",
+            {"channel_id": "<channel created by step channel>"},
+            offline=True)
+    plan_change(oci_cfg,plan,"move_original","Move the database service to the highest free address in its subnet.",
+            src.database.id,src.database.shape_name,storage_gb,address_request("<spare address>",original_name(src)))
+    plan_change(oci_cfg,plan,"move_resized","Move the new database service to the original's address and name.",
+            resized_id,tgt.shape_name,storage_gb,address_request(src.database.ip_address,src.database.display_name))
+    if keep_original:
+        plan.add("keep_original","Keep the original database service, read-only, for REVERT to swap back to.")
+    else:
+        plan_delete(oci_cfg,plan,src,False)
+    plan.add("revert_metadata","Record the resized database in the revert file.")
+    return plan
+
+
+def plan_rollback(oci_cfg, src, rvt, original):
+    plan = MdsPlan(Mdsargs.REVERT,plan_database(src))
+    storage_gb = src.database.data_storage_size_in_gbs
+    plan_change(oci_cfg,plan,"read_only","Make the resized database service read-only. It still serves reads.",
+            src.database.id,src.database.shape_name,storage_gb,database_mode_request(oci.mysql.models.DbSystem.DATABASE_MODE_READ_ONLY))
+    plan_change(oci_cfg,plan,"move_resized","Move the resized database service to the highest free address in its subnet.",
+            src.database.id,src.database.shape_name,storage_gb,address_request("<spare address>",resized_name(src)))
+    plan_change(oci_cfg,plan,"move_original","Give the original database service back its name and address and make it writable.",
+            original.id,original.shape_name,original.data_storage_size_in_gbs,restore_request(rvt))
+    plan_delete(oci_cfg,plan,src,False)
+    return plan
+
+
+def plan_revert(oci_cfg, src, rvt):
+    plan = MdsPlan(Mdsargs.REVERT,plan_database(src))
+    plan_shutdown(oci_cfg,plan,src)
+    plan_backup(oci_cfg,plan,"backup",src,True)
+    plan.add("revert_file","Write a revert file for the database as it is now.")
+    plan_delete(oci_cfg,plan,src)
+    plan_create(oci_cfg,plan,revert_details(rvt,MdsCredentials()),True)
+    plan.add("revert_metadata","Record the reverted database in the revert file.")
+    return plan
+
+
+async def plan_copy(oci_cfg, action, src, tgt, name, comp_id, subnet_id, address, copy_source):
+    # Mirrors get_copy_source(). The latest automatic backup is looked up
+    # now, so the plan shows whether one will be taken.
+    plan = MdsPlan(action,plan_database(src))
+    if copy_source == Mdsargs.PITR:
+        source_details = pitr_source_details(src)
+    else:
+        backup_id = None
+        if copy_source == Mdsargs.LATEST:
+            backup = await latest_backup(oci_cfg,src)
+            if backup is None:
+                description = "Look for the latest automatic backup. There is none now, so one will be taken."
+            else:
                 backup_id = backup.id
-            ),
-            subnet_id = src.database.subnet_id,
-            availability_domain = src.database.availability_domain,
-            backup_policy = oci.mysql.models.CreateBackupPolicyDetails(
-                is_enabled = src.database.backup_policy.is_enabled,
-                window_start_time = src.database.backup_policy.window_start_time,
-                retention_in_days = src.database.backup_policy.retention_in_days,
-                defined_tags = src.database.backup_policy.defined_tags,
-                freeform_tags = src.database.backup_policy.freeform_tags
-            ), 
-            configuration_id = tgt.config_id,
-            data_storage_size_in_gbs = src.database.data_storage_size_in_gbs, 
-            defined_tags = src.database.defined_tags,
-            description = desc,
-            display_name = src.database.display_name,
-            freeform_tags = src.database.freeform_tags,
-            hostname_label = src.database.hostname_label,
-            ip_address = src.database.ip_address,
-            is_highly_available = src.database.is_highly_available,
-            maintenance = oci.mysql.models.CreateMaintenanceDetails(
-                window_start_time = src.database.maintenance.window_start_time
-            ),
-            mysql_version = src.database.mysql_version,
-            port = src.database.port,
-            port_x = src.database.port_x
-            # Unassigned attribute: fault_domain
-        )
-        delete_db(oci_cfg,src.database.id)
-        resized_instance = create_db(oci_cfg,resized_db_details)
-        update_revert_file(src,resized_instance,revert_filename)
+                description = "Look for the latest automatic backup. It is now %s created %s." % (backup.display_name,backup.time_created)
+            plan.add("latest_backup",description,"list_backups",expected=0)
+        if backup_id is None:
+            if copy_source == Mdsargs.COLD:
+                plan_shutdown(oci_cfg,plan,src)
+                plan_backup(oci_cfg,plan,"backup",src,True)
+                plan.add("restart","Start the database service again. The copy is created meanwhile.","start_db_system",
+                        {"db_system_id": src.database.id})
+            else:
+                plan_backup(oci_cfg,plan,"backup",src)
+            backup_id = planned_backup("backup")
+            if comp_id != src.database.compartment_id:
+                plan.add("move_backup","Move the backup to the copy's compartment.","change_backup_compartment",
+                        {"backup_id": backup_id, "change_backup_compartment_details": journal_model(oci_cfg,move_backup_request(comp_id))},
+                        expected=0)
+        source_details = backup_source_details(backup_id)
+    plan_create(oci_cfg,plan,copy_details(src,tgt,name,MdsCredentials(),comp_id,subnet_id,address,source_details))
+    return plan
+
+
+def write_plan(plan, args):
+    # A plan is shown, logged and written to the output directory; nothing
+    # is changed
+    tio.writeln("\nPLAN\n")
+    for line in plan.text():
+        tio.writeln(line)
+    plan.write(os.path.join(args.output_dir,OUTPUT_PLAN_FILE),os.path.join(args.output_dir,OUTPUT_PLAN_TEXT))
+
+
+def resume_changes():
+    if answers.active:
+        return answered_confirmation("Do you want to resume")
+    confirmation = None
+    while confirmation not in ("Yes","yes","Y","y","No","no","N","n"):
+        confirmation = tio.input("Do you want to resume [yes|no]: ")
+    if confirmation in ("Yes","yes","Y","y"):
+        return True
+    return False
+
+
+async def resume(oci_cfg, args):
+    # Re-runs the action recorded in a journal. Steps that completed are
+    # skipped and a step that was interrupted waits on the resource it had
+    # already created, so no backup or restore is ever repeated.
+    resumed_instance = None
+    tio.writeln("\nINFORMATION GATHERING PHASE\n")
+    gathering = metrics.begin("information_gathering")
+
+    journal = MdsJournal(args.journal_file)
+    header = journal.header
+    src = journal_source_db(oci_cfg,header)
+    completed = journal.completed_steps()
+    tio.writeln("Journal %s read and parsed." % (args.journal_file))
+    tio.writeln("  Action:           %s" % (header["action"]))
+    tio.writeln("  Database:         %s (%s)" % (src.database.display_name,src.database.id))
+    tio.writeln("  Completed steps:  %s" % (", ".join(completed) if completed else "none"))
+    if header.get("revert_file") is not None:
+        tio.writeln("  Revert file:      %s" % (header["revert_file"]))
+
+    tio.writeln("\nProvide credentials for the database administrator.")
+    credentials = get_db_creds()
+
+    metrics.end(gathering)
+    tio.writeln("\nEXECUTION PHASE\n")
+    if not resume_changes():
+        tio.writeln("\nResuming has been aborted by the user.")
+        return resumed_instance
+
+    tio.write("\n")
+    if header["action"] == Mdsargs.RESIZE and header.get("method") == Mdsargs.BLUEGREEN:
+        tgt = MdsMetaDatabase(header["shape_name"],header["config_id"])
+        resumed_instance = await bluegreen_db(oci_cfg,src,tgt,credentials,header["revert_file"],header["replicate"],header["keep_original"],journal)
+    elif header["action"] == Mdsargs.RESIZE:
+        tgt = MdsMetaDatabase(header["shape_name"],header["config_id"])
+        resumed_instance = await resize_db(oci_cfg,src,tgt,credentials,header["revert_file"],header["in_place"],journal)
+    elif header["action"] in (Mdsargs.LOCAL_COPY, Mdsargs.REMOTE_COPY):
+        tgt = MdsMetaDatabase(header["shape_name"],header["config_id"])
+        resumed_instance = await copy_db(oci_cfg,src,tgt,header["name"],credentials,header["compartment_id"],header["subnet_id"],header["address"],header["copy_source"],journal)
+    elif header["action"] == Mdsargs.CLONE:
+        # Resuming a clone returns the results of every clone
+        resumed_instance = await clone_db(oci_cfg,args.output_dir,src,journal_clones(header),credentials,header["copy_source"],header["backup_id"],header["max_workers"],header["max_per_compartment"],journal)
+    elif header["action"] == Mdsargs.REVERT and header.get("original_id") is not None:
+        resumed_instance = await rollback_db(oci_cfg,header["revert"],src,header["original_id"],journal)
+    elif header["action"] == Mdsargs.REVERT:
+        resumed_instance = await revert_db(oci_cfg,header["revert"],src,credentials,header["revert_file"],journal)
     else:
-        tio.writeln("\nResizing has been aborted by the user.")
+        raise MdsargsError("Journal %s records an action, %s, that cannot be resumed." % (args.journal_file,header["action"]))
+
+    return resumed_instance
+
+
+async def get_batch_target_db(oci_cfg, src, entry):
+    # Non-interactive equivalent of get_target_db() for a manifest entry. If
+    # no shape is given then the source's shape is kept, and if no
+    # configuration is given then the shape's default configuration is used.
+    shape_name = entry.shape_name
+    if shape_name is None:
+        shape_name = src.database.shape_name
+    if entry.config_id is not None:
+        return MdsMetaDatabase(shape_name,entry.config_id)
+    if entry.config_name is None and shape_name == src.database.shape_name:
+        return MdsMetaDatabase(shape_name,src.database.configuration_id)
+
+    cfg_index = await get_config_index(oci_cfg,src.database.compartment_id)
+    if entry.config_name is not None:
+        cfg = cfg_index.by_name(entry.config_name,shape_name)
+        if cfg is None:
+            raise MdsConfigIndexError("No active configuration named %s found for shape %s." % (entry.config_name,shape_name))
+        return MdsMetaDatabase(shape_name,cfg.id)
+    config_id = cfg_id_for_name(cfg_index,shape_name,src.database.is_highly_available)
+    if config_id is None:
+        raise MdsConfigIndexError("No active configuration found for shape %s." % shape_name)
+    return MdsMetaDatabase(shape_name,config_id)
+
+
+async def batch_run(oci_cfg, args, entry, credentials, limiter, workers):
+    # Runs one manifest entry. Each database gets its own output directory
+    # holding its session log, revert file, journal and run report.
+    db_args = Mdsargs()
+    db_args.action = entry.action
+    db_args.db_ocid = entry.db_ocid
+    db_args.resize_method = entry.resize_method
+    db_args.copy_source = entry.copy_source
+    db_args.address = entry.address
+    db_args.output_dir = os.path.join(args.output_dir,entry.db_ocid)
+    revert_filename = os.path.join(db_args.output_dir,OUTPUT_REVERT_FILE)
+
+    db = None
+    db_metrics = metrics.bind(MdsMetrics(entry.action,metrics.current()))
+    with open(os.path.join(db_args.output_dir,SESSION_LOG),"a") as log:
+        # The database's lines go to its own session log and, tagged with its
+        # OCID, to the batch's session records
+        tio.bind(Tio(log,tio.current().records,entry.db_ocid))
+        tio.set_mode(Tio.SCREEN,Tio.OFF)
+        tio.writeln("###############################################################################")
+        tio.writeln("#")
+        tio.writeln("# New batch session commenced %s" % (TIMESTAMP))
+        tio.writeln("#")
+        tio.writeln("###############################################################################\n")
+        try:
+            tio.write("Getting existing database's details...")
+            src = await get_source_db(oci_cfg,entry.db_ocid)
+            tio.writeln("Done.")
+            tgt = await get_batch_target_db(oci_cfg,src,entry)
+            if entry.action == Mdsargs.RESIZE:
+                planned = planned_resize(src,tgt.shape_name)
+            else:
+                planned = planned_copy(src,tgt,src.database.compartment_id,src.database.subnet_id,entry.address)
+            await preflight(oci_cfg,src.database.availability_domain,[planned],targets=[tgt],catalog_comp_id=src.database.compartment_id)
+
+            async with limiter.semaphore(src.database.compartment_id), workers:
+                tio.writeln("\nEXECUTION PHASE (%s)\n" % (entry.action))
+                if entry.action == Mdsargs.RESIZE:
+                    in_place = (entry.resize_method == Mdsargs.INPLACE)
+                    journal = resize_journal(oci_cfg,db_args,src,tgt,revert_filename,in_place)
+                    db = await resize_db(oci_cfg,src,tgt,credentials,revert_filename,in_place,journal)
+                else:
+                    name = local_copy_name(src,entry.display_name)
+                    journal = copy_journal(oci_cfg,db_args,src,tgt,name,src.database.compartment_id,src.database.subnet_id)
+                    db = await copy_db(oci_cfg,src,tgt,name,credentials,src.database.compartment_id,src.database.subnet_id,entry.address,entry.copy_source,journal)
+            await summary(oci_cfg,db,db_args)
+            tio.writeln("\nExiting normally.")
+        except Exception as e:
+            tio.writeln("\nERROR: %s\n" % e.__str__())
+            tio.flush(durable=True)
+            raise
+        finally:
+            write_run_report(db_metrics,db_args,db is not None)
+            tio.flush()
+    return db
+
+
+async def batch(oci_cfg, args):
+    tio.writeln("\nINFORMATION GATHERING PHASE\n")
+    gathering = metrics.begin("information_gathering")
+    manifest = MdsManifest(args.manifest_file)
+    tio.writeln("Manifest %s read and parsed." % (args.manifest_file))
+    tio.writeln("  Databases:                   %d" % len(manifest.entries))
+    tio.writeln("  Concurrent operations:       %d" % manifest.max_workers)
+    tio.writeln("  Operations per compartment:  %d" % manifest.max_per_compartment)
+    for entry in manifest.entries:
+        tio.writeln("  %-11s %s %s" % (entry.action,entry.db_ocid,entry.shape_name or ""))
+
+    # The same administrator credentials are used for every database that is
+    # rebuilt or copied.
+    tio.writeln("\nProvide credentials for the database administrator.")
+    credentials = get_db_creds()
 
-    return resized_instance
+    metrics.end(gathering)
+    tio.writeln("\nEXECUTION PHASE\n")
+    if not accept_batch(manifest):
+        tio.writeln("\nBatch has been aborted by the user.")
+        return list()
+
+    # Every entry runs as a task on the one event loop. Tasks only hold an
+    # executor thread for the duration of an SDK call, so the number of
+    # threads does not grow with the number of databases.
+    results = list()
+    limiter = MdsCompartmentLimiter(manifest.max_per_compartment)
+    workers = asyncio.Semaphore(manifest.max_workers)
+    tasks = dict()
+    for entry in manifest.entries:
+        tasks[asyncio.create_task(batch_run(oci_cfg,args,entry,credentials,limiter,workers))] = entry
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            entry = tasks[task]
+            if task.exception() is None:
+                results.append((entry,task.result(),None))
+                tio.writeln("Completed %s of %s." % (entry.action,entry.db_ocid))
+            else:
+                results.append((entry,None,task.exception()))
+                tio.writeln("FAILED %s of %s: %s" % (entry.action,entry.db_ocid,task.exception().__str__()))
+    return results
 
 
-def summary(oci_cfg, db, args):
+def batch_summary(results, args):
+    tio.writeln("\nSUMMARY PHASE\n")
+    failures = 0
+    for entry, db, error in results:
+        if error is None:
+            tio.writeln("  OK      %-11s %s -> %s" % (entry.action,entry.db_ocid,db.id))
+        else:
+            failures += 1
+            tio.writeln("  FAILED  %-11s %s" % (entry.action,entry.db_ocid))
+    tio.writeln("\n%d of %d operations succeeded." % (len(results) - failures,len(results)))
+    tio.writeln("Per database session logs, revert files, journals and run reports have been")
+    tio.writeln("written to:")
+    tio.writeln("  %s" % os.path.join(args.output_dir,"<database-ocid>"))
+    tio.writeln("The run report for the whole batch has been written to:")
+    tio.writeln("  %s" % os.path.join(args.output_dir,OUTPUT_REPORT_FILE))
+    return failures
+
+
+def check_clone_backup(src, backup):
+    if backup.db_system_id != src.database.id:
+        raise MdsargsError("Backup %s is not a backup of %s." % (backup.id,src.database.display_name))
+    if backup.lifecycle_state != oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE:
+        raise MdsargsError("Backup %s is %s, not ACTIVE." % (backup.id,backup.lifecycle_state))
+
+
+def check_clone(src, entry):
+    if entry.display_name == src.database.display_name:
+        raise MdsargsError("Display name, %s, cannot be the same as the source in a clone." % entry.display_name)
+    if entry.address is not None and entry.address == src.database.ip_address:
+        raise MdsargsError("IP address, %s, cannot be the same as the source in a clone." % entry.address)
+
+
+async def clone_run(oci_cfg, output_dir, n, entry, tgt, src, credentials, source_details, limiter, workers, journal=None):
+    # Creates the n'th clone. Its lines go to the session log in its own
+    # sub-directory and, tagged with its name, to the session records.
+    clone_dir = os.path.join(output_dir,"clone-%d" % n)
+    os.makedirs(clone_dir,exist_ok=True)
+    comp_id = entry.comp_ocid or src.database.compartment_id
+    subnet_id = entry.subnet_ocid or src.database.subnet_id
+    details = copy_details(src,tgt,entry.display_name,credentials,comp_id,subnet_id,entry.address,source_details)
+    # Host names must be unique within a subnet, so the clones do not copy
+    # the source's
+    details.hostname_label = None
+
+    with open(os.path.join(clone_dir,SESSION_LOG),"a") as log:
+        tio.bind(Tio(log,tio.current().records,entry.display_name))
+        tio.set_mode(Tio.SCREEN,Tio.OFF)
+        tio.writeln("###############################################################################")
+        tio.writeln("#")
+        tio.writeln("# New clone session commenced %s" % (TIMESTAMP))
+        tio.writeln("#")
+        tio.writeln("###############################################################################\n")
+        try:
+            async with limiter.semaphore(comp_id), workers:
+                tio.writeln("\nEXECUTION PHASE (%s)\n" % (entry.display_name))
+                db = await journal_step(journal,"create:" + entry.display_name,
+                        lambda rid, started: create_db(oci_cfg,details,rid,started),
+                        lambda db_ocid: get_db(oci_cfg,db_ocid))
+            tio.writeln("Created %s (%s)." % (db.display_name,db.id))
+            return db
+        except Exception as e:
+            tio.writeln("\nERROR: %s\n" % e.__str__())
+            tio.flush(durable=True)
+            raise
+        finally:
+            tio.flush()
+
+
+async def clone_db(oci_cfg, output_dir, src, clones, credentials, copy_source, backup_id, max_workers, max_per_compartment, journal=None):
+    # Creates every clone from one source: the source is backed up (or shut
+    # down) once, however many clones there are, and the clones are then
+    # created concurrently. clones is a list of (entry, target) pairs.
+    if backup_id is None:
+        source_details = await get_copy_source(oci_cfg,src,copy_source,src.database.compartment_id,journal)
+    else:
+        source_details = backup_source_details(backup_id)
+
+    results = list()
+    limiter = MdsCompartmentLimiter(max_per_compartment)
+    workers = asyncio.Semaphore(max_workers)
+    tasks = dict()
+    for n, (entry, tgt) in enumerate(clones,1):
+        tasks[asyncio.create_task(clone_run(oci_cfg,output_dir,n,entry,tgt,src,credentials,source_details,limiter,workers,journal))] = entry
+    tio.writeln("Creating %d clones..." % len(tasks))
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            entry = tasks[task]
+            if task.exception() is None:
+                results.append((entry,task.result(),None))
+                tio.writeln("Completed clone %s." % (entry.display_name))
+            else:
+                results.append((entry,None,task.exception()))
+                tio.writeln("FAILED clone %s: %s" % (entry.display_name,task.exception().__str__()))
+    return results
+
+
+def clone_journal(oci_cfg, args, src, clones, manifest):
+    # The resolved shape and configuration of each clone are journalled, so
+    # a resumed run creates exactly the clones that were confirmed.
+    journal = new_journal(oci_cfg,args.output_dir,args.action,src,
+            clones = [dict(entry.to_dict(),
+                shape_name = tgt.shape_name,
+                configuration_id = tgt.config_id,
+                configuration_name = None) for entry, tgt in clones],
+            backup_id = manifest.backup_id,
+            copy_source = args.copy_source,
+            max_workers = manifest.max_workers,
+            max_per_compartment = manifest.max_per_compartment)
+    args.journal_file = journal.fname
+    return journal
+
+
+def journal_clones(header):
+    return [(MdsCloneEntry(item),MdsMetaDatabase(item["shape_name"],item["configuration_id"])) for item in header["clones"]]
+
+
+async def clone(oci_cfg, args):
+    tio.writeln("\nINFORMATION GATHERING PHASE\n")
+    gathering = metrics.begin("information_gathering")
+    manifest = MdsCloneManifest(args.manifest_file)
+    tio.writeln("Clone manifest %s read and parsed." % (args.manifest_file))
+
+    tio.write("Getting existing database's details...")
+    src = await get_source_db(oci_cfg,args.db_ocid)
+    tio.writeln("Done.")
+
+    # Every clone is checked before any changes are made to the source
+    if manifest.backup_id is not None:
+        check_clone_backup(src,await get_backup(oci_cfg,manifest.backup_id))
+    elif args.copy_source == Mdsargs.PITR and not pitr_enabled(src):
+        raise MdsargsError("Point-in-time recovery is not enabled for %s." % src.database.display_name)
+    clones = list()
+    for entry in manifest.entries:
+        check_clone(src,entry)
+        clones.append((entry,await get_batch_target_db(oci_cfg,src,entry)))
+    await preflight(oci_cfg,src.database.availability_domain,[planned_copy(src,tgt,
+            entry.comp_ocid or src.database.compartment_id,
+            entry.subnet_ocid or src.database.subnet_id,
+            entry.address) for entry, tgt in clones],
+            targets=[tgt for entry, tgt in clones],
+            catalog_comp_id=src.database.compartment_id)
+
+    tio.writeln("  Clones:                      %d" % len(clones))
+    tio.writeln("  Concurrent operations:       %d" % manifest.max_workers)
+    tio.writeln("  Operations per compartment:  %d" % manifest.max_per_compartment)
+    for entry, tgt in clones:
+        tio.writeln("  %-24s %-15s %s" % (entry.display_name,entry.address or "",tgt.shape_name))
+
+    # The same administrator credentials are used for every clone
+    tio.writeln("\nProvide credentials for the database administrator.")
+    credentials = get_db_creds()
+
+    metrics.end(gathering)
+    tio.writeln("\nEXECUTION PHASE\n")
+    if not accept_clones(len(clones),args.copy_source,manifest.backup_id):
+        tio.writeln("\nClone has been aborted by the user.")
+        return list()
+
+    tio.write("\n")
+    journal = clone_journal(oci_cfg,args,src,clones,manifest)
+    return await clone_db(oci_cfg,args.output_dir,src,clones,credentials,args.copy_source,manifest.backup_id,manifest.max_workers,manifest.max_per_compartment,journal)
+
+
+def clone_summary(results, args):
+    tio.writeln("\nSUMMARY PHASE\n")
+    failures = 0
+    for entry, db, error in results:
+        if error is None:
+            tio.writeln("  OK      %-24s %-15s %s" % (entry.display_name,db.ip_address,db.id))
+        else:
+            failures += 1
+            tio.writeln("  FAILED  %s" % (entry.display_name))
+    tio.writeln("\n%d of %d clones were created." % (len(results) - failures,len(results)))
+    tio.writeln("Per clone session logs have been written to:")
+    tio.writeln("  %s" % os.path.join(args.output_dir,"clone-<n>"))
+    if args.journal_file is not None:
+        tio.writeln("The journal, which a failed clone can be resumed from, has been written to:")
+        tio.writeln("  %s" % (args.journal_file))
+    tio.writeln("The run report has been written to:")
+    tio.writeln("  %s" % os.path.join(args.output_dir,OUTPUT_REPORT_FILE))
+    return failures
+
+
+@timed_phase("summary")
+async def summary(oci_cfg, db, args):
     tio.writeln("\nSUMMARY PHASE\n")
     if db is not None:
-        id_client = oci.identity.IdentityClient(oci_cfg)
-        nwk_client = oci.core.VirtualNetworkClient(oci_cfg)
-        compartment = id_client.get_compartment(db.compartment_id)
-        subnet = nwk_client.get_subnet(db.subnet_id)
+        id_client = clients.get(oci.identity.IdentityClient,oci_cfg)
+        nwk_client = clients.get(oci.core.VirtualNetworkClient,oci_cfg)
+        compartment = await oci_call(id_client.get_compartment,db.compartment_id)
+        subnet = await oci_call(nwk_client.get_subnet,db.subnet_id)
         tio.writeln("Resultant database:")
         tio.writeln("  Display name:  %s" % (db.display_name))
         tio.writeln("  IP address:    %s" % (db.ip_address))
@@ -767,22 +2681,46 @@ def summary(oci_cfg, db, args):
         tio.writeln("    Subnet:      %s" % (db.subnet_id))
         tio.writeln("\nFiles written:")
         tio.writeln("  Session log: %s" % (os.path.join(args.output_dir,SESSION_LOG)))
-        if args.action == Mdsargs.RESIZE or args.action == Mdsargs.REVERT:
+        tio.writeln("  Records:     %s" % (os.path.join(args.output_dir,SESSION_RECORDS)))
+        if (args.action == Mdsargs.RESIZE or args.action == Mdsargs.REVERT) and os.path.isfile(os.path.join(args.output_dir,OUTPUT_REVERT_FILE)):
             tio.writeln("  Revert file: %s" % (os.path.join(args.output_dir,OUTPUT_REVERT_FILE)))
+        if args.journal_file is not None:
+            tio.writeln("  Journal:     %s" % (args.journal_file))
     else:
         tio.writeln("Files written:")
         tio.writeln("  Session log: %s" % (os.path.join(args.output_dir,SESSION_LOG)))
+        tio.writeln("  Records:     %s" % (os.path.join(args.output_dir,SESSION_RECORDS)))
+        if args.plan:
+            tio.writeln("  Plan:        %s" % (os.path.join(args.output_dir,OUTPUT_PLAN_FILE)))
+            tio.writeln("               %s" % (os.path.join(args.output_dir,OUTPUT_PLAN_TEXT)))
+    tio.writeln("  Run report:  %s" % (os.path.join(args.output_dir,OUTPUT_REPORT_FILE)))
+    if args.prometheus_file is not None:
+        tio.writeln("  Prometheus:  %s" % (args.prometheus_file))
     return
+
+
+def write_run_report(run_metrics, args, success):
+    # The report is written even if the run failed, since that is when it is
+    # most needed. Failing to write it does not fail the run.
+    try:
+        run_metrics.write_report(os.path.join(args.output_dir,OUTPUT_REPORT_FILE),success)
+        if args.prometheus_file is not None:
+            run_metrics.write_prometheus(args.prometheus_file,success)
+    except OSError as e:
+        tio.writeln("Unable to write the run report: %s" % e.__str__())
     
 
 def usage():
     print("\nUsage: %s -h" % (sys.argv[0]))
     print("=====\n")
     print("%s -h\n" % (sys.argv[0]))
-    print("%s -a RESIZE -D <database-ocid> [-d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
-    print("%s -a REVERT -R <revert-file> [-d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
-    print("%s -a LOCAL_COPY -D <database-ocid> [-A <ip-address> -N <name> -d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
-    print("%s -a REMOTE_COPY -D <database-ocid> -S <subnet-ocid> [-C <compartment-ocid> -A <ip-address> -N <name> -d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a RESIZE -D <database-ocid> [-M <INPLACE | REBUILD | BLUEGREEN> --replicate --keep-original -d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a REVERT <-R <revert-file> | -D <database-ocid> | -N <name>> [-d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a LOCAL_COPY -D <database-ocid> [-B <ONLINE | COLD | LATEST | PITR> -A <ip-address> -N <name> -d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a REMOTE_COPY -D <database-ocid> -S <subnet-ocid> [-B <ONLINE | COLD | LATEST | PITR> -C <compartment-ocid> -A <ip-address> -N <name> -d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a CLONE -D <database-ocid> -F <clone-manifest-file> [-B <ONLINE | COLD | LATEST | PITR> -d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a BATCH -F <manifest-file> [-d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
+    print("%s -a RESUME -J <journal-file> [-d <directory-name> -o <oci-conf-file>]\n" % (sys.argv[0]))
     print("""
 Modal Flags
 ===========
@@ -792,7 +2730,7 @@ Modal Flags
   Displays this page. If help is requested then this page will be displayed
   regardless of any other actions being requested or flags used.
 
--a | --action <RESIZE | REVERT | LOCAL_COPY | REMOTE_COPY>
+-a | --action <RESIZE | REVERT | LOCAL_COPY | REMOTE_COPY | CLONE | BATCH | RESUME>
 
   The argument to the action flag must be one of the options specified above.
 
@@ -803,11 +2741,17 @@ Modal Flags
     address and so there should be no need to change any connecting clients.
     When a database is resized it will create a revert file which provides
     an easy rollback path to its former size.
+    By default the database is resized in place (see the -M flag in
+    Additional Action Flags below).
 
   REVERT
     Will revert a resized database to its former size. The reverted database
     will keep the same name and IP address and so there should be no need to
-    change any connecting clients. 
+    change any connecting clients. The revert file is either given by the -R
+    flag or is the latest one in the output directory for the database given
+    by the -D or -N flag. If the database was resized by BLUEGREEN with the
+    --keep-original flag and the original database still exists then the
+    original is swapped back into place instead of being restored.
 
   LOCAL_COPY
     Copies and optionally resizes a database. The copy will be hosted in the
@@ -823,6 +2767,41 @@ Modal Flags
     will be automatically assigned unless their values are specified on the
     command line (see -A and -N flags in Additional Action Flags below).
 
+  CLONE
+    Creates many copies of one database concurrently. The database is backed
+    up (or a backup is reused) once, and every copy is then restored from
+    that one backup, so the cost of the backup and any downtime of the
+    database are paid once however many copies there are. The name, IP
+    address, subnet, compartment, shape and configuration of each copy are
+    read from a clone manifest file (see the -F flag in Additional Action
+    Flags below). Each copy gets its own session log in a sub-directory of
+    the output directory named clone-<n>, where n is its position in the
+    manifest.
+
+  BATCH
+    Resizes and/or locally copies many databases concurrently. The databases,
+    their target shapes and configurations are read from a manifest file (see
+    the -F flag in Additional Action Flags below). Each database gets its own
+    session log and revert file in a sub-directory of the output directory
+    named after its OCID.
+
+  RESUME
+    Resumes an interrupted RESIZE, REVERT, LOCAL_COPY, REMOTE_COPY or CLONE action
+    from its journal (see the -J flag in Additional Action Flags below). Steps
+    that completed are not repeated, and a step that was interrupted waits on
+    the backup or database it had already started rather than starting
+    another.
+
+  Every action other than RESUME runs pre-flight checks at the end of its
+  information gathering phase, before anything is changed. The checks run
+  concurrently and confirm that each compartment is active, that each
+  subnet is available in the database's availability domain, that each
+  requested IP address is in its subnet and not already in use, that a
+  backup to be restored is ACTIVE, and that the MySQL service limits and
+  compartment quotas have room for the new shapes and storage. Every
+  problem found is reported and the action stops. Service limits that
+  cannot be read are reported as a warning and not checked.
+
 Additional Action Flags
 =======================
 
@@ -848,6 +2827,19 @@ Additional Action Flags
   automatically provide a new IP address. This flag and argument has no
   effect when used with other actions.
   
+-B | --backup <ONLINE | COLD | LATEST | PITR>
+
+  An optional flag and argument for the LOCAL_COPY, REMOTE_COPY and CLONE
+  actions. This flag and argument has no effect when used with other actions.
+  It selects the source of the copy:
+    ONLINE  (default) back up the database while it is running.
+    COLD    shut the database down, back it up and then restart it.
+    LATEST  use the database's latest automatic backup, or back it up while
+            it is running if it has none.
+    PITR    restore the latest recovery point of the database. Requires
+            point-in-time recovery to be enabled on the database.
+  Only COLD takes the database being copied offline.
+
 -C | --compartment <compartment-ocid>
  
   A mandatory flag and argument for the REMOTE_COPY action. This flag and 
@@ -857,24 +2849,115 @@ Additional Action Flags
   
 -D | --database <database-ocid>
   
-  A mandatory flag and argument for the RESIZE, LOCAL_COPY and REMOTE_COPY
-  actions. This flag and argument has no effect when used with other actions.
+  A mandatory flag and argument for the RESIZE, LOCAL_COPY, REMOTE_COPY and
+  CLONE actions. This flag and argument has no effect when used with other actions.
   The argument provides the source database to be either resized or copied.
+  It may also be used with the REVERT action in place of the -R flag to
+  revert the database with the given OCID using its latest revert file.
  
+-F | --manifest <manifest-file>
+
+  A mandatory flag and argument for the BATCH action. This flag and argument
+  has no effect when used with other actions. The manifest is a JSON file:
+
+    {
+      "max_workers": 4,
+      "max_per_compartment": 2,
+      "defaults": { "action": "RESIZE", "shape_name": "<shape-name>" },
+      "databases": [
+        { "db_ocid": "<database-ocid>" },
+        { "db_ocid": "<database-ocid>", "configuration_id": "<config-ocid>" },
+        { "db_ocid": "<database-ocid>", "action": "LOCAL_COPY",
+          "display_name": "<name>", "address": "<ip-address>" }
+      ]
+    }
+
+  Each database may set action (RESIZE or LOCAL_COPY), shape_name,
+  configuration_id or configuration_name, resize_method, copy_source,
+  display_name and address. Values in defaults apply to every database
+  unless overridden.
+  max_workers bounds the number of concurrent operations (default 4) and
+  max_per_compartment bounds those against any one compartment (default 2).
+
+  It is also a mandatory flag and argument for the CLONE action, where the
+  argument is a clone manifest, a JSON file:
+
+    {
+      "max_workers": 8,
+      "max_per_compartment": 4,
+      "backup_id": "<backup-ocid>",
+      "defaults": { "shape_name": "<shape-name>" },
+      "clones": [
+        { "display_name": "<name>", "address": "<ip-address>" },
+        { "display_name": "<name>", "subnet_id": "<subnet-ocid>",
+          "compartment_id": "<compartment-ocid>" }
+      ]
+    }
+
+  Each clone must have a unique display_name and may set address,
+  subnet_id, compartment_id (which requires a subnet_id), shape_name and
+  configuration_id or configuration_name. Unless given, a clone is created
+  in the source's compartment and subnet with the source's shape and
+  configuration, and OCI assigns its IP address. If backup_id, an ACTIVE
+  backup of the database, is given then it is reused and the -B flag is
+  ignored. The backup is left in the database's compartment, so creating a
+  clone in another compartment needs permission to read it there.
+  max_workers bounds the number of concurrent creations (default 8) and
+  max_per_compartment bounds those in any one compartment (default 4).
+
+-J | --journal <journal-file>
+
+  A mandatory flag and argument for the RESUME action. This flag and argument
+  has no effect when used with other actions. The argument provides the path
+  and name of the journal written by the action to be resumed (see the
+  section on Files Created and Used below).
+
+-M | --method <INPLACE | REBUILD | BLUEGREEN>
+
+  An optional flag and argument for the RESIZE action. This flag and argument
+  has no effect when used with other actions. REBUILD, the default, shuts
+  down, backs up, deletes and recreates the database from the backup.
+  INPLACE takes a backup of the running database and then changes its shape
+  and configuration in place. If the service refuses the change of shape as
+  one it cannot make in place then the database is shut down and rebuilt
+  from that backup and an incremental one taken after the shutdown. Any
+  other error, or an in-place change that fails, ends the action without a
+  rebuild. BLUEGREEN keeps the database serving while a
+  resized copy is created from a backup under a temporary name and address,
+  then moves the database to a spare address in its subnet and gives the
+  copy its name and IP address, so that clients reconnect to the resized
+  database. The copy replicates from the database until the cutover, so
+  writes are paused only for the cutover (see --replicate). The database
+  must therefore have binary logging with GTIDs enabled; use INPLACE or
+  REBUILD for one that does not. The original database is deleted unless the
+  --keep-original flag is used. The hostname label, if any, is not moved.
+
 -N | --display-name <name>
 
   An optional flag and argument for the LOCAL_COPY and REMOTE_COPY actions.
   This flag and argument has no effect when used with other actions. If the
   flag and argument is not supplied then the copied database's display name
-  shall take the form copy-<original-display-name>.
+  shall take the form copy-<original-display-name>. It may also be used with
+  the REVERT action in place of the -R flag to revert the database with the
+  given display name using its latest revert file.
+
+-P | --prometheus <prometheus-file>
+
+  An optional flag and argument that can be used with all actions. If this
+  flag and argument is used then the timings of the run are also written to
+  the file specified in the Prometheus text format, for example into the
+  directory read by the node exporter's textfile collector. The file is
+  replaced at the end of each run.
 
 -R | --revert <revert-file>
 
-  A mandatory flag and argument for the REVERT action. This argument has no
+  An optional flag and argument for the REVERT action. This argument has no
   effect when used with other actions. The argument provides the path and name
   of the revert-file. This file provides all the details necessary to rollback
   a resized database to its former size. For more options and details please
   see both the -B flag above and the section on Files Created and Used below.
+  If this flag is not used then either the -D or the -N flag must be used to
+  find the latest revert file for that database in the output directory.
   
 -S | --subnet <subnet-ocid>
 
@@ -882,6 +2965,75 @@ Additional Action Flags
   no effect when used with other actions. The argument provided must be an 
   OCID for a subnet other than the one used by the database being copied.  
   
+-Y | --answers <answers-file>
+
+  An optional flag that can be used with all actions. The answers file gives
+  the answers to every question mdsac would otherwise ask, so that an action
+  can be run unattended, e.g. from cron or a pipeline. It is a JSON object,
+  or a YAML one if its name ends in .yaml or .yml (which requires PyYAML),
+  with the following optional members:
+
+    shape_name     The shape to resize to (RESIZE, or a copy that is resized).
+    resize_copy    true to resize a copy (LOCAL_COPY, REMOTE_COPY). The
+                   default is false.
+    configuration  An object of configuration options and their values, e.g.
+                   {"max_connections": 2000}. Options that differ between the
+                   current and new shape's configurations and are not given
+                   take their suggested values.
+    username       The database administrator's username.
+    password_file  A file holding only the administrator's password. It must
+                   not be accessible by group or others. A relative name is
+                   relative to the answers file.
+    password_env   An environment variable holding the password, e.g. one set
+                   from a vault by the scheduler. Give this or password_file.
+    confirm        true to make the changes. The default is false, which
+                   aborts the action as if the user had answered no.
+
+  The password is never written to the answers file, the session log or the
+  journal. Unknown members, answers of the wrong type and unusable
+  credentials are reported before any change is made. Unattended runs can
+  run concurrently, but each must be given its own output directory (see -d).
+
+--replicate
+
+  An optional flag for the RESIZE action with the BLUEGREEN method. The
+  BLUEGREEN method always replicates, so the flag is implied and is only
+  accepted so that existing command lines still work. The
+  database stays writable while the copy is created, and an inbound
+  replication channel then catches the copy up. Writes are paused only while
+  the copy catches up on the last transactions and the addresses are
+  swapped. The database must have binary logging with GTIDs enabled, and the
+  administrator's credentials are used for the channel. If the channel does
+  not report a healthy status gathered after the database was made read-only
+  then the cutover is abandoned and the database is made writable again; a
+  RESUME of the action tries the cutover again.
+
+--keep-original
+
+  An optional flag for the RESIZE action with the BLUEGREEN method. The
+  original database is kept, read-only and renamed <name>-original, at a
+  spare address in its subnet. A later REVERT swaps it back into place in a
+  few minutes rather than restoring a backup.
+
+--refresh-cache
+
+  An optional flag that can be used with all actions. The shape and
+  configuration catalogs read from OCI are cached for 24 hours (see Files
+  Created and Used below). This flag discards the cached catalogs so that
+  they are read afresh from OCI.
+
+--plan
+
+  An optional flag for the RESIZE, REVERT, LOCAL_COPY and REMOTE_COPY
+  actions. The information gathering phase and the pre-flight checks are run
+  as usual, but instead of making any change mdsac prints the steps the
+  action would take and exits. For each step the plan shows the OCI
+  operation it would call, the request it would send, its expected duration
+  (see history.db below) and whether the database is offline during it. The
+  plan ends with the expected duration, the time the database would be
+  offline and the number of backups taken and databases created and deleted.
+  No credentials are asked for and none appear in the plan.
+
 Files Created and Used
 ======================
 
@@ -900,16 +3052,74 @@ form revert.<timestamp> will be written to the output directory. The contents
 of this file may be used to revert a resized database to its original size.
 
 If a REVERT action is requested then the user must specify an input 
-revert-file (see the -I flag for details). Note that when a REVERT action is
+revert-file (see the -R flag for details). Note that when a REVERT action is
 requested it will also create a REVERT file. No revert-file is created when
 using either the local or remote copy actions.
+
+Revert files are written atomically and are valid JSON at every stage. A
+revert file only becomes a revert point once the action that wrote it has
+completed. The revert files in the output directory and its sub-directories
+are indexed in revert-index.db, an SQLite database in the output directory,
+so that REVERT can find the latest revert point for a database by its OCID
+or display name. The index is brought up to date whenever it is used and may
+be safely deleted at any time.
+
+The shape and configuration catalogs read from OCI are cached in the mdsac
+directory of the user's cache directory ($XDG_CACHE_HOME or ~/.cache). The
+cache is keyed by tenancy, region and compartment, and its entries expire
+after 24 hours. The configuration an action is to use is always read again
+from OCI before any change is made. If it has since been deleted then the
+action ends without changes and its cached entries are discarded, so that
+running the action again chooses from the configurations that exist. The
+cache may be safely deleted at any time; see also the --refresh-cache flag.
+
+The durations of backups, shutdowns, updates, deletions, creations and the
+changes of address and mode made by BLUEGREEN are
+recorded in history.db, an SQLite database in the same mdsac cache
+directory, keyed by operation, shape and storage size. They are used to predict how long each of
+these operations will take. The prediction is shown beside the progress
+spinner as an ETA and is used to poll OCI sparingly early in an operation and
+more often as its expected finish approaches. The first poll is always made
+soon after an operation starts and the gap between polls only grows
+gradually, so an operation that finishes sooner than predicted is still
+seen promptly. The history may be safely deleted at any time.
+
+Every OCI API call, and every retry of one, is paced to 10 calls a second
+with bursts of 20. The balance of calls is kept in rate-limit.db, an SQLite
+database in the same mdsac cache directory, so concurrent mdsac runs that
+share the cache directory (e.g. unattended runs by one user) share the rate
+between them rather than each calling at the full rate. Throttled (429) and
+transient (5xx) responses are retried with backoff by mdsac alone; the SDK's
+own retries are turned off so that no retry escapes the pacing. The file may
+be safely deleted at any time.
+
+Once a RESIZE, REVERT, LOCAL_COPY, REMOTE_COPY or CLONE action has been accepted it
+records each of its steps, and the OCIDs of the backups and databases they
+create, in a journal whose name shall take the form journal.<timestamp> in
+the output directory. The journal is appended to as each step starts and
+completes, and can be used to resume an interrupted action (see the RESUME
+action). A BATCH action writes a journal for each database. A CLONE action
+writes one journal for all of its copies, so resuming it creates only the
+copies that had not yet been created.
+
+When the --plan flag is used the plan is written to the output directory
+as both plan.<timestamp>.json, for review by other tools, and
+plan.<timestamp>.txt, as printed. No revert file or journal is written.
+
+At the end of every action a run report whose name shall take the form
+report.<timestamp>.json is written to the output directory, whether or not
+the action succeeded. It records the duration of each phase of the run
+(information gathering, configuration, shutdown, backup, update, delete,
+create, start, cutover and summary) and, for each OCI API method called, the number
+of calls, the number that failed and their latency percentiles. A BATCH
+action also writes a run report for each database.
     """)
     return
 
 
 def process_cmd_line(cmdargs):
     arg_handler = Mdsargs()
-    arguments, values = getopt.getopt(cmdargs,"ha:d:o:A:C:D:N:R:S:", ["help","action=","output-dir=","oci-conf=","address=","compartment=","database=","display-name","revert=","subnet="])
+    arguments, values = getopt.getopt(cmdargs,"ha:d:o:A:B:C:D:F:J:M:N:P:R:S:Y:", ["help","action=","output-dir=","oci-conf=","address=","backup=","compartment=","database=","manifest=","journal=","method=","plan","prometheus=","refresh-cache","replicate","keep-original","display-name=","revert=","subnet=","answers="])
     for current_arg, current_val in arguments:
         if current_arg in ("-h","--help"):
             arg_handler.action = Mdsargs.HELP
@@ -922,26 +3132,80 @@ def process_cmd_line(cmdargs):
             arg_handler.oci_cfg_file = current_val
         elif current_arg in ("-A","--address"):
             arg_handler.address = current_val
+        elif current_arg in ("-B","--backup"):
+            arg_handler.copy_source = current_val
         elif current_arg in ("-C","--compartment"):
             arg_handler.comp_ocid = current_val
         elif current_arg in ("-D","--database"):
             arg_handler.db_ocid = current_val
+        elif current_arg in ("-F","--manifest"):
+            arg_handler.manifest_file = current_val
+        elif current_arg in ("-J","--journal"):
+            arg_handler.journal_file = current_val
+        elif current_arg in ("-M","--method"):
+            arg_handler.resize_method = current_val
         elif current_arg in ("-N","--display-name"):
             arg_handler.display_name = current_val
+        elif current_arg in ("-P","--prometheus"):
+            arg_handler.prometheus_file = current_val
         elif current_arg in ("-R","--revert"):
             arg_handler.revert_file = current_val
         elif current_arg in ("-S","--subnet"):
             arg_handler.subnet_ocid = current_val
+        elif current_arg in ("-Y","--answers"):
+            arg_handler.answers_file = current_val
+        elif current_arg == "--plan":
+            arg_handler.plan = True
+        elif current_arg == "--replicate":
+            arg_handler.replicate = True
+        elif current_arg == "--keep-original":
+            arg_handler.keep_original = True
+        elif current_arg == "--refresh-cache":
+            arg_handler.refresh_cache = True
         else:
             arg_handler.action = None
             break
     return arg_handler
 
 
+async def run_action(oci_cfg, args):
+    # Each action is a coroutine. Blocking SDK calls are run on a bounded
+    # executor (see oci_call()) so that the event loop can drive many
+    # lifecycle transitions concurrently from one thread.
+    asyncio.get_running_loop().set_default_executor(
+            futures.ThreadPoolExecutor(max_workers=EXECUTOR_THREADS))
+    db = None
+    if args.answers_file is not None:
+        answers.load(args.answers_file)
+        tio.writeln("\nAnswers file %s read and parsed." % (args.answers_file))
+    if args.plan and args.action not in (Mdsargs.RESIZE, Mdsargs.REVERT, Mdsargs.LOCAL_COPY, Mdsargs.REMOTE_COPY):
+        raise MdsargsError("Only the RESIZE, REVERT, LOCAL_COPY and REMOTE_COPY actions can be planned.")
+    if args.action == Mdsargs.BATCH:
+        return batch_summary(await batch(oci_cfg,args),args) == 0
+    elif args.action == Mdsargs.RESIZE:
+        db = await resize(oci_cfg,args)
+    elif args.action == Mdsargs.REVERT:
+        db = await revert(oci_cfg,args)
+    elif args.action == Mdsargs.LOCAL_COPY:
+        db = await lcopy(oci_cfg,args)
+    elif args.action == Mdsargs.REMOTE_COPY:
+        db = await rcopy(oci_cfg,args)
+    elif args.action == Mdsargs.CLONE:
+        return clone_summary(await clone(oci_cfg,args),args) == 0
+    elif args.action == Mdsargs.RESUME:
+        db = await resume(oci_cfg,args)
+        if isinstance(db,list):
+            return clone_summary(db,args) == 0
+    await summary(oci_cfg,db,args)
+    return True
+
+
 # main routine
-def main(cmdargs):
-    global tio
+def exit_on_signal(signum, frame):
+    sys.exit(128 + signum)
+
 
+def main(cmdargs):
     try:
         args = process_cmd_line(cmdargs[1:])
         if args.action == Mdsargs.HELP:
@@ -952,7 +3216,10 @@ def main(cmdargs):
             if args.output_dir is None:
                 args.output_dir = os.getcwd()
 
-            tio = Tio(open(os.path.join(args.output_dir,"session.log"),"a"))
+            tio.bind(Tio(
+                open(os.path.join(args.output_dir,SESSION_LOG),"a"),
+                open(os.path.join(args.output_dir,SESSION_RECORDS),"a"),
+                args.db_ocid or args.action))
 
             # Use Tee so that anything printed to screen (using the stdout file
             # descriptor) will also be written to the session log. When there is
@@ -976,25 +3243,35 @@ def main(cmdargs):
             if args.oci_cfg_file is None:
                 oci_cfg = oci.config.from_file()
             else:
-                oci_cfg = oci.config.from_file(filename)
+                oci_cfg = oci.config.from_file(args.oci_cfg_file)
+
+            if args.refresh_cache:
+                catalog.invalidate()
+
+            # A hang up (e.g. a dropped ssh session) or a terminate request
+            # ends the run as sys.exit() would, so that the run report is
+            # written and the session log is written out at exit
+            for name in ("SIGHUP", "SIGTERM"):
+                if hasattr(signal,name):
+                    signal.signal(getattr(signal,name),exit_on_signal)
 
             # Now execute the action
+            run_metrics = metrics.bind(MdsMetrics(args.action))
+            success = False
             try:
-                db = None
-                if args.action == Mdsargs.RESIZE:
-                    db = resize(oci_cfg,args)
-                elif args.action == Mdsargs.REVERT:
-                    db = revert(oci_cfg,args)
-                elif args.action == Mdsargs.LOCAL_COPY:
-                    db = lcopy(oci_cfg,args)
-                elif args.action == Mdsargs.REMOTE_COPY:
-                    db = rcopy(oci_cfg,args)
-                summary(oci_cfg,db,args)
-                tio.writeln("\nExiting normally.")
+                success = asyncio.run(run_action(oci_cfg,args))
+                if success:
+                    tio.writeln("\nExiting normally.")
+                else:
+                    tio.writeln("\nExiting with failures.")
+                    sys.exit(1)
             except Exception as e:
                 # Exception raised during the processing of an action
                 tio.writeln("\nERROR: %s\n" % e.__str__())
+                tio.flush(durable=True)
                 sys.exit(1)
+            finally:
+                write_run_report(run_metrics,args,success)
         else:
             usage()
             print("Additional information: either help or an action must be specified.")
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+
+import asyncio
+import concurrent.futures
+import datetime
+import getopt
+import json
+import oci
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import mdsac
+from utils.mdsargs import Mdsargs
+from utils.mdscreds import MdsCredentials
+from utils.mdsdatabase import MdsMetaDatabase
+from utils.mdslimits import MdsTokenBucket
+from utils.mdsmetrics import MdsMetrics
+from utils.mdsmetrics import percentile
+from utils.mdsmetrics import write_atomic
+from utils.mdspoller import MdsPollCoordinator
+from utils.mdssim import MdsSimulator
+from utils.mdssim import SIM_CONFIG
+from utils.tio import Tio
+
+# Constants
+# Version of the results file format. Only results of the same format are
+# compared.
+RESULTS_FORMAT = 1
+DEFAULT_RESULTS_FILE = "bench.json"
+# Scripted duration (in seconds) of each lifecycle operation
+DEFAULT_LATENCIES = {
+    "backup": 8.0,
+    "create": 12.0,
+    "delete": 4.0,
+    "shutdown": 4.0,
+    "start": 4.0,
+    "update": 8.0
+}
+DEFAULT_CONCURRENCY = (1, 10, 50, 100, 200)
+# Databases per simulated compartment
+DATABASES_PER_COMPARTMENT = 25
+# A metric has regressed if it is worse than the baseline by more than the
+# tolerance (a fraction of the baseline) and by more than its floor (an
+# absolute amount, so that noise in small values is ignored).
+DEFAULT_TOLERANCE = 0.2
+COMPARED_METRICS = (
+    # (metric, statistic, higher is worse, floor)
+    ("overhead_seconds", "p50", True, 0.5),
+    ("poll_waste_seconds", "p50", True, 0.5),
+    ("api_calls_per_operation", None, True, 0.5),
+    ("throughput", None, False, 0.01)
+)
+# The startup benchmark times the CLI's fast paths, as the time over that of
+# the bare interpreter. Startup has regressed if it is over the budget, if it
+# is worse than the baseline by more than the tolerance and the floor, or if
+# a module that should only be loaded when it is used has been loaded.
+STARTUP = "startup"
+STARTUP_RUNS = 15
+STARTUP_BUDGET = 0.1
+STARTUP_FLOOR = 0.01
+STARTUP_COMMANDS = (
+    ("help", ["-h"]),
+    ("invalid_arguments", ["-a", "INVALID"])
+)
+DEFERRED_MODULES = ("asyncio", "concurrent.futures", "oci", "sqlite3")
+TARGET_SHAPE = MdsSimulator.DEFAULT_SHAPES[1][0]
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "Bench#Passw0rd"
+
+
+async def bench_backup(oci_cfg, db_ocid, tgt, workdir, credentials):
+    return await mdsac.backup_db(oci_cfg,db_ocid)
+
+
+async def bench_resize_inplace(oci_cfg, db_ocid, tgt, workdir, credentials):
+    return await bench_resize(oci_cfg,db_ocid,tgt,workdir,credentials,True)
+
+
+async def bench_resize_rebuild(oci_cfg, db_ocid, tgt, workdir, credentials):
+    return await bench_resize(oci_cfg,db_ocid,tgt,workdir,credentials,False)
+
+
+async def bench_resize(oci_cfg, db_ocid, tgt, workdir, credentials, in_place):
+    revert_filename = os.path.join(workdir,mdsac.OUTPUT_REVERT_FILE)
+    src = await mdsac.get_source_db(oci_cfg,db_ocid)
+    journal = mdsac.new_journal(oci_cfg,workdir,Mdsargs.RESIZE,src,
+            shape_name = tgt.shape_name,
+            config_id = tgt.config_id,
+            in_place = in_place,
+            revert_file = revert_filename)
+    return await mdsac.resize_db(oci_cfg,src,tgt,credentials,revert_filename,in_place,journal)
+
+
+async def bench_copy_online(oci_cfg, db_ocid, tgt, workdir, credentials):
+    src = await mdsac.get_source_db(oci_cfg,db_ocid)
+    name = mdsac.local_copy_name(src,None)
+    journal = mdsac.new_journal(oci_cfg,workdir,Mdsargs.LOCAL_COPY,src,
+            shape_name = tgt.shape_name,
+            config_id = tgt.config_id,
+            name = name,
+            compartment_id = src.database.compartment_id,
+            subnet_id = src.database.subnet_id,
+            address = None,
+            copy_source = Mdsargs.ONLINE)
+    return await mdsac.copy_db(oci_cfg,src,tgt,name,credentials,
+            src.database.compartment_id,src.database.subnet_id,None,Mdsargs.ONLINE,journal)
+
+
+# Each scenario runs real action functions and lists the lifecycle operations
+# on its critical path, whose scripted durations add up to its ideal time.
+SCENARIOS = {
+    "backup": (bench_backup, ("backup",)),
+    "resize_inplace": (bench_resize_inplace, ("backup", "update")),
+    "resize_rebuild": (bench_resize_rebuild, ("shutdown", "backup", "delete", "create")),
+    "copy_online": (bench_copy_online, ("backup", "create"))
+}
+
+
+def summarize(values):
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values,50),3),
+        "p90": round(percentile(values,90),3),
+        "max": round(max(values),3)
+    }
+
+
+async def run_operation(fn, oci_cfg, db_ocid, tgt, workdir, credentials, parent):
+    # Each operation has its own execution context, as a batch worker does
+    os.makedirs(workdir,exist_ok=True)
+    log = open(os.path.join(workdir,mdsac.SESSION_LOG),"a")
+    try:
+        tio = Tio(log)
+        tio.set_mode(Tio.SCREEN,Tio.OFF)
+        mdsac.tio.bind(tio)
+        mdsac.metrics.bind(MdsMetrics(fn.__name__,parent))
+        start = time.monotonic()
+        await fn(oci_cfg,db_ocid,tgt,workdir,credentials)
+        return time.monotonic() - start
+    finally:
+        mdsac.tio.flush()
+        log.close()
+
+
+async def run_level(scenario, concurrency, latencies, workdir):
+    fn, critical_path = SCENARIOS[scenario]
+    sim = MdsSimulator(latencies)
+    db_ocids = sim.seed(
+            databases = concurrency,
+            compartments = max(1,(concurrency + DATABASES_PER_COMPARTMENT - 1) // DATABASES_PER_COMPARTMENT))
+    sim.install(mdsac.clients)
+    # Each level starts with the shared state of a fresh process
+    mdsac.poller = MdsPollCoordinator()
+    mdsac.rate_limiter = MdsTokenBucket(mdsac.API_RATE,mdsac.API_BURST)
+
+    credentials = MdsCredentials()
+    credentials.set_username(ADMIN_USERNAME)
+    credentials.set_password(ADMIN_PASSWORD,ADMIN_PASSWORD)
+    parent = mdsac.metrics.bind(MdsMetrics(scenario))
+    src = await mdsac.get_db(SIM_CONFIG,db_ocids[0])
+    cfg_index = await mdsac.get_config_index(SIM_CONFIG,src.compartment_id)
+    tgt = MdsMetaDatabase(TARGET_SHAPE,mdsac.cfg_id_for_name(cfg_index,TARGET_SHAPE))
+    calls_before = sum(sim.calls.values())
+
+    start = time.monotonic()
+    results = await asyncio.gather(*[
+            run_operation(fn,SIM_CONFIG,db_ocid,tgt,os.path.join(workdir,"%s-%d-%d" % (scenario,concurrency,n)),credentials,parent)
+            for n, db_ocid in enumerate(db_ocids)],
+            return_exceptions=True)
+    seconds = time.monotonic() - start
+
+    durations = [r for r in results if not isinstance(r,BaseException)]
+    failures = [r for r in results if isinstance(r,BaseException)]
+    calls = sim.calls
+    api_calls = sum(calls.values()) - calls_before
+    ideal = sum(latencies[op] for op in critical_path)
+    waste = [t["waste"] for t in sim.transitions if t["waste"] is not None]
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "seconds": round(seconds,3),
+        "ideal_seconds": round(ideal,3),
+        "throughput": round(len(durations) / seconds,4),
+        "operation_seconds": summarize(durations),
+        "overhead_seconds": summarize([d - ideal for d in durations]),
+        "poll_waste_seconds": summarize(waste),
+        "api_calls": api_calls,
+        "api_calls_per_operation": round(api_calls / concurrency,2),
+        "api_calls_by_method": calls,
+        "failures": len(failures),
+        "errors": sorted(set(str(e) for e in failures))
+    }
+
+
+def time_command(cmd, runs):
+    times = list()
+    for n in range(runs):
+        start = time.monotonic()
+        subprocess.run(cmd,stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+        times.append(time.monotonic() - start)
+    return times
+
+
+def measure_startup(runs=STARTUP_RUNS):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)),"mdsac.py")
+    interpreter = percentile(time_command([sys.executable,"-c","pass"],runs),50)
+    commands = dict()
+    for name, args in STARTUP_COMMANDS:
+        times = time_command([sys.executable,script] + args,runs)
+        commands[name] = {
+            "seconds": summarize(times),
+            "overhead_seconds": summarize([t - interpreter for t in times])
+        }
+    # -X importtime lists every module imported, so shows whether any of the
+    # deferred modules was loaded for help
+    stderr = subprocess.run([sys.executable,"-X","importtime",script,"-h"],
+            stdout=subprocess.DEVNULL,stderr=subprocess.PIPE,text=True).stderr
+    imported = set(line.split("|")[-1].strip() for line in stderr.splitlines() if line.startswith("import time:"))
+    return {
+        "interpreter_seconds": round(interpreter,3),
+        "commands": commands,
+        "deferred_modules_loaded": [m for m in DEFERRED_MODULES
+                if any(i == m or i.startswith(m + ".") for i in imported)]
+    }
+
+
+def check_startup(startup, baseline, tolerance):
+    # Returns a description of each way in which startup has regressed
+    regressions = list()
+    for module in startup["deferred_modules_loaded"]:
+        regressions.append("startup: %s is loaded by help" % module)
+    previous = dict()
+    if baseline is not None and baseline.get(STARTUP) is not None:
+        previous = baseline[STARTUP]["commands"]
+    for name, command in sorted(startup["commands"].items()):
+        new = command["overhead_seconds"]["p50"]
+        if new > STARTUP_BUDGET:
+            regressions.append("startup: %s takes %.3fs, over the budget of %.3fs" % (name,new,STARTUP_BUDGET))
+        if name in previous:
+            old = previous[name]["overhead_seconds"]["p50"]
+            if new - old > STARTUP_FLOOR and new - old > abs(old) * tolerance:
+                regressions.append("startup: %s takes %.3fs, was %.3fs" % (name,new,old))
+    return regressions
+
+
+def compare(results, baseline, tolerance):
+    # Returns a description of every metric that has regressed against the
+    # baseline.
+    regressions = list()
+    if baseline.get("format") != RESULTS_FORMAT:
+        raise ValueError("Baseline results are in format %s, not %s." % (baseline.get("format"),RESULTS_FORMAT))
+    previous = dict(((r["scenario"], r["concurrency"]), r) for r in baseline["results"])
+    for result in results["results"]:
+        base = previous.get((result["scenario"],result["concurrency"]))
+        if base is None:
+            continue
+        for metric, statistic, higher_is_worse, floor in COMPARED_METRICS:
+            old = base.get(metric)
+            new = result.get(metric)
+            if statistic is not None:
+                old = old.get(statistic) if old else None
+                new = new.get(statistic) if new else None
+            if old is None or new is None:
+                continue
+            change = (new - old) if higher_is_worse else (old - new)
+            if change > floor and change > abs(old) * tolerance:
+                name = metric if statistic is None else metric + "." + statistic
+                regressions.append("%s with %d operations: %s is %.3f, was %.3f" % (result["scenario"],result["concurrency"],name,new,old))
+    return regressions
+
+
+def report(result):
+    def stat(summary, key):
+        if summary is None:
+            return "-"
+        return "%.2f" % summary[key]
+    print("%-15s %6d %9.2f %9.2f %9s %9s %9s %9.1f %6d" % (
+        result["scenario"],
+        result["concurrency"],
+        result["seconds"],
+        result["throughput"],
+        stat(result["overhead_seconds"],"p50"),
+        stat(result["overhead_seconds"],"p90"),
+        stat(result["poll_waste_seconds"],"p50"),
+        result["api_calls_per_operation"],
+        result["failures"]))
+
+
+async def run_benchmarks(scenarios, levels, latencies, workdir):
+    # The same executor for blocking SDK calls as run_action() uses
+    asyncio.get_running_loop().set_default_executor(
+            concurrent.futures.ThreadPoolExecutor(max_workers=mdsac.EXECUTOR_THREADS))
+    results = list()
+    if [scenario for scenario in scenarios if scenario != STARTUP]:
+        print("%-15s %6s %9s %9s %9s %9s %9s %9s %6s" % (
+            "scenario","ops","seconds","ops/s","ovh p50","ovh p90","waste p50","calls/op","failed"))
+    for scenario in scenarios:
+        if scenario == STARTUP:
+            continue
+        for concurrency in levels:
+            result = await run_level(scenario,concurrency,latencies,workdir)
+            report(result)
+            results.append(result)
+    return results
+
+
+def usage():
+    print("\nUsage: %s -h" % (sys.argv[0]))
+    print("=====\n")
+    print("%s [-s <scenario>[,<scenario>...] -c <count>[,<count>...] -l <scale> -r <results-file> -b <baseline-file> -t <tolerance>]\n" % (sys.argv[0]))
+    print("""
+Runs the real action functions against the simulated OCI MySQL service (see
+utils/mdssim.py) with scripted lifecycle durations, and measures:
+
+  - the wall-clock overhead of each operation over the scripted durations on
+    its critical path,
+  - the API calls made per operation,
+  - the poll waste: the time from each lifecycle transition until a poll
+    first saw it,
+  - the throughput as the number of concurrent operations grows.
+
+No OCI tenancy, config file or credentials are used, and the shape and
+configuration cache and the duration history are left untouched.
+
+Flags
+=====
+
+-h | --help
+
+  Displays this page.
+
+-s | --scenario <scenario>[,<scenario>...]
+
+  The scenarios to run: %s. All are run by default.
+  The %s scenario times the help and argument error paths of mdsac.py,
+  which must take less than %gs longer than starting the bare interpreter,
+  and checks that they do not load any of %s.
+
+-c | --concurrency <count>[,<count>...]
+
+  The numbers of concurrent operations to run each scenario with. The
+  default is %s.
+
+-l | --latency-scale <scale>
+
+  Multiplies the scripted duration of every lifecycle operation. The default
+  durations (in seconds) are: %s.
+
+-r | --results <results-file>
+
+  The file the results are written to, as JSON. The default is %s in the
+  current working directory.
+
+-b | --baseline <baseline-file>
+
+  A results file from an earlier run (e.g. of the previous release) to
+  compare the results with. If a metric has regressed then the regressions
+  are listed and the exit status is 2. The exit status is also 2 if startup
+  has regressed.
+
+-t | --tolerance <fraction>
+
+  How much worse than the baseline (as a fraction of it) a metric may be
+  before it is a regression. The default is %s.
+""" % (
+        ", ".join(list(SCENARIOS) + [STARTUP]),
+        STARTUP,
+        STARTUP_BUDGET,
+        ", ".join(DEFERRED_MODULES),
+        ",".join(str(c) for c in DEFAULT_CONCURRENCY),
+        ", ".join("%s %g" % (k,v) for k, v in sorted(DEFAULT_LATENCIES.items())),
+        DEFAULT_RESULTS_FILE,
+        DEFAULT_TOLERANCE))
+
+
+def main(cmdargs):
+    try:
+        arguments, values = getopt.getopt(cmdargs[1:],"hb:c:l:r:s:t:",["help","baseline=","concurrency=","latency-scale=","results=","scenario=","tolerance="])
+        scenarios = list(SCENARIOS) + [STARTUP]
+        levels = list(DEFAULT_CONCURRENCY)
+        scale = 1.0
+        results_file = DEFAULT_RESULTS_FILE
+        baseline_file = None
+        tolerance = DEFAULT_TOLERANCE
+        for current_arg, current_val in arguments:
+            if current_arg in ("-h","--help"):
+                usage()
+                return
+            elif current_arg in ("-b","--baseline"):
+                baseline_file = current_val
+            elif current_arg in ("-c","--concurrency"):
+                levels = [int(c) for c in current_val.split(",")]
+                if min(levels) < 1:
+                    raise ValueError("Concurrency must be at least 1.")
+            elif current_arg in ("-l","--latency-scale"):
+                scale = float(current_val)
+                if scale < 0:
+                    raise ValueError("Latency scale must not be negative.")
+            elif current_arg in ("-r","--results"):
+                results_file = current_val
+            elif current_arg in ("-s","--scenario"):
+                scenarios = current_val.split(",")
+                for scenario in scenarios:
+                    if scenario not in SCENARIOS and scenario != STARTUP:
+                        raise ValueError("Unknown scenario %s." % scenario)
+            elif current_arg in ("-t","--tolerance"):
+                tolerance = float(current_val)
+        baseline = None
+        if baseline_file is not None:
+            with open(baseline_file,"r") as f:
+                baseline = json.load(f)
+    except (getopt.GetoptError, ValueError, OSError) as e:
+        usage()
+        print("Additional information:")
+        print(e)
+        sys.exit(1)
+
+    # The benchmark must not read or pollute the user's caches
+    mdsac.catalog.enabled = False
+    mdsac.history.enabled = False
+    latencies = dict((k, v * scale) for k, v in DEFAULT_LATENCIES.items())
+    with tempfile.TemporaryDirectory(prefix="mdsbench.") as workdir:
+        results = {
+            "format": RESULTS_FORMAT,
+            "created": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "oci_sdk": oci.__version__,
+            "latencies": latencies,
+            "results": asyncio.run(run_benchmarks(scenarios,levels,latencies,workdir)),
+            STARTUP: None
+        }
+    regressions = list()
+    if STARTUP in scenarios:
+        results[STARTUP] = measure_startup()
+        for name, command in sorted(results[STARTUP]["commands"].items()):
+            print("\nStartup (%s): %.3fs, %.3fs longer than the bare interpreter" % (
+                name,command["seconds"]["p50"],command["overhead_seconds"]["p50"]))
+        regressions.extend(check_startup(results[STARTUP],baseline,tolerance))
+    write_atomic(results_file,json.dumps(results,indent=2,sort_keys=True) + "\n")
+    print("\nResults written to %s" % results_file)
+
+    if baseline is not None:
+        regressions.extend(compare(results,baseline,tolerance))
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(2)
+    if baseline is not None:
+        print("\nNo regressions against %s." % baseline_file)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,136 @@
+import itertools
+import json
+import os
+import signal
+import sys
+
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mdsac
+from utils.mdsanswers import MdsAnswers
+from utils.mdscache import MdsCatalogCache
+from utils.mdsclients import MdsClientFactory
+from utils.mdshistory import MdsDurationHistory
+from utils.mdslimits import MdsTokenBucket
+from utils.mdspoller import MdsPollCoordinator
+from utils.mdsretry import MdsRetryPolicy
+from utils.mdssim import MdsSimulator
+from utils.mdssim import SIM_CONFIG
+from utils.mdswaiter import MdsWaiter
+from utils import tio
+from utils.tio import Tio
+
+# Scripted duration (in seconds) of each simulated lifecycle operation
+LATENCIES = {
+    "backup": 0.2,
+    "create": 0.2,
+    "delete": 0.1,
+    "shutdown": 0.1,
+    "start": 0.1,
+    "update": 0.2,
+    "channel": 0.1
+}
+ADMIN_PASSWORD = "Sim#Passw0rd"
+TARGET_SHAPE = "MySQL.VM.Standard.E3.2.32GB"
+
+
+class FastWaiter(MdsWaiter):
+    # Polls the simulator far more often than OCI would be polled, so an
+    # action takes seconds rather than minutes
+
+    def __init__(self, deadline=None, first_delay=0.05, max_delay=0.2, **kwargs):
+        kwargs.pop("max_sparse_delay",None)
+        super().__init__(deadline,min(first_delay,0.05),min(max_delay,0.2),max_sparse_delay=0.2,**kwargs)
+
+
+def refuse_input(self, message):
+    raise AssertionError("Unexpected prompt: %s" % message)
+
+
+class MdsacRunner(object):
+    # Runs mdsac actions in-process against a simulator, as a fresh process
+    # would, each with its own timestamped output files
+
+    def __init__(self, sim, directory, monkeypatch):
+        self.sim = sim
+        self.directory = directory
+        self._monkeypatch = monkeypatch
+        self._runs = itertools.count(1)
+        self.oci_cfg_file = os.path.join(directory,"oci.cfg")
+        key_file = os.path.join(directory,"sim.pem")
+        open(key_file,"w").close()
+        with open(self.oci_cfg_file,"w") as f:
+            f.write("[DEFAULT]\n")
+            for k, v in SIM_CONFIG.items():
+                f.write("%s=%s\n" % (k,key_file if k == "key_file" else v))
+        password_file = os.path.join(directory,"password")
+        with open(password_file,"w") as f:
+            f.write(ADMIN_PASSWORD + "\n")
+        os.chmod(password_file,0o600)
+
+    def answers(self, name="answers.json", **answers):
+        # Writes an answers file that confirms the action and gives the
+        # administrator's credentials
+        doc = {"username": "admin", "password_file": "password", "confirm": True}
+        doc.update(answers)
+        fname = os.path.join(self.directory,name)
+        with open(fname,"w") as f:
+            json.dump(doc,f)
+        return fname
+
+    def run(self, *args, output_dir="out"):
+        # Returns the exit code of the action
+        timestamp = "run%d" % next(self._runs)
+        for name, prefix, suffix in (
+                ("OUTPUT_REVERT_FILE", "revert.", ""),
+                ("OUTPUT_JOURNAL_FILE", "journal.", ""),
+                ("OUTPUT_REPORT_FILE", "report.", ".json"),
+                ("OUTPUT_PLAN_FILE", "plan.", ".json"),
+                ("OUTPUT_PLAN_TEXT", "plan.", ".txt")):
+            self._monkeypatch.setattr(mdsac,name,prefix + timestamp + suffix)
+        self._monkeypatch.setattr(mdsac,"TIMESTAMP",timestamp)
+        self._monkeypatch.setattr(mdsac,"answers",MdsAnswers())
+        output_dir = os.path.join(self.directory,output_dir)
+        os.makedirs(output_dir,exist_ok=True)
+        try:
+            mdsac.main(["mdsac.py","-o",self.oci_cfg_file,"-d",output_dir] + list(args))
+        except SystemExit as e:
+            return e.code
+        finally:
+            # As at exit, the session logs are brought up to date
+            tio.writer.flush()
+        return 0
+
+    def output(self, fname, output_dir="out"):
+        return os.path.join(self.directory,output_dir,fname)
+
+    def db(self, ocid):
+        return self.sim._db_systems[ocid]
+
+    def dbs(self, display_name=None):
+        return [db for db in self.sim._db_systems.values()
+                if db.lifecycle_state != "DELETED" and (display_name is None or db.display_name == display_name)]
+
+
+@pytest.fixture
+def sim(monkeypatch, tmp_path):
+    sim = MdsSimulator(latencies=LATENCIES)
+    monkeypatch.setattr(mdsac,"clients",MdsClientFactory())
+    sim.install(mdsac.clients)
+    monkeypatch.setattr(mdsac,"catalog",MdsCatalogCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(mdsac,"history",MdsDurationHistory(str(tmp_path / "cache")))
+    monkeypatch.setattr(mdsac,"poller",MdsPollCoordinator(interval=0.05,window=0.01))
+    monkeypatch.setattr(mdsac,"rate_limiter",MdsTokenBucket(1000,1000))
+    monkeypatch.setattr(mdsac,"retry_policy",MdsRetryPolicy(first_delay=0.01,max_delay=0.1))
+    monkeypatch.setattr(mdsac,"MdsWaiter",FastWaiter)
+    monkeypatch.setattr(Tio,"input",refuse_input)
+    monkeypatch.setattr(signal,"signal",lambda signum, handler: None)
+    os.makedirs(str(tmp_path / "cache"),exist_ok=True)
+    return sim
+
+
+@pytest.fixture
+def mds(sim, monkeypatch, tmp_path):
+    return MdsacRunner(sim,str(tmp_path),monkeypatch)
@@ -0,0 +1,421 @@
+import json
+import os
+
+import mdsac
+from conftest import TARGET_SHAPE
+
+# End to end runs of mdsac actions against the simulator (see conftest.py)
+
+
+def revert_doc(mds, name="revert.run1"):
+    with open(mds.output(name),"r") as f:
+        return json.load(f)
+
+
+def journal_steps(mds, name="journal.run1"):
+    return mdsac.MdsJournal(mds.output(name)).completed_steps()
+
+
+def test_resize_in_place(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 0
+
+    db = mds.db(dbid)
+    assert db.shape_name == TARGET_SHAPE
+    assert db.lifecycle_state == "ACTIVE"
+    assert mds.sim.calls.get("delete_db_system",0) == 0
+    assert mds.sim.calls.get("create_db_system",0) == 0
+    rvt = revert_doc(mds)
+    assert rvt["metadata"]["to"]["id"] == dbid
+    assert rvt["metadata"]["from"]["shape_name"] == "MySQL.VM.Standard.E3.1.8GB"
+    assert journal_steps(mds) == ["backup", "revert_file", "update", "revert_metadata"]
+
+
+def test_refused_in_place_change_rebuilds_from_the_prior_backup(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    address = mds.db(dbid).ip_address
+    mds.sim.fail("update_db_system",400,code="InvalidParameter",message="The database cannot be moved to shape %s in place." % TARGET_SHAPE)
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 0
+
+    assert mds.db(dbid).lifecycle_state == "DELETED"
+    [db] = mds.dbs("db-000")
+    assert db.id != dbid
+    assert db.shape_name == TARGET_SHAPE
+    assert db.ip_address == address
+    backups = sorted(mds.sim._backups.values(),key=lambda b: b.id)
+    assert [b.backup_type for b in backups] == ["FULL", "INCREMENTAL"]
+    # The revert file written before the in-place attempt is kept
+    assert revert_doc(mds)["backup"]["id"] == backups[0].id
+    assert "rebuild_revert_file" not in journal_steps(mds)
+
+
+def test_in_place_conflict_never_rebuilds(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    mds.sim.fail("update_db_system",409,code="Conflict")
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 1
+
+    db = mds.db(dbid)
+    assert db.lifecycle_state == "ACTIVE"
+    assert db.shape_name == "MySQL.VM.Standard.E3.1.8GB"
+    assert mds.sim.calls.get("stop_db_system",0) == 0
+    assert mds.sim.calls.get("delete_db_system",0) == 0
+
+
+def test_failed_in_place_change_is_an_error(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    mds.sim.fail_lifecycle("update")
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 1
+
+    assert mds.db(dbid).lifecycle_state == "ACTIVE"
+    assert mds.sim.calls.get("delete_db_system",0) == 0
+    with open(mds.output("session.log"),"r") as f:
+        assert "In-place update ended in state FAILED." in f.read()
+
+
+def test_resize_rebuilds_by_default(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    assert mds.run("-a","RESIZE","-D",dbid,"-Y",mds.answers(shape_name=TARGET_SHAPE)) == 0
+
+    assert mds.db(dbid).lifecycle_state == "DELETED"
+    [db] = mds.dbs("db-000")
+    assert db.shape_name == TARGET_SHAPE
+    assert mds.sim.calls.get("update_db_system",0) == 0
+    assert journal_steps(mds)[:3] == ["shutdown", "rebuild_backup", "rebuild_revert_file"]
+
+
+def test_invalid_in_place_request_never_rebuilds(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    mds.sim.fail("update_db_system",400,code="InvalidParameter",message="Invalid configurationId.")
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 1
+
+    db = mds.db(dbid)
+    assert db.lifecycle_state == "ACTIVE"
+    assert db.shape_name == "MySQL.VM.Standard.E3.1.8GB"
+    assert mds.sim.calls.get("stop_db_system",0) == 0
+    assert mds.sim.calls.get("delete_db_system",0) == 0
+
+
+def test_a_configuration_for_another_shape_changes_nothing(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    manifest = os.path.join(mds.directory,"manifest.json")
+    with open(manifest,"w") as f:
+        json.dump({"databases": [{"db_ocid": dbid, "shape_name": TARGET_SHAPE,
+            "configuration_id": mds.db(dbid).configuration_id}]},f)
+    assert mds.run("-a","BATCH","-F",manifest,"-Y",mds.answers()) == 1
+
+    db = mds.db(dbid)
+    assert db.lifecycle_state == "ACTIVE"
+    assert db.shape_name == "MySQL.VM.Standard.E3.1.8GB"
+    assert mds.sim.calls.get("stop_db_system",0) == 0
+    assert mds.sim.calls.get("create_backup",0) == 0
+    with open(mds.output(os.path.join(dbid,"session.log")),"r") as f:
+        assert "not %s." % TARGET_SHAPE in f.read()
+
+
+def test_rebuild_resumes_and_reverts(mds, monkeypatch):
+    dbid = mds.sim.seed(databases=1)[0]
+    delete_db = mdsac.delete_db
+
+    async def interrupted(*args, **kwargs):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(mdsac,"delete_db",interrupted)
+    answers = mds.answers(shape_name=TARGET_SHAPE)
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","REBUILD","-Y",answers) == 1
+    assert journal_steps(mds) == ["shutdown", "rebuild_backup", "rebuild_revert_file"]
+
+    monkeypatch.setattr(mdsac,"delete_db",delete_db)
+    assert mds.run("-a","RESUME","-J",mds.output("journal.run1"),"-Y",answers) == 0
+    [resized] = mds.dbs("db-000")
+    assert resized.shape_name == TARGET_SHAPE
+    assert mds.sim.calls.get("create_backup") == 1
+    assert mds.sim.calls.get("create_db_system") == 1
+
+    assert mds.run("-a","REVERT","-D",resized.id,"-Y",answers) == 0
+    [reverted] = mds.dbs("db-000")
+    assert reverted.id != resized.id
+    assert reverted.shape_name == "MySQL.VM.Standard.E3.1.8GB"
+
+
+def test_plan_changes_nothing(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","--plan","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 0
+
+    with open(mds.output("plan.run1.json"),"r") as f:
+        plan = json.load(f)
+    steps = [step["step"] for step in plan["steps"]]
+    assert steps[:3] == ["backup", "revert_file", "update"]
+    assert plan["databases_deleted"] == 0
+    assert mds.db(dbid).shape_name == "MySQL.VM.Standard.E3.1.8GB"
+    assert not os.path.exists(mds.output("journal.run1"))
+    assert mds.sim.calls.get("create_backup",0) == 0
+
+
+def test_bluegreen_keeps_the_original_for_a_swap_back(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    address = mds.db(dbid).ip_address
+    # The highest address is taken by an endpoint the subnet does not list
+    mds.sim.reserve_address("10.0.255.254")
+    answers = mds.answers(shape_name=TARGET_SHAPE)
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","BLUEGREEN","--replicate","--keep-original","-Y",answers) == 0
+
+    original = mds.db(dbid)
+    assert original.display_name == "db-000-original"
+    assert original.ip_address == "10.0.255.253"
+    assert original.database_mode == "READ_ONLY"
+    [resized] = mds.dbs("db-000")
+    assert resized.ip_address == address
+    assert resized.shape_name == TARGET_SHAPE
+    assert resized.database_mode == "READ_WRITE"
+    assert revert_doc(mds)["metadata"]["original"]["id"] == dbid
+
+    assert mds.run("-a","REVERT","-N","db-000","-Y",answers) == 0
+    restored = mds.db(dbid)
+    assert restored.display_name == "db-000"
+    assert restored.ip_address == address
+    assert restored.database_mode == "READ_WRITE"
+    assert mds.db(resized.id).lifecycle_state == "DELETED"
+
+
+def test_bluegreen_always_replicates(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    address = mds.db(dbid).ip_address
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","BLUEGREEN","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 0
+
+    # The original stays writable through the backup and restore
+    steps = journal_steps(mds)
+    assert steps.index("read_only") > steps.index("channel") > steps.index("create")
+    assert mds.sim.calls["create_channel"] == 1
+    assert mds.db(dbid).lifecycle_state == "DELETED"
+    [resized] = mds.dbs("db-000")
+    assert resized.ip_address == address
+    assert resized.shape_name == TARGET_SHAPE
+
+
+def test_bluegreen_cutover_needs_a_fresh_channel_status(mds, monkeypatch):
+    dbid = mds.sim.seed(databases=1)[0]
+    address = mds.db(dbid).ip_address
+    monkeypatch.setattr(mdsac,"CHANNEL_STATUS_DEADLINE",1)
+    # Every status read predates the cutover, yet claims the copy caught up
+    mds.sim.stale_channels()
+    answers = mds.answers(shape_name=TARGET_SHAPE)
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","BLUEGREEN","--replicate","-Y",answers) == 1
+
+    original = mds.db(dbid)
+    assert original.ip_address == address
+    assert original.database_mode == "READ_WRITE"
+    assert "catch_up" not in journal_steps(mds)
+
+    mds.sim.stale_channels(False)
+    assert mds.run("-a","RESUME","-J",mds.output("journal.run1"),"-Y",answers) == 0
+    assert mds.db(dbid).lifecycle_state == "DELETED"
+    [resized] = mds.dbs("db-000")
+    assert resized.ip_address == address
+    assert resized.shape_name == TARGET_SHAPE
+
+
+def test_batch_confirmation_lists_every_database(mds):
+    dbids = mds.sim.seed(databases=2)
+    manifest = os.path.join(mds.directory,"manifest.json")
+    with open(manifest,"w") as f:
+        json.dump({"databases": [
+            {"db_ocid": dbids[0], "shape_name": TARGET_SHAPE},
+            {"db_ocid": dbids[1], "action": "LOCAL_COPY", "copy_source": "LATEST"}]},f)
+    assert mds.run("-a","BATCH","-F",manifest,"-Y",mds.answers(confirm=False)) == 0
+
+    with open(mds.output("session.log"),"r") as f:
+        log = f.read()
+    assert "1. RESIZE %s" % dbids[0] in log
+    assert "2. LOCAL_COPY %s" % dbids[1] in log
+    assert "Up to 1 of these database services may be DELETED and recreated." in log
+    assert mds.sim.calls.get("create_backup",0) == 0
+
+
+
+def test_batch_runs_every_database(mds):
+    dbids = mds.sim.seed(databases=2)
+    manifest = os.path.join(mds.directory,"manifest.json")
+    with open(manifest,"w") as f:
+        json.dump({"databases": [
+            {"db_ocid": dbids[0], "shape_name": TARGET_SHAPE, "resize_method": "INPLACE"},
+            {"db_ocid": dbids[1], "action": "LOCAL_COPY", "display_name": "db-001-copy"}]},f)
+    assert mds.run("-a","BATCH","-F",manifest,"-Y",mds.answers()) == 0
+
+    assert mds.db(dbids[0]).shape_name == TARGET_SHAPE
+    [copy] = mds.dbs("db-001-copy")
+    assert copy.shape_name == mds.db(dbids[1]).shape_name
+    assert mds.db(dbids[1]).lifecycle_state == "ACTIVE"
+    with open(mds.output("report.run1.json"),"r") as f:
+        report = json.load(f)
+    assert report["success"]
+    assert report["calls"]["create_backup"]["count"] == 2
+    # Each database has its own session log and run report
+    for dbid in dbids:
+        assert os.path.isfile(mds.output(os.path.join(dbid,"session.log")))
+        with open(mds.output(os.path.join(dbid,"report.run1.json")),"r") as f:
+            assert json.load(f)["success"]
+
+
+def test_catalogs_are_cached_between_runs(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    answers = mds.answers(shape_name=TARGET_SHAPE)
+    assert mds.run("-a","RESIZE","-D",dbid,"--plan","-Y",answers) == 0
+    calls = mds.sim.calls
+    assert calls["list_shapes"] == 1
+    assert mds.run("-a","RESIZE","-D",dbid,"--plan","-Y",answers) == 0
+    assert mds.sim.calls["list_shapes"] == 1
+    assert mds.sim.calls.get("list_configurations") == calls.get("list_configurations")
+
+
+def test_identical_custom_configurations_are_reused(mds):
+    dbids = mds.sim.seed(databases=2)
+    answers = mds.answers(shape_name=TARGET_SHAPE,configuration={"max_connections": 1500})
+    for dbid in dbids:
+        assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",answers) == 0
+
+    assert mds.sim.calls["create_configuration"] == 1
+    first, second = [mds.db(dbid) for dbid in dbids]
+    assert first.configuration_id == second.configuration_id
+    config = mds.sim._configurations[first.configuration_id]
+    assert config.type == "CUSTOM"
+    assert config.variables.max_connections == 1500
+
+
+def test_a_cold_copy_restarts_the_source_before_the_copy_is_created(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    assert mds.run("-a","LOCAL_COPY","-D",dbid,"-B","COLD","-N","db-000-copy","-Y",mds.answers()) == 0
+
+    [copy] = mds.dbs("db-000-copy")
+    assert mds.db(dbid).lifecycle_state == "ACTIVE"
+    transitions = [(t["operation"], t["resource_id"]) for t in mds.sim.transitions]
+    assert transitions.index(("start",dbid)) < transitions.index(("create",copy.id))
+
+
+def test_an_online_copy_leaves_the_source_running(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    assert mds.run("-a","LOCAL_COPY","-D",dbid,"-N","db-000-copy","-Y",mds.answers()) == 0
+
+    [copy] = mds.dbs("db-000-copy")
+    assert copy.lifecycle_state == "ACTIVE"
+    assert copy.shape_name == mds.db(dbid).shape_name
+    assert mds.db(dbid).lifecycle_state == "ACTIVE"
+    assert mds.sim.calls.get("stop_db_system",0) == 0
+    [backup] = mds.sim._backups.values()
+    assert backup.db_system_id == dbid
+
+
+def test_a_run_report_records_phases_and_calls(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    mds.sim.fail("get_db_system",503,code="ServiceUnavailable")
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",mds.answers(shape_name=TARGET_SHAPE),"-P",os.path.join(mds.directory,"mdsac.prom")) == 0
+
+    with open(mds.output("report.run1.json"),"r") as f:
+        report = json.load(f)
+    assert report["success"]
+    phases = [phase["name"] for phase in report["phases"]]
+    assert phases[0] == "information_gathering"
+    assert "backup" in phases and "update" in phases
+    assert all(phase["status"] == "ok" for phase in report["phases"])
+    assert report["calls"]["update_db_system"]["count"] == 1
+    assert report["calls"]["get_db_system"]["errors"] == 1
+    assert report["call_count"] == sum(mds.sim.calls.values())
+    with open(os.path.join(mds.directory,"mdsac.prom"),"r") as f:
+        assert 'mdsac_run_success{action="RESIZE"} 1.0' in f.read().splitlines()
+
+
+def clone_manifest(mds, clones, **doc):
+    fname = os.path.join(mds.directory,"clones.json")
+    with open(fname,"w") as f:
+        json.dump(dict(doc,clones=clones),f)
+    return fname
+
+
+def test_clone_fans_out_copies_from_one_backup(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    manifest = clone_manifest(mds,[
+        {"display_name": "test-1", "address": "10.0.200.21"},
+        {"display_name": "test-2"},
+        {"display_name": "test-3", "shape_name": TARGET_SHAPE}],
+        defaults={"shape_name": "MySQL.VM.Standard.E3.1.16GB"})
+    assert mds.run("-a","CLONE","-D",dbid,"-F",manifest,"-Y",mds.answers()) == 0
+
+    [backup] = mds.sim._backups.values()
+    assert backup.db_system_id == dbid
+    assert mds.sim.calls["create_db_system"] == 3
+    clones = dict((name, mds.dbs(name)[0]) for name in ("test-1", "test-2", "test-3"))
+    assert clones["test-1"].ip_address == "10.0.200.21"
+    assert clones["test-2"].shape_name == "MySQL.VM.Standard.E3.1.16GB"
+    assert clones["test-3"].shape_name == TARGET_SHAPE
+    assert mds.db(dbid).lifecycle_state == "ACTIVE"
+
+
+def test_a_resumed_clone_creates_only_the_missing_copies(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    manifest = clone_manifest(mds,[{"display_name": "test-1"}, {"display_name": "test-2", "address": "10.0.200.22"}])
+    # The second copy's address is taken until it is released
+    mds.sim.reserve_address("10.0.200.22")
+    assert mds.run("-a","CLONE","-D",dbid,"-F",manifest,"-Y",mds.answers()) == 1
+    assert len(mds.dbs("test-1")) == 1
+    assert mds.dbs("test-2") == list()
+
+    mds.sim._reserved.clear()
+    assert mds.run("-a","RESUME","-J",mds.output("journal.run1"),"-Y",mds.answers()) == 0
+    assert len(mds.dbs("test-1")) == 1
+    [second] = mds.dbs("test-2")
+    assert second.ip_address == "10.0.200.22"
+    assert len(mds.sim._backups) == 1
+
+
+def test_preflight_failures_stop_the_action_before_any_change(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    mds.sim.set_limit("vm-standard-e3-2-32gb-count",0)
+    mds.sim.set_limit("vm-standard-e3-2-32gb-ocpu-count",0)
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","REBUILD","-Y",mds.answers(shape_name=TARGET_SHAPE)) == 1
+
+    assert mds.db(dbid).lifecycle_state == "ACTIVE"
+    assert mds.sim.calls.get("stop_db_system",0) == 0
+    assert mds.sim.calls.get("create_backup",0) == 0
+    with open(mds.output("session.log"),"r") as f:
+        log = f.read()
+    assert "vm-standard-e3-2-32gb-count" in log
+    assert "vm-standard-e3-2-32gb-ocpu-count" not in log
+
+
+def test_bad_answers_stop_the_action_before_any_change(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    for answers in (
+            mds.answers("shape.json",shape_name="MySQL.VM.Standard.E9.1.8GB"),
+            mds.answers("configuration.json",shape_name=TARGET_SHAPE,configuration={"no_such_option": 1}),
+            mds.answers("password.json",shape_name=TARGET_SHAPE,password_file="missing")):
+        assert mds.run("-a","RESIZE","-D",dbid,"-Y",answers) == 1
+
+    assert mds.db(dbid).shape_name == "MySQL.VM.Standard.E3.1.8GB"
+    assert mds.sim.calls.get("create_backup",0) == 0
+    with open(mds.output("session.log"),"r") as f:
+        log = f.read()
+    assert "The answered shape, MySQL.VM.Standard.E9.1.8GB, is not available." in log
+    assert "Unknown configuration option no_such_option in answers file." in log
+    assert "Cannot read password file" in log
+
+
+def test_a_deleted_configuration_is_not_used_from_the_cache(mds):
+    dbid = mds.sim.seed(databases=1)[0]
+    answers = mds.answers(shape_name=TARGET_SHAPE)
+    assert mds.run("-a","RESIZE","-D",dbid,"--plan","-Y",answers) == 0
+    comp_id = mds.db(dbid).compartment_id
+    [stale] = [c for c in mds.sim._configurations.values() if c.display_name == TARGET_SHAPE + ".Standalone"]
+    stale.lifecycle_state = "DELETED"
+    fresh_id = mds.sim.add_configuration(comp_id,TARGET_SHAPE,TARGET_SHAPE + ".Standalone",stale.variables)
+
+    # The cached catalog still offers the deleted configuration, which the
+    # pre-flight checks find before anything is changed
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",answers) == 1
+    assert mds.sim.calls.get("create_backup",0) == 0
+    assert mds.sim.calls.get("update_db_system",0) == 0
+    with open(mds.output("session.log"),"r") as f:
+        assert "is DELETED, not ACTIVE." in f.read()
+
+    assert mds.run("-a","RESIZE","-D",dbid,"-M","INPLACE","-Y",answers) == 0
+    db = mds.db(dbid)
+    assert db.shape_name == TARGET_SHAPE
+    assert db.configuration_id == fresh_id
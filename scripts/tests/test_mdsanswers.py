@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from utils.mdsanswers import MdsAnswers
+from utils.mdsanswers import MdsAnswersError
+from utils.mdsanswers import read_secret
+
+PASSWORD = "Secret#pw1x"
+
+
+def answers_file(tmp_path, **doc):
+    fname = str(tmp_path / "answers.json")
+    with open(fname,"w") as f:
+        json.dump(doc,f)
+    return fname
+
+
+def password_file(tmp_path, mode=0o600):
+    fname = str(tmp_path / "pw")
+    with open(fname,"w") as f:
+        f.write(PASSWORD + "\n")
+    os.chmod(fname,mode)
+    return fname
+
+
+def test_inactive_until_loaded():
+    answers = MdsAnswers()
+    assert not answers.active
+    assert answers.confirm is False
+    assert answers.configuration == dict()
+
+
+def test_load_resolves_the_password_file_beside_the_answers(tmp_path, monkeypatch):
+    password_file(tmp_path)
+    monkeypatch.chdir("/")
+    fname = answers_file(tmp_path,shape_name="MySQL.VM.Standard.E3.2.32GB",username="admin",password_file="pw",confirm=True,configuration={"max_connections": 1500})
+    answers = MdsAnswers()
+    answers.load(fname)
+    assert answers.active
+    assert answers.fname == fname
+    assert answers.shape_name == "MySQL.VM.Standard.E3.2.32GB"
+    assert answers.confirm is True
+    assert answers.resize_copy is False
+    assert answers.configuration == {"max_connections": 1500}
+    creds = answers.credentials()
+    assert creds.get_username() == "admin"
+    assert creds.get_password() == PASSWORD
+
+
+def test_the_password_can_come_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("MDSAC_PW",PASSWORD)
+    answers = MdsAnswers()
+    answers.load(answers_file(tmp_path,username="admin",password_env="MDSAC_PW"))
+    assert answers.credentials().get_password() == PASSWORD
+
+
+@pytest.mark.parametrize("doc, message", [
+    ({"colour": "blue"}, "Unknown answers: colour."),
+    ({"shape_name": 3}, "The shape_name answer must be a string."),
+    ({"confirm": "yes"}, "The confirm answer must be true or false."),
+    ({"configuration": ["max_connections"]}, "The configuration answer must be an object."),
+    ({"password_file": "pw", "password_env": "PW"}, "Only one of password_file and password_env can be given."),
+    ({"username": "admin"}, "neither a password_file nor a password_env"),
+    ({"username": "admin", "password_env": "MDSAC_UNSET_PW"}, "Environment variable MDSAC_UNSET_PW is not set."),
+])
+def test_invalid_answers_are_rejected(tmp_path, monkeypatch, doc, message):
+    monkeypatch.delenv("MDSAC_UNSET_PW",raising=False)
+    answers = MdsAnswers()
+    with pytest.raises(MdsAnswersError,match=message):
+        answers.load(answers_file(tmp_path,**doc))
+    assert not answers.active
+
+
+def test_a_weak_password_is_rejected_on_load(tmp_path, monkeypatch):
+    monkeypatch.setenv("MDSAC_PW","password")
+    with pytest.raises(MdsAnswersError,match="Invalid credentials"):
+        MdsAnswers().load(answers_file(tmp_path,username="admin",password_env="MDSAC_PW"))
+
+
+def test_an_unreadable_answers_file_is_reported(tmp_path):
+    fname = tmp_path / "answers.json"
+    fname.write_text("[1, 2]")
+    with pytest.raises(MdsAnswersError,match="must hold an object"):
+        MdsAnswers().load(str(fname))
+    fname.write_text("{")
+    with pytest.raises(MdsAnswersError,match="Cannot read answers file"):
+        MdsAnswers().load(str(fname))
+
+
+@pytest.mark.skipif(os.name != "posix",reason="file modes are only checked on POSIX")
+def test_a_password_file_others_can_read_is_rejected(tmp_path):
+    fname = password_file(tmp_path,mode=0o644)
+    with pytest.raises(MdsAnswersError,match="must not be accessible by group or others"):
+        read_secret(fname)
+    os.chmod(fname,0o600)
+    assert read_secret(fname) == PASSWORD
@@ -0,0 +1,61 @@
+import os
+import time
+
+from utils.mdscache import MdsCatalogCache
+from utils.mdscache import default_cache_dir
+
+
+def test_default_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME",str(tmp_path))
+    assert default_cache_dir() == os.path.join(str(tmp_path),"mdsac")
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    assert default_cache_dir() == os.path.join(os.path.expanduser("~"),".cache","mdsac")
+
+
+def test_entries_round_trip_until_they_expire(tmp_path):
+    cache = MdsCatalogCache(str(tmp_path))
+    key = ["region", "compartment", "shapes"]
+    assert cache.get(key) is None
+    cache.put(key,[{"name": "MySQL.VM.Standard.E3.1.8GB"}])
+    assert cache.get(key) == [{"name": "MySQL.VM.Standard.E3.1.8GB"}]
+    # Another run shares the entries
+    assert MdsCatalogCache(str(tmp_path)).get(key) == [{"name": "MySQL.VM.Standard.E3.1.8GB"}]
+    assert [fname for fname in os.listdir(cache.cache_dir) if not fname.endswith(".json")] == list()
+
+    cache.ttl = 0.05
+    time.sleep(0.1)
+    assert cache.get(key) is None
+
+
+def test_invalidate(tmp_path):
+    cache = MdsCatalogCache(str(tmp_path))
+    cache.put("shapes",[1])
+    cache.put("configurations",[2])
+    cache.invalidate("shapes")
+    assert cache.get("shapes") is None
+    assert cache.get("configurations") == [2]
+    cache.invalidate("shapes")
+    cache.invalidate()
+    assert cache.get("configurations") is None
+
+
+def test_a_disabled_or_corrupt_cache_misses(tmp_path):
+    cache = MdsCatalogCache(str(tmp_path))
+    cache.put("shapes",[1])
+    cache.enabled = False
+    assert cache.get("shapes") is None
+    cache.put("configurations",[2])
+    cache.enabled = True
+    assert cache.get("configurations") is None
+    for fname in os.listdir(cache.cache_dir):
+        with open(os.path.join(cache.cache_dir,fname),"w") as f:
+            f.write("{")
+    assert cache.get("shapes") is None
+
+
+def test_an_unwritable_cache_is_ignored(tmp_path):
+    blocker = tmp_path / "blocked"
+    blocker.write_text("")
+    cache = MdsCatalogCache(str(blocker))
+    cache.put("shapes",[1])
+    assert cache.get("shapes") is None
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from utils.mdsclients import MdsClientFactory
+
+CONFIG = {"region": "sim-region-1", "tenancy": "ocid1.tenancy.oc1..simulated"}
+
+
+class FakeClient(object):
+    def __init__(self, oci_cfg, **kwargs):
+        self.oci_cfg = oci_cfg
+        self.kwargs = kwargs
+
+
+class OtherClient(FakeClient):
+    pass
+
+
+def test_clients_are_built_once_per_class_and_config():
+    built = list()
+
+    def builder(client_class, oci_cfg):
+        built.append(client_class)
+        return client_class(oci_cfg)
+
+    factory = MdsClientFactory(builder)
+    client = factory.get(FakeClient,CONFIG)
+    assert factory.get(FakeClient,dict(CONFIG)) is client
+    assert factory.get(OtherClient,CONFIG) is not client
+    assert factory.get(FakeClient,dict(CONFIG,region="sim-region-2")) is not client
+    assert built == [FakeClient, OtherClient, FakeClient]
+    assert len(factory) == 3
+
+    factory.clear()
+    assert len(factory) == 0
+    assert factory.get(FakeClient,CONFIG) is not client
+
+
+def test_the_default_builder_is_the_client_class():
+    client = MdsClientFactory().get(FakeClient,CONFIG)
+    assert isinstance(client,FakeClient)
+    assert client.oci_cfg == CONFIG
+
+
+def test_concurrent_lookups_share_one_client():
+    def slow_builder(client_class, oci_cfg):
+        time.sleep(0.01)
+        return client_class(oci_cfg)
+
+    factory = MdsClientFactory(slow_builder)
+    clients = list()
+    threads = [threading.Thread(target=lambda: clients.append(factory.get(FakeClient,CONFIG))) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(id(client) for client in clients)) == 1
+    assert len(factory) == 1
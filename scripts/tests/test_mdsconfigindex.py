@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from utils.mdsconfigindex import MdsConfigIndex
+
+
+def config(cfg_id, shape_name, cfg_type, display_name, digest=None):
+    tags = {"mdsac-hash": digest} if digest is not None else None
+    return SimpleNamespace(id=cfg_id,shape_name=shape_name,type=cfg_type,display_name=display_name,freeform_tags=tags)
+
+
+CONFIGS = [
+    config("c1","MySQL.VM.Standard.E3.1.8GB",MdsConfigIndex.DEFAULT,"MySQL.VM.Standard.E3.1.8GB.HA"),
+    config("c2","MySQL.VM.Standard.E3.1.8GB",MdsConfigIndex.DEFAULT,"MySQL.VM.Standard.E3.1.8GB.Standalone"),
+    config("c3","MySQL.VM.Standard.E3.1.8GB",MdsConfigIndex.CUSTOM,"orders-config","abc"),
+    config("c4","MySQL.VM.Standard.E3.2.32GB",MdsConfigIndex.CUSTOM,"orders-config","abc"),
+    config("c5","MySQL.VM.Standard.E3.2.32GB",MdsConfigIndex.DEFAULT,"MySQL.VM.Standard.E3.2.32GB"),
+    config("c6","MySQL.VM.Standard.E3.2.32GB",MdsConfigIndex.DEFAULT,"untagged",None)]
+
+
+def test_lookups():
+    index = MdsConfigIndex(CONFIGS,hash_tag="mdsac-hash")
+    assert len(index) == 6
+    assert index.by_id("c3").display_name == "orders-config"
+    assert index.by_id("missing") is None
+    assert index.by_name("orders-config").id == "c3"
+    assert index.by_name("orders-config","MySQL.VM.Standard.E3.2.32GB").id == "c4"
+    assert index.by_name("orders-config","MySQL.VM.Standard.E4.1.16GB") is None
+    assert index.by_hash("MySQL.VM.Standard.E3.2.32GB","abc").id == "c4"
+    assert index.by_hash("MySQL.VM.Standard.E3.2.32GB","def") is None
+    assert [cfg.id for cfg in index.customs("MySQL.VM.Standard.E3.1.8GB")] == ["c3"]
+    assert index.customs("MySQL.VM.Standard.E4.1.16GB") == list()
+
+
+def test_default_for_prefers_the_matching_availability():
+    index = MdsConfigIndex(CONFIGS)
+    assert index.default_for("MySQL.VM.Standard.E3.1.8GB").id == "c2"
+    assert index.default_for("MySQL.VM.Standard.E3.1.8GB",highly_available=True).id == "c1"
+    # Without a match the first default is used
+    assert index.default_for("MySQL.VM.Standard.E3.2.32GB",highly_available=True).id == "c5"
+    assert index.default_for("MySQL.VM.Standard.E4.1.16GB") is None
+    # Hashes are only indexed when the tag is named
+    assert index.by_hash("MySQL.VM.Standard.E3.2.32GB","abc") is None
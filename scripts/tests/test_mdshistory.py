@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from utils.mdshistory import MdsDurationHistory
+
+
+def test_no_history_no_estimate(tmp_path):
+    history = MdsDurationHistory(str(tmp_path))
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",50) is None
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",None) is None
+
+
+def test_the_same_shape_and_storage_give_the_median(tmp_path):
+    history = MdsDurationHistory(str(tmp_path))
+    for seconds in (100, 300, 200):
+        history.record("backup","MySQL.VM.Standard.E3.1.8GB",50,seconds)
+    history.record("create","MySQL.VM.Standard.E3.1.8GB",50,900)
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",50) == 200
+    assert os.path.isfile(history.path)
+    # Another run reads the same history
+    assert MdsDurationHistory(str(tmp_path)).estimate("create","MySQL.VM.Standard.E3.1.8GB",50) == 900
+
+
+def test_other_sizes_are_scaled_by_storage(tmp_path):
+    history = MdsDurationHistory(str(tmp_path))
+    history.record("backup","MySQL.VM.Standard.E3.1.8GB",50,100)
+    history.record("backup","MySQL.VM.Standard.E3.1.8GB",100,300)
+    history.record("backup","MySQL.VM.Standard.E3.2.32GB",100,1000)
+    # The median of 2s/GB and 3s/GB on the same shape
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",200) == pytest.approx(500)
+    # Failing that, every shape of the operation
+    assert history.estimate("backup","MySQL.VM.Standard.E3.4.64GB",10) == pytest.approx(30)
+
+
+def test_only_recent_samples_count(tmp_path):
+    history = MdsDurationHistory(str(tmp_path))
+    for n in range(MdsDurationHistory.MAX_SAMPLES):
+        history.record("delete","MySQL.VM.Standard.E3.1.8GB",50,10)
+    for n in range(MdsDurationHistory.MAX_SAMPLES):
+        history.record("delete","MySQL.VM.Standard.E3.1.8GB",50,60)
+    assert history.estimate("delete","MySQL.VM.Standard.E3.1.8GB",50) == 60
+
+
+def test_incomplete_samples_are_not_recorded(tmp_path):
+    history = MdsDurationHistory(str(tmp_path))
+    history.record("backup",None,50,100)
+    history.record("backup","MySQL.VM.Standard.E3.1.8GB",0,100)
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",50) is None
+
+
+def test_a_disabled_or_unusable_history_never_raises(tmp_path):
+    history = MdsDurationHistory(str(tmp_path))
+    history.enabled = False
+    history.record("backup","MySQL.VM.Standard.E3.1.8GB",50,100)
+    history.enabled = True
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",50) is None
+
+    blocker = tmp_path / "blocked"
+    blocker.write_text("")
+    history = MdsDurationHistory(str(blocker))
+    history.record("backup","MySQL.VM.Standard.E3.1.8GB",50,100)
+    assert history.estimate("backup","MySQL.VM.Standard.E3.1.8GB",50) is None
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.mdsimport import lazy_import
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# As in mdsbench.py, the modules that help must not load
+DEFERRED_MODULES = ("asyncio", "concurrent.futures", "oci", "sqlite3")
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    # A package whose modules record when they are executed
+    root = tmp_path / "lazypkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "heavy.py").write_text("import lazypkg\nlazypkg.loaded = True\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazypkg"
+    for name in ("lazypkg.heavy", "lazypkg"):
+        sys.modules.pop(name,None)
+
+
+def test_a_module_runs_on_first_use(package):
+    import lazypkg
+    heavy = lazy_import("lazypkg.heavy")
+    assert not getattr(lazypkg,"loaded",False)
+    # Bound to its package as an import would
+    assert lazypkg.heavy is heavy
+    assert heavy.VALUE == 42
+    assert lazypkg.loaded
+
+
+def test_an_imported_module_is_returned_as_is():
+    assert lazy_import("os") is os
+
+
+def test_a_missing_module_fails_at_once():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("mdsac_no_such_module")
+
+
+def test_help_loads_no_deferred_module():
+    stderr = subprocess.run([sys.executable,"-X","importtime",os.path.join(SCRIPTS_DIR,"mdsac.py"),"-h"],
+            stdout=subprocess.DEVNULL,stderr=subprocess.PIPE,text=True).stderr
+    imported = set(line.split("|")[-1].strip() for line in stderr.splitlines() if line.startswith("import time:"))
+    assert "utils.mdsimport" in imported
+    assert [m for m in DEFERRED_MODULES if any(i == m or i.startswith(m + ".") for i in imported)] == list()
@@ -0,0 +1,47 @@
+import pytest
+
+from utils.mdsjournal import MdsJournal
+from utils.mdsjournal import MdsJournalError
+
+
+def test_a_new_journal_needs_a_header(tmp_path):
+    with pytest.raises(MdsJournalError):
+        MdsJournal(str(tmp_path / "journal"))
+
+
+def test_steps_replay_from_disk(tmp_path):
+    fname = str(tmp_path / "journal")
+    journal = MdsJournal(fname,header={"action": "RESIZE"})
+    journal.started("backup",work_request="wr1")
+    journal.done("backup",backup_id="b1")
+    journal.started("create",db_id="db2")
+
+    replayed = MdsJournal(fname)
+    assert replayed.header == {"action": "RESIZE"}
+    assert replayed.is_done("backup")
+    # done() records merge with what started() recorded
+    assert replayed.data("backup") == {"work_request": "wr1", "backup_id": "b1"}
+    assert replayed.status("create") == MdsJournal.STARTED
+    assert replayed.data("create") == {"db_id": "db2"}
+    assert replayed.status("delete") is None
+    assert replayed.data("delete") == dict()
+    assert replayed.completed_steps() == ["backup"]
+
+
+def test_a_partial_last_record_is_ignored(tmp_path):
+    fname = str(tmp_path / "journal")
+    journal = MdsJournal(fname,header={"action": "REBUILD"})
+    journal.started("shutdown")
+    with open(fname,"a") as f:
+        f.write('{"step": "shutdown", "status": "do')
+
+    replayed = MdsJournal(fname)
+    assert replayed.status("shutdown") == MdsJournal.STARTED
+    assert not replayed.is_done("shutdown")
+
+
+def test_a_journal_without_a_header_is_rejected(tmp_path):
+    fname = tmp_path / "journal"
+    fname.write_text('{"step": "backup", "status": "done", "data": {}}\n')
+    with pytest.raises(MdsJournalError):
+        MdsJournal(str(fname))
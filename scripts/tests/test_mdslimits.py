@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from utils.mdslimits import MdsCompartmentLimiter
+from utils.mdslimits import MdsSharedTokenBucket
+from utils.mdslimits import MdsTokenBucket
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        MdsTokenBucket(0)
+    with pytest.raises(ValueError):
+        MdsTokenBucket(10,capacity=0.5)
+    with pytest.raises(ValueError):
+        MdsCompartmentLimiter(0)
+
+
+def test_reservations_queue_once_the_burst_is_spent():
+    bucket = MdsTokenBucket(10,capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # Each later reservation waits a further 1/rate seconds
+    assert bucket.reserve() == pytest.approx(0.1,abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2,abs=0.01)
+
+
+def test_acquire_paces_calls():
+    bucket = MdsTokenBucket(50,capacity=1)
+
+    async def acquire_all():
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for n in range(6)])
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_all()) == pytest.approx(0.1,abs=0.05)
+
+
+def test_compartment_limiter_bounds_each_compartment():
+    limiter = MdsCompartmentLimiter(2)
+    running = {"c1": 0, "c2": 0}
+    peak = {"c1": 0, "c2": 0}
+
+    async def operation(comp_id):
+        async with limiter.semaphore(comp_id):
+            running[comp_id] += 1
+            peak[comp_id] = max(peak[comp_id],running[comp_id])
+            await asyncio.sleep(0.01)
+            running[comp_id] -= 1
+
+    async def run():
+        await asyncio.gather(*[operation(comp_id) for comp_id in ["c1"] * 5 + ["c2"] * 3])
+
+    asyncio.run(run())
+    assert peak == {"c1": 2, "c2": 2}
+    assert limiter.limit == 2
+
+
+def test_shared_buckets_draw_on_the_same_tokens(tmp_path):
+    first = MdsSharedTokenBucket(10,capacity=2,cache_dir=str(tmp_path))
+    second = MdsSharedTokenBucket(10,capacity=2,cache_dir=str(tmp_path))
+    assert first.reserve() == 0.0
+    assert second.reserve() == 0.0
+    assert first.reserve() == pytest.approx(0.1,abs=0.02)
+    assert second.reserve() == pytest.approx(0.2,abs=0.02)
+    assert first.shared and second.shared
+    assert os.path.isfile(first.path)
+
+
+def reserve_in_process(cache_dir, count, delays):
+    bucket = MdsSharedTokenBucket(100,capacity=1,cache_dir=cache_dir)
+    delays.extend([bucket.reserve() for n in range(count)])
+
+
+def test_processes_share_the_rate(tmp_path):
+    # Two processes taking 20 tokens each from a bucket of 100 per second
+    # between them queue behind one another for about 0.4s in all
+    with multiprocessing.Manager() as manager:
+        delays = manager.list()
+        processes = [multiprocessing.Process(target=reserve_in_process,args=(str(tmp_path),20,delays)) for n in range(2)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert len(delays) == 40
+        assert max(delays) > 0.25
+
+
+def test_an_unusable_database_paces_the_process_alone(tmp_path):
+    blocker = tmp_path / "blocked"
+    blocker.write_text("")
+    bucket = MdsSharedTokenBucket(10,capacity=1,cache_dir=str(blocker))
+    assert bucket.reserve() == 0.0
+    assert not bucket.shared
+    assert bucket.reserve() == pytest.approx(0.1,abs=0.01)
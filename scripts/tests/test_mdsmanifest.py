@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from utils.mdsargs import Mdsargs
+from utils.mdsmanifest import MdsCloneManifest
+from utils.mdsmanifest import MdsManifest
+from utils.mdsmanifest import MdsManifestError
+
+
+def manifest_file(tmp_path, doc):
+    fname = str(tmp_path / "manifest.json")
+    with open(fname,"w") as f:
+        json.dump(doc,f)
+    return fname
+
+
+def test_defaults_apply_to_every_database(tmp_path):
+    manifest = MdsManifest(manifest_file(tmp_path,{
+        "max_workers": 8,
+        "defaults": {"shape_name": "MySQL.VM.Standard.E3.2.32GB"},
+        "databases": [
+            {"db_ocid": "db1"},
+            {"db_ocid": "db2", "action": "LOCAL_COPY", "display_name": "test", "copy_source": "LATEST"}]}))
+    assert manifest.max_workers == 8
+    assert manifest.max_per_compartment == MdsManifest.DEFAULT_MAX_PER_COMPARTMENT
+    first, second = manifest.entries
+    assert (first.action, first.db_ocid, first.shape_name) == (Mdsargs.RESIZE, "db1", "MySQL.VM.Standard.E3.2.32GB")
+    assert first.copy_source == Mdsargs.ONLINE
+    assert (second.action, second.display_name, second.copy_source) == (Mdsargs.LOCAL_COPY, "test", Mdsargs.LATEST)
+    assert second.shape_name == "MySQL.VM.Standard.E3.2.32GB"
+
+
+@pytest.mark.parametrize("doc, message", [
+    ([], "must be a JSON object"),
+    ({"databases": []}, "at least one database"),
+    ({"max_workers": 0, "databases": [{"db_ocid": "db1", "shape_name": "s"}]}, "max_workers must be a positive integer"),
+    ({"max_per_compartment": True, "databases": [{"db_ocid": "db1", "shape_name": "s"}]}, "max_per_compartment must be a positive integer"),
+    ({"defaults": [], "databases": [{"db_ocid": "db1"}]}, "defaults must be an object"),
+    ({"databases": ["db1"]}, "must be an object"),
+    ({"databases": [{"shape_name": "s"}]}, "must have a db_ocid"),
+    ({"databases": [{"db_ocid": "db1"}]}, "A shape_name is required to resize db1"),
+    ({"databases": [{"db_ocid": "db1", "action": "REVERT"}]}, "Unsupported batch action, REVERT"),
+    ({"databases": [{"db_ocid": "db1", "shape_name": "s", "configuration_id": "c1", "configuration_name": "n"}]}, "not both"),
+    ({"databases": [{"db_ocid": "db1", "shape_name": "s", "resize_method": "FAST"}]}, "Unknown resize method, FAST"),
+    ({"databases": [{"db_ocid": "db1", "action": "LOCAL_COPY", "copy_source": "TAPE"}]}, "Unknown copy source, TAPE"),
+    ({"databases": [{"db_ocid": "db1", "shape_name": "s"}, {"db_ocid": "db1", "shape_name": "t"}]}, "listed more than once"),
+])
+def test_invalid_manifests_are_rejected(tmp_path, doc, message):
+    with pytest.raises(MdsManifestError,match=message):
+        MdsManifest(manifest_file(tmp_path,doc))
+
+
+def test_an_unreadable_manifest_is_reported(tmp_path):
+    with pytest.raises(MdsManifestError,match="Cannot read manifest"):
+        MdsManifest(str(tmp_path / "missing.json"))
+
+
+def test_clone_defaults_apply_to_every_clone(tmp_path):
+    manifest = MdsCloneManifest(manifest_file(tmp_path,{
+        "backup_id": "backup1",
+        "defaults": {"shape_name": "MySQL.VM.Standard.E3.1.8GB"},
+        "clones": [
+            {"display_name": "test1", "address": "10.0.1.21"},
+            {"display_name": "test2", "subnet_id": "subnet2", "compartment_id": "comp2", "shape_name": "MySQL.VM.Standard.E3.2.32GB"}]}))
+    assert manifest.max_workers == MdsCloneManifest.DEFAULT_MAX_WORKERS
+    assert manifest.backup_id == "backup1"
+    first, second = manifest.entries
+    assert first.to_dict() == {
+        "display_name": "test1", "address": "10.0.1.21", "compartment_id": None, "subnet_id": None,
+        "shape_name": "MySQL.VM.Standard.E3.1.8GB", "configuration_id": None, "configuration_name": None}
+    assert (second.comp_ocid, second.subnet_ocid, second.shape_name) == ("comp2", "subnet2", "MySQL.VM.Standard.E3.2.32GB")
+
+
+@pytest.mark.parametrize("doc, message", [
+    ({"clones": []}, "at least one clone"),
+    ({"backup_id": "", "clones": [{"display_name": "a"}]}, "backup_id must be a backup OCID"),
+    ({"clones": [{"address": "10.0.1.21"}]}, "must have a display_name"),
+    ({"clones": [{"display_name": "a", "compartment_id": "comp2"}]}, "A subnet_id is required to clone a"),
+    ({"clones": [{"display_name": "a", "configuration_id": "c1", "configuration_name": "n"}]}, "not both"),
+    ({"clones": [{"display_name": "a"}, {"display_name": "a"}]}, "Clone a is listed more than once"),
+    ({"clones": [{"display_name": "a", "address": "10.0.1.21"}, {"display_name": "b", "address": "10.0.1.21"}]}, "given to more than one clone"),
+])
+def test_invalid_clone_manifests_are_rejected(tmp_path, doc, message):
+    with pytest.raises(MdsManifestError,match=message):
+        MdsCloneManifest(manifest_file(tmp_path,doc))
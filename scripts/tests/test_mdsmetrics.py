@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from utils.mdsmetrics import MdsMetrics
+from utils.mdsmetrics import MdsMetricsContext
+from utils.mdsmetrics import percentile
+from utils.mdsmetrics import write_atomic
+
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values,50) == 3
+    assert percentile(values,90) == 5
+    assert percentile(values,0) == 1
+    assert percentile([],50) is None
+
+
+def test_write_atomic_replaces_the_file(tmp_path):
+    fname = str(tmp_path / "report.json")
+    write_atomic(fname,"one")
+    write_atomic(fname,"two")
+    with open(fname,"r") as f:
+        assert f.read() == "two"
+    assert os.listdir(str(tmp_path)) == ["report.json"]
+
+
+def test_phases_and_calls_are_reported():
+    parent = MdsMetrics("BATCH")
+    metrics = MdsMetrics("RESIZE",parent)
+    with metrics.phase("backup"):
+        time.sleep(0.02)
+    with pytest.raises(RuntimeError):
+        with metrics.phase("update"):
+            raise RuntimeError("refused")
+    with metrics.phase("backup"):
+        time.sleep(0.01)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        metrics.record_call("get_db_system",seconds)
+    metrics.record_call("update_db_system",0.5,failed=True)
+
+    report = metrics.report(success=False)
+    assert report["action"] == "RESIZE"
+    assert report["success"] is False
+    assert [(phase["name"], phase["status"]) for phase in report["phases"]] == [
+        ("backup", MdsMetrics.OK), ("update", MdsMetrics.FAILED), ("backup", MdsMetrics.OK)]
+    assert report["phase_totals"]["backup"] == pytest.approx(0.03,abs=0.02)
+    assert report["calls"]["get_db_system"] == {"count": 4, "errors": 0, "p50": 0.2, "p90": 0.4, "p99": 0.4, "max": 0.4}
+    assert report["call_count"] == 5
+    assert report["call_errors"] == 1
+    # A batch's report covers the calls made for its databases
+    assert parent.report()["call_count"] == 5
+    assert parent.report()["phases"] == list()
+
+
+def test_report_files(tmp_path):
+    metrics = MdsMetrics("RESIZE")
+    with metrics.phase("backup"):
+        pass
+    metrics.record_call("create_backup",0.25)
+    report_fname = str(tmp_path / "report.json")
+    metrics.write_report(report_fname,success=True)
+    with open(report_fname,"r") as f:
+        assert json.load(f)["calls"]["create_backup"]["count"] == 1
+
+    prom_fname = str(tmp_path / "mdsac.prom")
+    metrics.write_prometheus(prom_fname,success=True)
+    with open(prom_fname,"r") as f:
+        lines = f.read().splitlines()
+    assert "# TYPE mdsac_run_success gauge" in lines
+    assert 'mdsac_run_success{action="RESIZE"} 1.0' in lines
+    assert 'mdsac_api_calls{action="RESIZE",method="create_backup"} 1.0' in lines
+    assert 'mdsac_api_call_latency_seconds{action="RESIZE",method="create_backup",quantile="0.50"} 0.25' in lines
+    assert any(line.startswith('mdsac_phase_duration_seconds{action="RESIZE",phase="backup"}') for line in lines)
+
+
+def test_context_binds_metrics_per_task():
+    context = MdsMetricsContext()
+
+    async def operation(action):
+        context.bind(MdsMetrics(action))
+        await asyncio.sleep(0.01)
+        context.record_call("get_db_system",0.1)
+        return context.current()
+
+    async def run():
+        return await asyncio.gather(operation("RESIZE"),operation("LOCAL_COPY"))
+
+    resize, copy = asyncio.run(run())
+    assert (resize.action, copy.action) == ("RESIZE", "LOCAL_COPY")
+    assert resize.report()["call_count"] == copy.report()["call_count"] == 1
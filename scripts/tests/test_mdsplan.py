@@ -0,0 +1,46 @@
+import json
+
+from utils.mdsplan import MdsPlan
+
+
+def resize_plan():
+    plan = MdsPlan("RESIZE",{"id": "db1", "display_name": "orders"})
+    plan.add("backup","Back up the database.",operation="create_backup",expected=60)
+    plan.add("revert_file","Write the revert file.")
+    plan.add("update","Change the shape in place.",operation="update_db_system",request={"shape_name": "E3.2"},expected=120,offline=True)
+    plan.add("rebuild","Recreate the database from the backup.",operation="create_db_system",offline=True,condition="if the change is refused")
+    plan.add("delete","Delete the original.",operation="delete_db_system",expected=30,condition="if the change is refused")
+    return plan
+
+
+def test_totals_count_conditional_steps_in_the_worst_case_only():
+    plan = resize_plan().to_dict()
+    assert plan["format"] == MdsPlan.FORMAT
+    assert [step["step"] for step in plan["steps"]] == ["backup", "revert_file", "update", "rebuild", "delete"]
+    assert plan["expected_seconds"] == 180
+    assert plan["unestimated_steps"] == 0
+    assert plan["worst_case_seconds"] == 210
+    assert plan["worst_case_unestimated_steps"] == 1
+    assert plan["source_offline_seconds"] == 120
+    assert plan["source_offline_unestimated_steps"] == 0
+    assert plan["backups"] == 1
+    assert plan["databases_created"] == 0
+    assert plan["databases_deleted"] == 0
+
+
+def test_text_and_files(tmp_path):
+    plan = resize_plan()
+    lines = plan.text()
+    assert lines[0] == "Plan for RESIZE of orders (db1)"
+    assert "    Only if the change is refused." in lines
+    assert "Expected duration:      3m 00s" in lines
+    assert "Worst case duration:    3m 30s plus 1 step without history" in lines
+    assert "Source offline for:     2m 00s" in lines
+
+    json_fname = str(tmp_path / "plan.json")
+    text_fname = str(tmp_path / "plan.txt")
+    plan.write(json_fname,text_fname)
+    with open(json_fname,"r") as f:
+        assert json.load(f) == json.loads(json.dumps(plan.to_dict()))
+    with open(text_fname,"r") as f:
+        assert f.read() == "\n".join(lines) + "\n"
@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.mdspoller import MdsPollCoordinator
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        MdsPollCoordinator(interval=0.1,window=1.0)
+
+
+def test_polls_share_one_list_call_per_key():
+    poller = MdsPollCoordinator(interval=0.05,window=0.01)
+    listed = {"c1": ["db1", "db2"], "c2": ["db3"]}
+
+    def list_all(key):
+        async def list_all():
+            return [SimpleNamespace(id=db_id,source="list") for db_id in listed[key]]
+        return list_all
+
+    async def get_one(db_id):
+        return SimpleNamespace(id=db_id,source="get")
+
+    async def run():
+        return await asyncio.gather(
+            poller.poll("c1","db1",list_all("c1"),get_one),
+            poller.poll("c1","db2",list_all("c1"),get_one),
+            poller.poll("c1","db2",list_all("c1"),get_one),
+            poller.poll("c1","gone",list_all("c1"),get_one),
+            poller.poll("c2","db3",list_all("c2"),get_one))
+
+    results = asyncio.run(run())
+    assert [(data.id, data.source) for data in results] == [
+        ("db1", "list"), ("db2", "list"), ("db2", "list"), ("gone", "get"), ("db3", "list")]
+    assert poller.list_calls == 2
+    # A resource missing from the list is read on its own
+    assert poller.get_calls == 1
+
+
+def test_a_failed_list_fails_every_poll_in_the_batch():
+    poller = MdsPollCoordinator(interval=0.05,window=0.01)
+
+    async def list_all():
+        raise RuntimeError("list failed")
+
+    async def get_one(db_id):
+        raise AssertionError("not reached")
+
+    async def run():
+        return await asyncio.gather(
+            poller.poll("c1","db1",list_all,get_one),
+            poller.poll("c1","db2",list_all,get_one),
+            return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["list failed", "list failed"]
+    assert poller.get_calls == 0
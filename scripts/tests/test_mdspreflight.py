@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.mdspreflight import MdsPlannedDatabase
+from utils.mdspreflight import MdsPreflight
+from utils.mdspreflight import MdsPreflightError
+from utils.mdspreflight import STORAGE_LIMIT_NAME
+from utils.mdspreflight import check_subnet_address
+from utils.mdspreflight import free_addresses
+from utils.mdspreflight import limit_demand
+from utils.mdspreflight import shape_limit_name
+
+SUBNET = SimpleNamespace(display_name="db-subnet",cidr_block="10.0.0.0/29")
+
+
+def test_shape_limit_name():
+    assert shape_limit_name("MySQL.VM.Standard.E3.1.8GB") == "vm-standard-e3-1-8gb-count"
+    assert shape_limit_name("VM.Standard.E2.1") == "vm-standard-e2-1-count"
+
+
+def test_check_subnet_address():
+    check_subnet_address("10.0.0.5",SUBNET)
+    with pytest.raises(MdsPreflightError,match="outside subnet db-subnet"):
+        check_subnet_address("10.0.1.5",SUBNET)
+    with pytest.raises(MdsPreflightError,match="not a valid IP address"):
+        check_subnet_address("10.0.0.256",SUBNET)
+
+
+def test_free_addresses_come_from_the_top_of_the_subnet():
+    # 10.0.0.7 is the broadcast address and .0 and .1 are reserved
+    assert free_addresses(SUBNET,[]) == ["10.0.0.6"]
+    assert free_addresses(SUBNET,["10.0.0.6","10.0.0.4"],count=3) == ["10.0.0.5", "10.0.0.3", "10.0.0.2"]
+    assert free_addresses(SUBNET,["10.0.0.6"],count=10) == ["10.0.0.5", "10.0.0.4", "10.0.0.3", "10.0.0.2"]
+
+
+def test_a_full_subnet_has_no_free_address():
+    in_use = ["10.0.0.%d" % n for n in range(2,7)]
+    with pytest.raises(MdsPreflightError,match="no free IP address"):
+        free_addresses(SUBNET,in_use)
+    with pytest.raises(MdsPreflightError,match="no IPv4 CIDR block"):
+        free_addresses(SimpleNamespace(display_name="v6",cidr_block=None),[])
+
+
+def test_limit_demand_matches_limit_names_exactly():
+    planned = [
+        MdsPlannedDatabase("c1","s1","MySQL.VM.Standard.E3.2.32GB",storage_gb=100),
+        MdsPlannedDatabase("c1","s1","MySQL.VM.Standard.E3.2.32GB",storage_gb=50,highly_available=True),
+        MdsPlannedDatabase("c1","s1",None,storage_gb=0)]
+    assert limit_demand("vm-standard-e3-2-32gb-count",planned) == 4
+    assert limit_demand("VM-Standard-E3-2-32GB-count",planned) == 4
+    # Limits that share a prefix with the shape's limit are not counted
+    assert limit_demand("vm-standard-e3-2-32gb-ocpu-count",planned) is None
+    assert limit_demand("vm-standard-e3-2-count",planned) is None
+    assert limit_demand(STORAGE_LIMIT_NAME,planned) == 250
+    assert limit_demand(STORAGE_LIMIT_NAME,planned[2:]) is None
+
+
+def test_preflight_reports_every_problem_together():
+    async def ok():
+        return None
+
+    async def warning():
+        return "Storage is nearly exhausted."
+
+    async def problem(message):
+        raise MdsPreflightError(message)
+
+    preflight = MdsPreflight()
+    preflight.add(ok())
+    preflight.add(warning())
+    assert asyncio.run(preflight.run()) == ["Storage is nearly exhausted."]
+
+    preflight.add(problem("No free address."))
+    preflight.add(warning())
+    preflight.add(problem("Shape limit exceeded."))
+    with pytest.raises(MdsPreflightError) as e:
+        asyncio.run(preflight.run())
+    assert str(e.value) == "Pre-flight checks failed:\n  No free address.\n  Shape limit exceeded."
+
+
+def test_preflight_raises_unexpected_errors():
+    async def broken():
+        raise KeyError("limits")
+
+    preflight = MdsPreflight()
+    preflight.add(broken())
+    with pytest.raises(KeyError):
+        asyncio.run(preflight.run())
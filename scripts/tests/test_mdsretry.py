@@ -0,0 +1,99 @@
+import asyncio
+
+import oci
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import mdsac
+from utils.mdsclients import MdsClientFactory
+from utils.mdslimits import MdsTokenBucket
+from utils.mdsmetrics import MdsMetrics
+from utils.mdsretry import MdsRetryPolicy
+from utils.mdsretry import retry_token
+from utils.mdssim import MdsSimulator
+from utils.mdssim import SIM_CONFIG
+
+
+def service_error(status, headers=None):
+    return oci.exceptions.ServiceError(status,"Code",headers or dict(),"Failed.")
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        MdsRetryPolicy(max_attempts=0)
+    with pytest.raises(ValueError):
+        MdsRetryPolicy(first_delay=2.0,max_delay=1.0)
+    with pytest.raises(ValueError):
+        MdsRetryPolicy(jitter=1.0)
+
+
+def test_only_throttling_and_transient_errors_are_retried():
+    policy = MdsRetryPolicy()
+    assert policy.retryable(service_error(429))
+    assert policy.retryable(service_error(503))
+    assert policy.retryable(ConnectionError())
+    assert not policy.retryable(service_error(400))
+    assert not policy.retryable(service_error(409))
+    assert not policy.retryable(ValueError())
+
+
+def test_delays_back_off_unless_the_service_says_when():
+    policy = MdsRetryPolicy(first_delay=1.0,max_delay=10.0,jitter=0.0)
+    assert [policy.delay(attempt) for attempt in (1, 2, 3, 4, 5)] == [1.0, 2.0, 4.0, 8.0, 10.0]
+    assert policy.delay(1,service_error(429,{"retry-after": "3.5"})) == 3.5
+    assert policy.delay(1,service_error(429,{"retry-after": "3600"})) == 10.0
+    assert policy.delay(2,service_error(429,{"retry-after": "soon"})) == 2.0
+
+
+def test_retry_tokens_are_unique():
+    assert retry_token() != retry_token()
+
+
+@pytest.fixture
+def sim(monkeypatch):
+    sim = MdsSimulator()
+    sim.db_ids = sim.seed(databases=1)
+    monkeypatch.setattr(mdsac,"rate_limiter",MdsTokenBucket(1000,1000))
+    monkeypatch.setattr(mdsac,"retry_policy",MdsRetryPolicy(max_attempts=3,first_delay=0.01,max_delay=0.05))
+    return sim
+
+
+def call(fn, *args, **kwargs):
+    async def run():
+        mdsac.metrics.bind(MdsMetrics("test"))
+        return await mdsac.oci_data(fn,*args,**kwargs)
+    return asyncio.run(run())
+
+
+def test_oci_call_retries_throttling(sim):
+    client = sim.client(oci.mysql.DbSystemClient,SIM_CONFIG)
+    sim.fail("get_db_system",429,count=2,code="TooManyRequests")
+    assert call(client.get_db_system,sim.db_ids[0]).id == sim.db_ids[0]
+    assert sim.calls["get_db_system"] == 3
+
+
+def test_oci_call_gives_up(sim):
+    client = sim.client(oci.mysql.DbSystemClient,SIM_CONFIG)
+    sim.fail("get_db_system",503,count=5,code="ServiceUnavailable")
+    with pytest.raises(oci.exceptions.ServiceError):
+        call(client.get_db_system,sim.db_ids[0])
+    assert sim.calls["get_db_system"] == 3
+    sim.fail("update_db_system",400,code="InvalidParameter")
+    with pytest.raises(oci.exceptions.ServiceError):
+        call(client.update_db_system,sim.db_ids[0],oci.mysql.models.UpdateDbSystemDetails(display_name = "x"))
+    assert sim.calls["update_db_system"] == 1
+
+
+def test_sdk_clients_do_not_retry_on_their_own(tmp_path):
+    # oci_call() is the only retry layer, so its rate limiter sees every
+    # attempt
+    key = rsa.generate_private_key(public_exponent=65537,key_size=2048)
+    key_file = tmp_path / "key.pem"
+    key_file.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption()))
+    oci_cfg = dict(SIM_CONFIG,key_file=str(key_file),region="us-ashburn-1")
+    client = MdsClientFactory().get(oci.mysql.DbSystemClient,oci_cfg)
+    assert isinstance(client.retry_strategy,oci.retry.NoneRetryStrategy)
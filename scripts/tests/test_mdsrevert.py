@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from utils.mdsrevert import MdsRevertError
+from utils.mdsrevert import MdsRevertIndex
+from utils.mdsrevert import read_revert_file
+from utils.mdsrevert import write_revert_file
+
+
+def revert_doc(db_ocid, display_name, created, source_ocid=None):
+    return {
+        "database": {"id": source_ocid or db_ocid},
+        "metadata": {"to": {"id": db_ocid}, "display_name": display_name, "created": created}}
+
+
+def test_revert_file_round_trip(tmp_path):
+    fname = str(tmp_path / "revert.1")
+    doc = revert_doc("db1","orders","2026-01-01T00:00:00")
+    write_revert_file(fname,doc)
+    assert read_revert_file(fname) == doc
+    # Nothing is left behind by the atomic write
+    assert os.listdir(str(tmp_path)) == ["revert.1"]
+
+
+def test_an_incomplete_revert_file_is_rejected(tmp_path):
+    fname = str(tmp_path / "revert.1")
+    write_revert_file(fname,{"database": {"id": "db1"}})
+    with pytest.raises(MdsRevertError):
+        read_revert_file(fname)
+    with open(fname,"w") as f:
+        f.write('{"database": ')
+    with pytest.raises(MdsRevertError):
+        read_revert_file(fname)
+
+
+def test_index_finds_the_latest_complete_file(tmp_path):
+    batch_dir = tmp_path / "db2"
+    batch_dir.mkdir()
+    write_revert_file(str(tmp_path / "revert.1"),revert_doc("db1","orders","2026-01-01T00:00:00"))
+    write_revert_file(str(tmp_path / "revert.2"),revert_doc("db1b","orders","2026-01-02T00:00:00",source_ocid="db1"))
+    write_revert_file(str(batch_dir / "revert.3"),revert_doc("db2","stock","2026-01-03T00:00:00"))
+    write_revert_file(str(tmp_path / "revert.4"),{"database": {"id": "db1b"}})
+
+    index = MdsRevertIndex(str(tmp_path))
+    try:
+        index.refresh()
+        assert index.latest(display_name="orders") == str(tmp_path / "revert.2")
+        assert index.latest(db_ocid="db1") == str(tmp_path / "revert.1")
+        assert index.latest(db_ocid="db2",display_name="stock") == str(batch_dir / "revert.3")
+        assert index.latest(db_ocid="db3") is None
+        with pytest.raises(MdsRevertError):
+            index.latest()
+
+        # Removed files leave the index and changed ones are read again
+        os.remove(str(tmp_path / "revert.2"))
+        write_revert_file(str(batch_dir / "revert.3"),revert_doc("db2","stock-copy","2026-01-03T00:00:00"))
+        index.refresh()
+        assert index.latest(display_name="orders") == str(tmp_path / "revert.1")
+        assert index.latest(display_name="stock") is None
+        assert index.latest(display_name="stock-copy") == str(batch_dir / "revert.3")
+    finally:
+        index.close()
+    assert os.path.isfile(str(tmp_path / MdsRevertIndex.INDEX_FILE))
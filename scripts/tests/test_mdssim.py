@@ -0,0 +1,85 @@
+import time
+
+import oci
+import pytest
+
+from utils.mdsclients import MdsClientFactory
+from utils.mdssim import MdsSimulator
+from utils.mdssim import SIM_CONFIG
+
+
+@pytest.fixture
+def sim():
+    sim = MdsSimulator(latencies={"backup": 0.1, "shutdown": 0.1})
+    sim.db_ids = sim.seed(databases=2)
+    return sim
+
+
+def backup_details(db_id):
+    return oci.mysql.models.CreateBackupDetails(db_system_id = db_id)
+
+
+def test_install_builds_simulated_clients(sim):
+    factory = sim.install(MdsClientFactory())
+    client = factory.get(oci.mysql.DbSystemClient,SIM_CONFIG)
+    db = client.get_db_system(sim.db_ids[0]).data
+    assert db.display_name == "db-000"
+    assert db.lifecycle_state == "ACTIVE"
+    assert sim.calls == {"get_db_system": 1}
+    assert client.get_db_system.__name__ == "get_db_system"
+    with pytest.raises(AttributeError):
+        client.get_db_system_summary
+
+
+def test_resources_move_through_their_lifecycle(sim):
+    client = sim.client(oci.mysql.DbBackupsClient,SIM_CONFIG)
+    backup = client.create_backup(backup_details(sim.db_ids[0])).data
+    assert backup.lifecycle_state == "CREATING"
+    assert client.get_backup(backup.id).data.lifecycle_state == "CREATING"
+    time.sleep(0.15)
+    assert client.get_backup(backup.id).data.lifecycle_state == "ACTIVE"
+    # Each response holds its own copy of the resource
+    assert backup.lifecycle_state == "CREATING"
+
+
+def test_lifecycle_failures(sim):
+    client = sim.client(oci.mysql.DbBackupsClient,SIM_CONFIG)
+    sim.fail_lifecycle("backup")
+    backup = client.create_backup(backup_details(sim.db_ids[0])).data
+    time.sleep(0.15)
+    assert client.get_backup(backup.id).data.lifecycle_state == "FAILED"
+
+
+def test_injected_failures_and_retry_tokens(sim):
+    client = sim.client(oci.mysql.DbBackupsClient,SIM_CONFIG)
+    sim.fail("create_backup",503,code="ServiceUnavailable")
+    with pytest.raises(oci.exceptions.ServiceError) as e:
+        client.create_backup(backup_details(sim.db_ids[0]),opc_retry_token="t1")
+    assert e.value.status == 503
+    first = client.create_backup(backup_details(sim.db_ids[0]),opc_retry_token="t1").data
+    again = client.create_backup(backup_details(sim.db_ids[0]),opc_retry_token="t1").data
+    assert first.id == again.id
+    assert len(sim._backups) == 1
+    assert sim.calls["create_backup"] == 3
+
+
+def test_throttling(sim):
+    client = sim.client(oci.mysql.DbSystemClient,SIM_CONFIG)
+    sim.throttle(1,burst=2)
+    client.get_db_system(sim.db_ids[0])
+    client.get_db_system(sim.db_ids[0])
+    with pytest.raises(oci.exceptions.ServiceError) as e:
+        client.get_db_system(sim.db_ids[0])
+    assert e.value.status == 429
+    assert float(e.value.headers["retry-after"]) > 0
+    sim.throttle(None)
+    client.get_db_system(sim.db_ids[0])
+
+
+def test_a_busy_database_rejects_a_backup(sim):
+    db_client = sim.client(oci.mysql.DbSystemClient,SIM_CONFIG)
+    backup_client = sim.client(oci.mysql.DbBackupsClient,SIM_CONFIG)
+    db_client.stop_db_system(sim.db_ids[1],oci.mysql.models.StopDbSystemDetails(shutdown_type = "FAST"))
+    with pytest.raises(oci.exceptions.ServiceError) as e:
+        backup_client.create_backup(backup_details(sim.db_ids[1]))
+    assert e.value.status == 409
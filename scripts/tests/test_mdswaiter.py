@@ -0,0 +1,124 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import oci
+import pytest
+
+from utils.mdssim import MdsSimulator
+from utils.mdssim import SIM_CONFIG
+from utils.mdswaiter import MdsWaiter
+from utils.mdswaiter import MdsWaiterError
+from utils.mdswaiter import format_elapsed
+
+
+def states(*names):
+    # Returns a poll that reports each state in turn, then the last forever
+    names = list(names)
+
+    async def poll():
+        if len(names) > 1:
+            return SimpleNamespace(lifecycle_state=names.pop(0))
+        return SimpleNamespace(lifecycle_state=names[0])
+    return poll
+
+
+def test_format_elapsed():
+    assert format_elapsed(5.4) == "5s"
+    assert format_elapsed(125) == "2m 05s"
+    assert format_elapsed(3725) == "1h 02m 05s"
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        MdsWaiter(first_delay=0)
+    with pytest.raises(ValueError):
+        MdsWaiter(first_delay=2.0,max_delay=1.0)
+    with pytest.raises(ValueError):
+        MdsWaiter(backoff=0.5)
+    with pytest.raises(ValueError):
+        MdsWaiter(jitter=1.0)
+
+
+def test_delays_back_off_to_the_ceiling():
+    waiter = MdsWaiter(first_delay=2.0,max_delay=10.0)
+    delays = [2.0]
+    for n in range(4):
+        delays.append(waiter.next_delay(delays[-1]))
+    assert delays == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+
+def test_sparse_delays_grow_by_at_most_the_backoff():
+    waiter = MdsWaiter(first_delay=2.0,max_delay=60.0)
+    waiter._expected = 600.0
+    # Half the time remaining, but no more than the backoff allows
+    assert waiter.next_delay(2.0,10.0) == 4.0
+    assert waiter.next_delay(256.0,100.0) == 250.0
+    # Close to the expected finish polls are dense, and after it they back
+    # off again
+    assert waiter.next_delay(100.0,597.0) == 2.0
+    assert waiter.next_delay(2.0,700.0) == 4.0
+
+
+def test_wait_returns_the_final_model():
+    waiter = MdsWaiter(first_delay=0.01,max_delay=0.02,jitter=0.0)
+    data = asyncio.run(waiter.wait(states("CREATING","CREATING","ACTIVE"),["CREATING"],success=["ACTIVE"]))
+    assert data.lifecycle_state == "ACTIVE"
+    assert waiter.polls == 3
+
+
+def test_wait_reports_failure_and_timeout():
+    waiter = MdsWaiter(first_delay=0.01,max_delay=0.02)
+    with pytest.raises(MdsWaiterError,match="Backup ended in state FAILED."):
+        asyncio.run(waiter.wait(states("CREATING","FAILED"),["CREATING"],success=["ACTIVE"],description="backup"))
+    waiter = MdsWaiter(deadline=0.05,first_delay=0.01,max_delay=0.02)
+    with pytest.raises(MdsWaiterError,match="Timed out"):
+        asyncio.run(waiter.wait(states("CREATING"),["CREATING"]))
+
+
+def test_the_last_poll_is_at_the_deadline():
+    finish = time.monotonic() + 0.2
+
+    async def poll():
+        return SimpleNamespace(lifecycle_state="ACTIVE" if time.monotonic() >= finish else "UPDATING")
+
+    # The first sleep would overshoot the deadline, so it is cut short and
+    # the update is seen finishing in time
+    waiter = MdsWaiter(deadline=0.3,first_delay=5.0,max_delay=60.0,jitter=0.0)
+    data = asyncio.run(waiter.wait(poll,["UPDATING"],success=["ACTIVE"]))
+    assert data.lifecycle_state == "ACTIVE"
+    assert waiter.polls == 2
+    assert waiter.elapsed == pytest.approx(0.3,abs=0.05)
+
+    finish = time.monotonic() + 10.0
+    waiter = MdsWaiter(deadline=0.3,first_delay=5.0,max_delay=60.0,jitter=0.0)
+    with pytest.raises(MdsWaiterError,match="last state: UPDATING"):
+        asyncio.run(waiter.wait(poll,["UPDATING"],success=["ACTIVE"]))
+    assert waiter.polls == 2
+    assert waiter.elapsed >= 0.3
+
+
+def test_a_callable_attribute_derives_the_state():
+    async def poll():
+        return SimpleNamespace(status=SimpleNamespace(code="APPLIED"))
+
+    waiter = MdsWaiter(first_delay=0.01,attribute=lambda data: data.status.code)
+    data = asyncio.run(waiter.wait(poll,["APPLYING"],success=["APPLIED"]))
+    assert waiter.state(data) == "APPLIED"
+
+
+def test_an_early_finish_is_seen_despite_a_long_estimate():
+    # A backup that takes 0.5s against an estimate of 600s
+    sim = MdsSimulator(latencies={"backup": 0.5})
+    [db_id] = sim.seed(databases=1)
+    client = sim.client(oci.mysql.DbBackupsClient,SIM_CONFIG)
+    backup = client.create_backup(oci.mysql.models.CreateBackupDetails(db_system_id = db_id)).data
+
+    async def poll():
+        return client.get_backup(backup.id).data
+
+    waiter = MdsWaiter(first_delay=0.05,max_delay=1.0,jitter=0.0,estimate=lambda data: 600.0)
+    data = asyncio.run(waiter.wait(poll,["CREATING"],success=["ACTIVE"],initial=backup))
+    assert data.lifecycle_state == "ACTIVE"
+    assert waiter.expected == 600.0
+    assert waiter.elapsed < 1.5
@@ -0,0 +1,95 @@
+import io
+import json
+import time
+
+from utils.tio import Tio
+from utils.tio import TioContext
+from utils.tio import TioWriter
+from utils import tio as tio_module
+
+
+def test_writer_batches_until_flushed():
+    writer = TioWriter(interval=60.0)
+    log = io.StringIO()
+    try:
+        writer.write(log,"one\n")
+        writer.write(log,"two\n")
+        writer.flush(durable=True)
+        assert log.getvalue() == "one\ntwo\n"
+    finally:
+        writer.close()
+
+
+def test_writer_wakes_once_max_bytes_are_pending():
+    writer = TioWriter(interval=60.0,max_bytes=8)
+    log = io.StringIO()
+    try:
+        writer.write(log,"0123456789\n")
+        for n in range(100):
+            if log.getvalue():
+                break
+            time.sleep(0.01)
+        assert log.getvalue() == "0123456789\n"
+    finally:
+        writer.close()
+
+
+def test_close_writes_everything_and_later_writes_are_synchronous():
+    writer = TioWriter(interval=60.0)
+    log = io.StringIO()
+    writer.write(log,"before\n")
+    writer.close()
+    assert log.getvalue() == "before\n"
+    writer.write(log,"after\n")
+    assert log.getvalue() == "before\nafter\n"
+
+
+def test_a_closed_log_does_not_stop_the_writer():
+    writer = TioWriter(interval=60.0)
+    closed = io.StringIO()
+    closed.close()
+    log = io.StringIO()
+    try:
+        writer.write(closed,"lost\n")
+        writer.write(log,"kept\n")
+        writer.flush(durable=True)
+        assert log.getvalue() == "kept\n"
+    finally:
+        writer.close()
+
+
+def test_tio_records_whole_lines(monkeypatch, capsys):
+    writer = TioWriter(interval=60.0)
+    monkeypatch.setattr(tio_module,"writer",writer)
+    log = io.StringIO()
+    records = io.StringIO()
+    try:
+        tio = Tio(log,records=records,operation="db1")
+        tio.write("Backing up ")
+        tio.writeln("done.")
+        tio.set_mode(Tio.SCREEN,Tio.OFF)
+        tio.write("Waiting")
+        tio.flush()
+    finally:
+        writer.close()
+    assert capsys.readouterr().out == "Backing up done.\n"
+    assert log.getvalue() == "Backing up done.\nWaiting"
+    lines = [json.loads(line) for line in records.getvalue().splitlines()]
+    assert [(line["operation"], line["kind"], line["text"]) for line in lines] == [
+        ("db1", "output", "Backing up done."), ("db1", "output", "Waiting")]
+
+
+def test_set_mode_rejects_unknown_modes():
+    tio = Tio(io.StringIO())
+    assert not tio.set_mode("printer",Tio.OFF)
+    assert not tio.set_mode(Tio.FILE,"off")
+    assert tio.set_mode(Tio.FILE,Tio.OFF)
+    assert tio.get_mode(Tio.FILE) is False
+    assert tio.get_mode("printer") is None
+
+
+def test_context_forwards_to_the_bound_tio():
+    context = TioContext()
+    tio = context.bind(Tio(io.StringIO(),operation="db2"))
+    assert context.current() is tio
+    assert context.operation == "db2"
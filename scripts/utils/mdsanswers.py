@@ -0,0 +1,130 @@
+import json
+import os
+import stat
+from utils.mdscreds import MdsCredentials
+from utils.mdscreds import MdsCredentialsError
+
+class MdsAnswersError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+def read_answers(fname):
+    # Answers files are JSON unless their name ends in .yaml or .yml, in
+    # which case PyYAML, an optional dependency, is needed to read them
+    try:
+        with open(fname,"r") as f:
+            if fname.endswith((".yaml",".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise MdsAnswersError("PyYAML must be installed to read the YAML answers file %s." % fname)
+                doc = yaml.safe_load(f)
+            else:
+                doc = json.load(f)
+    except MdsAnswersError:
+        raise
+    except Exception as e:
+        raise MdsAnswersError("Cannot read answers file %s: %s" % (fname,e))
+    if not isinstance(doc,dict):
+        raise MdsAnswersError("The answers file must hold an object.")
+    return doc
+
+
+def read_secret(fname):
+    # Like an ssh key, a password file must not be readable by others
+    try:
+        mode = os.stat(fname).st_mode
+        if os.name == "posix" and mode & (stat.S_IRWXG | stat.S_IRWXO):
+            raise MdsAnswersError("Password file %s must not be accessible by group or others." % fname)
+        with open(fname,"r") as f:
+            return f.read().rstrip("\r\n")
+    except OSError as e:
+        raise MdsAnswersError("Cannot read password file %s: %s" % (fname,e))
+
+
+class MdsAnswers(object):
+    # The answers to every question mdsac would otherwise ask, so that an
+    # action can run unattended. Until an answers file is loaded the answers
+    # are inactive and the questions are asked interactively. The password
+    # is never held in the answers file itself but is read, when needed, from
+    # a file or an environment variable named by it.
+
+    _KEYS = ("shape_name","resize_copy","configuration","username","password_file","password_env","confirm")
+
+    def __init__(self):
+        self._fname = None
+        self._doc = dict()
+
+    @property
+    def active(self):
+        return self._fname is not None
+
+    @property
+    def fname(self):
+        return self._fname
+
+    def load(self, fname):
+        doc = read_answers(fname)
+        unknown = sorted(key for key in doc if key not in self._KEYS)
+        if unknown:
+            raise MdsAnswersError("Unknown answers: %s." % ", ".join(unknown))
+        for key in ("shape_name","username","password_file","password_env"):
+            if doc.get(key) is not None and not isinstance(doc[key],str):
+                raise MdsAnswersError("The %s answer must be a string." % key)
+        for key in ("resize_copy","confirm"):
+            if not isinstance(doc.get(key,False),bool):
+                raise MdsAnswersError("The %s answer must be true or false." % key)
+        if not isinstance(doc.get("configuration",dict()),dict):
+            raise MdsAnswersError("The configuration answer must be an object.")
+        if doc.get("password_file") is not None and doc.get("password_env") is not None:
+            raise MdsAnswersError("Only one of password_file and password_env can be given.")
+        if doc.get("password_file") is not None:
+            # A relative password file is relative to the answers file
+            doc["password_file"] = os.path.join(os.path.dirname(os.path.abspath(fname)),doc["password_file"])
+        previous = self._doc
+        self._doc = doc
+        if doc.get("username") is not None:
+            # Bad credentials are reported before anything is changed, and
+            # leave the answers as they were
+            try:
+                self.credentials()
+            except MdsAnswersError:
+                self._doc = previous
+                raise
+        self._fname = fname
+
+    @property
+    def shape_name(self):
+        return self._doc.get("shape_name")
+
+    @property
+    def resize_copy(self):
+        return self._doc.get("resize_copy",False)
+
+    @property
+    def configuration(self):
+        return self._doc.get("configuration",dict())
+
+    @property
+    def confirm(self):
+        return self._doc.get("confirm",False)
+
+    def credentials(self):
+        creds = MdsCredentials()
+        if self._doc.get("username") is None:
+            raise MdsAnswersError("The answers file does not give a username.")
+        if self._doc.get("password_file") is not None:
+            password = read_secret(self._doc["password_file"])
+        elif self._doc.get("password_env") is not None:
+            password = os.environ.get(self._doc["password_env"])
+            if password is None:
+                raise MdsAnswersError("Environment variable %s is not set." % self._doc["password_env"])
+        else:
+            raise MdsAnswersError("The answers file gives neither a password_file nor a password_env.")
+        try:
+            creds.set_username(self._doc["username"])
+            creds.set_password(password,password)
+        except MdsCredentialsError as e:
+            raise MdsAnswersError("Invalid credentials in answers: %s" % e.__str__())
+        return creds
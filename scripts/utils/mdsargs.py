@@ -7,22 +7,44 @@ class MdsargsError(Exception):
 
 
 class Mdsargs(object):
+    BATCH = "BATCH"
+    CLONE = "CLONE"
     HELP = "HELP"
     LOCAL_COPY = "LOCAL_COPY"
     REMOTE_COPY = "REMOTE_COPY"
+    RESUME = "RESUME"
     RESIZE = "RESIZE"
     REVERT = "REVERT"
+    # Resize methods
+    INPLACE = "INPLACE"
+    REBUILD = "REBUILD"
+    BLUEGREEN = "BLUEGREEN"
+    # Copy sources
+    COLD = "COLD"
+    ONLINE = "ONLINE"
+    LATEST = "LATEST"
+    PITR = "PITR"
 
     def __init__(self):
         self._action = self.HELP
         self._address = None
         self._comp_ocid = None
         self._db_ocid = None
+        self._journal_file = None
+        self._manifest_file = None
+        self._answers_file = None
         self._oci_cfg_file = None
+        self._prometheus_file = None
         self._name = None
         self._revert_file = None
         self._subnet_ocid = None
         self._output_dir = None
+        self._resize_method = self.REBUILD
+        self._refresh_cache = False
+        self._plan = False
+        self._replicate = False
+        self._keep_original = False
+        self._copy_source = self.ONLINE
 
     @property
     def action(self):
@@ -30,7 +52,7 @@ class Mdsargs(object):
 
     @action.setter
     def action(self,a):
-        if a in (self.HELP, self.RESIZE, self.REVERT, self.LOCAL_COPY, self.REMOTE_COPY):
+        if a in (self.HELP, self.BATCH, self.CLONE, self.RESIZE, self.REVERT, self.LOCAL_COPY, self.REMOTE_COPY, self.RESUME):
             self._action = a
         else:
             raise MdsargsError("Unknown action.")
@@ -46,6 +68,51 @@ class Mdsargs(object):
         else:
             raise MdsargsError("OCI config file is not accessible.")
 
+    @property
+    def manifest_file(self):
+        return self._manifest_file
+
+    @manifest_file.setter
+    def manifest_file(self,fname):
+        if os.path.isfile(fname) and os.access(fname,os.R_OK):
+            self._manifest_file = fname
+        else:
+            raise MdsargsError("Manifest file is not accessible.")
+
+    @property
+    def answers_file(self):
+        return self._answers_file
+
+    @answers_file.setter
+    def answers_file(self,fname):
+        if os.path.isfile(fname) and os.access(fname,os.R_OK):
+            self._answers_file = fname
+        else:
+            raise MdsargsError("Answers file is not accessible.")
+
+    @property
+    def journal_file(self):
+        return self._journal_file
+
+    @journal_file.setter
+    def journal_file(self,fname):
+        if os.path.isfile(fname) and os.access(fname,os.W_OK):
+            self._journal_file = fname
+        else:
+            raise MdsargsError("Journal file is not accessible.")
+
+    @property
+    def prometheus_file(self):
+        return self._prometheus_file
+
+    @prometheus_file.setter
+    def prometheus_file(self,fname):
+        dirname = os.path.dirname(os.path.abspath(fname))
+        if os.path.isdir(dirname) and os.access(dirname,(os.X_OK | os.W_OK)):
+            self._prometheus_file = fname
+        else:
+            raise MdsargsError("Directory for the Prometheus file is not accessible.")
+
     @property
     def display_name(self):
         return self._name
@@ -114,3 +181,57 @@ class Mdsargs(object):
     @subnet_ocid.setter
     def subnet_ocid(self,subnet_ocid):
         self._subnet_ocid = subnet_ocid
+
+    @property
+    def resize_method(self):
+        return self._resize_method
+
+    @resize_method.setter
+    def resize_method(self,method):
+        if method in (self.INPLACE, self.REBUILD, self.BLUEGREEN):
+            self._resize_method = method
+        else:
+            raise MdsargsError("Unknown resize method.")
+
+    @property
+    def refresh_cache(self):
+        return self._refresh_cache
+
+    @refresh_cache.setter
+    def refresh_cache(self,refresh):
+        self._refresh_cache = refresh
+
+    @property
+    def plan(self):
+        return self._plan
+
+    @plan.setter
+    def plan(self,plan):
+        self._plan = plan
+
+    @property
+    def replicate(self):
+        return self._replicate
+
+    @replicate.setter
+    def replicate(self,replicate):
+        self._replicate = replicate
+
+    @property
+    def keep_original(self):
+        return self._keep_original
+
+    @keep_original.setter
+    def keep_original(self,keep):
+        self._keep_original = keep
+
+    @property
+    def copy_source(self):
+        return self._copy_source
+
+    @copy_source.setter
+    def copy_source(self,source):
+        if source in (self.COLD, self.ONLINE, self.LATEST, self.PITR):
+            self._copy_source = source
+        else:
+            raise MdsargsError("Unknown copy source.")
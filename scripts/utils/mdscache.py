@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import time
+from utils.mdsimport import lazy_import
+
+hashlib = lazy_import("hashlib")
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"),".cache")
+    return os.path.join(base,"mdsac")
+
+
+class MdsCatalogCache(object):
+    # A persistent cache for catalog data (shapes, configurations) that rarely
+    # changes. Each entry is a JSON file named after a hash of its key, and is
+    # treated as a miss once it is older than the TTL. Entries are written to a
+    # temporary file and renamed so that concurrent runs never read a partial
+    # entry.
+
+    DEFAULT_TTL = 24 * 60 * 60
+
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL):
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self._cache_dir = os.path.join(cache_dir,"catalog")
+        self._ttl = ttl
+        self._enabled = True
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self,seconds):
+        self._ttl = seconds
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self,enabled):
+        self._enabled = enabled
+
+    def __path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self._cache_dir,digest + ".json")
+
+    def get(self, key):
+        if not self._enabled:
+            return None
+        try:
+            with open(self.__path(key),"r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key or time.time() - entry.get("created",0) > self._ttl:
+            return None
+        return entry.get("data")
+
+    def put(self, key, data):
+        if not self._enabled:
+            return
+        try:
+            os.makedirs(self._cache_dir,exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self._cache_dir,suffix=".tmp")
+            with os.fdopen(fd,"w") as f:
+                json.dump({"key": key, "created": time.time(), "data": data},f)
+            os.replace(tmp,self.__path(key))
+        except OSError:
+            # The cache is an optimisation only, so failing to write it is
+            # not an error.
+            pass
+
+    def invalidate(self, key=None):
+        # Removes one entry, or every entry if no key is given
+        try:
+            if key is not None:
+                os.remove(self.__path(key))
+            else:
+                for fname in os.listdir(self._cache_dir):
+                    if fname.endswith(".json"):
+                        os.remove(os.path.join(self._cache_dir,fname))
+        except OSError:
+            pass
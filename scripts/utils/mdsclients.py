@@ -0,0 +1,52 @@
+import threading
+from utils.mdsimport import lazy_import
+
+oci = lazy_import("oci")
+
+class MdsClientFactory(object):
+    # A registry of OCI service clients keyed by client class and OCI config.
+    # Each client is built once and then reused, so the signer set up and the
+    # client's keep-alive connection pool are shared by every phase and every
+    # concurrent operation using the same config. Lookups are thread-safe.
+    # The builder, called with the client class and the config, makes each
+    # client; replacing it (e.g. with MdsSimulator.client) changes the
+    # service the clients talk to. The default builder turns off the SDK's
+    # own retries, so that every attempt of a call goes through oci_call()
+    # and its rate limiter, and retries are not multiplied by a second layer.
+
+    def __init__(self, builder=None):
+        self._lock = threading.Lock()
+        self._clients = dict()
+        self._builder = builder
+
+    @property
+    def builder(self):
+        return self._builder
+
+    @builder.setter
+    def builder(self,builder):
+        self._builder = builder
+
+    def key(self, client_class, oci_cfg):
+        cfg_key = tuple(sorted((k, str(v)) for k, v in oci_cfg.items()))
+        return (client_class.__module__ + "." + client_class.__qualname__, cfg_key)
+
+    def get(self, client_class, oci_cfg):
+        key = self.key(client_class,oci_cfg)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if self._builder is None:
+                    client = client_class(oci_cfg,retry_strategy=oci.retry.NoneRetryStrategy())
+                else:
+                    client = self._builder(client_class,oci_cfg)
+                self._clients[key] = client
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
@@ -1,4 +1,8 @@
-import oci
+import json
+from utils.mdsimport import lazy_import
+
+hashlib = lazy_import("hashlib")
+oci = lazy_import("oci")
 
 class ConfigBuilder(object):
 
@@ -7,6 +11,8 @@ class ConfigBuilder(object):
     SOURCE = "source_value"
     SUGGESTED = "suggested_value"
     TARGET = "target_value"
+    # Freeform tag recording the content hash of a custom configuration
+    HASH_TAG = "mdsac-variables-sha256"
 
     def __init__(self,src,tgt):
 
@@ -47,6 +53,15 @@ class ConfigBuilder(object):
                 setattr(cfg,k,getattr(self._tv,k))
         return cfg
 
+    @staticmethod
+    def variables_hash(variables):
+        # A stable digest of a ConfigurationVariables object, so that two
+        # configurations with identical variables have identical hashes
+        values = dict()
+        for k in variables.attribute_map.keys():
+            values[k] = getattr(variables,k)
+        return hashlib.sha256(json.dumps(values,sort_keys=True,default=str).encode("utf-8")).hexdigest()
+
     def iterator(self):
         self._cfg_dict = dict()
         return ConfigIterator(self.__get_wip_dict())
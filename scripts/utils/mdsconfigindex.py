@@ -0,0 +1,65 @@
+class MdsConfigIndexError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+class MdsConfigIndex(object):
+    # An index over a list of configuration summaries that answers lookups by
+    # OCID, by shape and type (DEFAULT or CUSTOM), by display name and by
+    # content hash in constant time. Build it from every page of
+    # list_configurations.
+
+    # Public constants
+    DEFAULT = "DEFAULT"
+    CUSTOM = "CUSTOM"
+    HA_SUFFIX = ".HA"
+    STANDALONE_SUFFIX = ".Standalone"
+
+    def __init__(self, cfg_list, hash_tag=None):
+        self._by_id = dict()
+        self._by_hash = dict()
+        self._by_shape_type = dict()
+        self._by_name = dict()
+        for cfg in cfg_list:
+            self._by_id[cfg.id] = cfg
+            self._by_shape_type.setdefault((cfg.shape_name,cfg.type),list()).append(cfg)
+            self._by_name.setdefault(cfg.display_name,list()).append(cfg)
+            if hash_tag is not None and cfg.type == self.CUSTOM:
+                digest = (cfg.freeform_tags or dict()).get(hash_tag)
+                if digest is not None:
+                    self._by_hash.setdefault((cfg.shape_name,digest),cfg)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def by_id(self, cfg_id):
+        return self._by_id.get(cfg_id)
+
+    def by_name(self, display_name, shape_name=None):
+        for cfg in self._by_name.get(display_name,list()):
+            if shape_name is None or cfg.shape_name == shape_name:
+                return cfg
+        return None
+
+    def by_hash(self, shape_name, digest):
+        # Custom configurations are indexed by the content hash recorded in
+        # their freeform tags (see ConfigBuilder.HASH_TAG)
+        return self._by_hash.get((shape_name,digest))
+
+    def defaults(self, shape_name):
+        return self._by_shape_type.get((shape_name,self.DEFAULT),list())
+
+    def customs(self, shape_name):
+        return self._by_shape_type.get((shape_name,self.CUSTOM),list())
+
+    def default_for(self, shape_name, highly_available=False):
+        # A shape may have separate default configurations for standalone and
+        # highly available databases; prefer the one that matches.
+        defaults = self.defaults(shape_name)
+        suffix = self.HA_SUFFIX if highly_available else self.STANDALONE_SUFFIX
+        for cfg in defaults:
+            if cfg.display_name.endswith(suffix):
+                return cfg
+        if len(defaults) > 0:
+            return defaults[0]
+        return None
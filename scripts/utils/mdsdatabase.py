@@ -1,4 +1,6 @@
-import oci
+from utils.mdsimport import lazy_import
+
+oci = lazy_import("oci")
 
 class MdsDatabase:
 
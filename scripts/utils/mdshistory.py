@@ -0,0 +1,82 @@
+import contextlib
+import os
+import time
+from utils.mdscache import default_cache_dir
+from utils.mdsimport import lazy_import
+
+sqlite3 = lazy_import("sqlite3")
+statistics = lazy_import("statistics")
+
+class MdsDurationHistory(object):
+    # Durations of the lifecycle operations (backup, create, ...) of earlier
+    # runs, keyed by operation, shape and storage size, kept in an SQLite
+    # database in the cache directory. estimate() predicts how long an
+    # operation will take from the most recent runs of the same operation on
+    # the same shape and storage size. Failing that it scales the median time
+    # per GB of storage of the same operation, on the same shape if possible.
+    # The history is an optimisation only, so it never raises.
+
+    # Public constants
+    HISTORY_FILE = "history.db"
+    MAX_SAMPLES = 20
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self._path = os.path.join(cache_dir,self.HISTORY_FILE)
+        self._enabled = True
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self,enabled):
+        self._enabled = enabled
+
+    def __connect(self):
+        os.makedirs(os.path.dirname(self._path),exist_ok=True)
+        conn = sqlite3.connect(self._path,timeout=5)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS durations ("
+            "operation TEXT, shape_name TEXT, storage_gb INTEGER, "
+            "seconds REAL, recorded REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS durations_key ON durations (operation, shape_name, storage_gb, recorded)")
+        return conn
+
+    def record(self, operation, shape_name, storage_gb, seconds):
+        if not self._enabled or shape_name is None or not storage_gb:
+            return
+        try:
+            with contextlib.closing(self.__connect()) as conn, conn:
+                conn.execute("INSERT INTO durations VALUES (?, ?, ?, ?, ?)",
+                        (operation,shape_name,storage_gb,seconds,time.time()))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def __recent(self, conn, where, params):
+        query = "SELECT seconds, storage_gb FROM durations WHERE " + where + " ORDER BY recorded DESC LIMIT ?"
+        return conn.execute(query,tuple(params) + (self.MAX_SAMPLES,)).fetchall()
+
+    def estimate(self, operation, shape_name, storage_gb):
+        # Returns the expected duration in seconds, or None if there is no
+        # relevant history.
+        if not self._enabled or not storage_gb:
+            return None
+        try:
+            with contextlib.closing(self.__connect()) as conn:
+                rows = self.__recent(conn,"operation = ? AND shape_name = ? AND storage_gb = ?",(operation,shape_name,storage_gb))
+                if rows:
+                    return statistics.median(row[0] for row in rows)
+                rows = self.__recent(conn,"operation = ? AND shape_name = ?",(operation,shape_name))
+                if not rows:
+                    rows = self.__recent(conn,"operation = ?",(operation,))
+        except (OSError, sqlite3.Error):
+            return None
+        if not rows:
+            return None
+        return statistics.median(row[0] / row[1] for row in rows) * storage_gb
@@ -0,0 +1,24 @@
+import importlib.util
+import sys
+
+def lazy_import(name):
+    # Returns the named module without executing it. The module is loaded on
+    # first attribute access, so a heavy dependency (e.g. the OCI SDK) costs
+    # nothing on code paths that never use it, such as help and argument
+    # errors. A module that has already been imported is returned as is.
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named '%s'" % name,name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    # As the import system does, bind a submodule to its parent package
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent],child,module)
+    return module
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+class MdsJournalError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+class MdsJournal(object):
+    # An append-only step journal. Each line is a JSON record of the form
+    #
+    #   {"step": <name>, "status": "started" | "done", "data": {...}, "time": <epoch>}
+    #
+    # The first record is a header holding everything needed to resume the
+    # action. Every record is flushed and synced to disk before the step it
+    # describes proceeds, so after a crash the journal shows exactly which
+    # steps completed and which resources an incomplete step had created.
+
+    # Public constants
+    HEADER = "header"
+    STARTED = "started"
+    DONE = "done"
+
+    def __init__(self, fname, header=None):
+        self._fname = fname
+        self._header = None
+        self._steps = dict()
+        if os.path.isfile(fname):
+            self.__load()
+        elif header is None:
+            raise MdsJournalError("Journal %s does not exist." % fname)
+        else:
+            self.__append(self.HEADER,self.DONE,header)
+            self._header = header
+
+    def __load(self):
+        with open(self._fname,"r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A partially written final record is ignored; the step it
+                    # described is treated as not having reached that status.
+                    continue
+                if record.get("step") == self.HEADER:
+                    self._header = record.get("data")
+                else:
+                    self.__apply(record)
+        if self._header is None:
+            raise MdsJournalError("Journal %s has no header." % self._fname)
+
+    def __apply(self, record):
+        step = self._steps.setdefault(record["step"],{"status": None, "data": dict()})
+        step["status"] = record["status"]
+        step["data"].update(record.get("data") or dict())
+
+    def __append(self, step, status, data):
+        record = {"step": step, "status": status, "data": data, "time": time.time()}
+        with open(self._fname,"a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if step != self.HEADER:
+            self.__apply(record)
+
+    @property
+    def fname(self):
+        return self._fname
+
+    @property
+    def header(self):
+        return self._header
+
+    def started(self, step, **data):
+        self.__append(step,self.STARTED,data)
+
+    def done(self, step, **data):
+        self.__append(step,self.DONE,data)
+
+    def status(self, step):
+        if step not in self._steps:
+            return None
+        return self._steps[step]["status"]
+
+    def is_done(self, step):
+        return self.status(step) == self.DONE
+
+    def data(self, step):
+        if step not in self._steps:
+            return dict()
+        return dict(self._steps[step]["data"])
+
+    def completed_steps(self):
+        return [step for step in self._steps if self.is_done(step)]
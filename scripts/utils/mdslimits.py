@@ -0,0 +1,143 @@
+import os
+import time
+from utils.mdscache import default_cache_dir
+from utils.mdsimport import lazy_import
+
+asyncio = lazy_import("asyncio")
+sqlite3 = lazy_import("sqlite3")
+
+class MdsCompartmentLimiter(object):
+    # Bounds the number of operations that may run concurrently against any
+    # one compartment so that a batch stays within the service limits. The
+    # semaphores belong to the event loop that runs the batch.
+
+    def __init__(self, limit):
+        if not isinstance(limit,int) or limit < 1:
+            raise ValueError("mdscompartmentlimiter init: limit must be a positive integer")
+        self._limit = limit
+        self._semaphores = dict()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    def semaphore(self, compartment_id):
+        if compartment_id not in self._semaphores:
+            self._semaphores[compartment_id] = asyncio.Semaphore(self._limit)
+        return self._semaphores[compartment_id]
+
+
+class MdsTokenBucket(object):
+    # A token bucket that paces every OCI call made by the process so that
+    # concurrent operations share the API rate limit rather than racing into
+    # throttling. Tokens are reserved in the order they are requested, so
+    # callers are served fairly. The bucket belongs to the event loop that
+    # makes the calls.
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("mdstokenbucket init: rate must be positive")
+        if capacity is None:
+            capacity = rate
+        if capacity < 1:
+            raise ValueError("mdstokenbucket init: capacity must be at least 1")
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def reserve(self):
+        # Takes a token and returns how long the caller must wait before the
+        # token is available. The balance may go negative, which queues the
+        # reservations behind one another.
+        now = time.monotonic()
+        self._tokens = min(self._capacity,self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self._rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class MdsSharedTokenBucket(MdsTokenBucket):
+    # A token bucket whose balance is kept in an SQLite database in the cache
+    # directory, so that every mdsac process using the same cache directory
+    # (e.g. concurrent unattended runs by one user) draws on the same tokens
+    # instead of each pacing itself as if it had the whole API rate. Each
+    # reservation is one short write transaction. If the database cannot be
+    # used the bucket paces this process alone.
+
+    # Public constants
+    BUCKET_FILE = "rate-limit.db"
+
+    def __init__(self, rate, capacity=None, cache_dir=None):
+        super().__init__(rate,capacity)
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self._path = os.path.join(cache_dir,self.BUCKET_FILE)
+        self._conn = None
+        self._shared = True
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def shared(self):
+        return self._shared
+
+    def __connect(self):
+        os.makedirs(os.path.dirname(self._path),exist_ok=True)
+        # Transactions are begun explicitly. The balance is only pacing
+        # state, so it is not synced to disk.
+        conn = sqlite3.connect(self._path,timeout=5,isolation_level=None)
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("CREATE TABLE IF NOT EXISTS bucket (id INTEGER PRIMARY KEY, tokens REAL, updated REAL)")
+        return conn
+
+    def __reserve_shared(self):
+        if self._conn is None:
+            self._conn = self.__connect()
+        conn = self._conn
+        # An immediate transaction holds the write lock from the read of the
+        # balance to its update, so no two processes take the same token
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM bucket WHERE id = 1").fetchone()
+            now = time.time()
+            tokens = self._capacity
+            if row is not None:
+                tokens = min(self._capacity,row[0] + max(0.0,now - row[1]) * self._rate)
+            tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO bucket VALUES (1, ?, ?)",(tokens,now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if tokens >= 0:
+            return 0.0
+        return -tokens / self._rate
+
+    def reserve(self):
+        if self._shared:
+            try:
+                return self.__reserve_shared()
+            except (OSError, sqlite3.Error):
+                self._shared = False
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+        return super().reserve()
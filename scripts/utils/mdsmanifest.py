@@ -0,0 +1,274 @@
+import json
+from utils.mdsargs import Mdsargs
+
+class MdsManifestError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+def read_manifest(fname):
+    try:
+        with open(fname,"r") as f:
+            doc = json.load(f)
+    except (OSError, ValueError) as e:
+        raise MdsManifestError("Cannot read manifest %s: %s" % (fname,e))
+    if not isinstance(doc,dict):
+        raise MdsManifestError("The manifest must be a JSON object.")
+    return doc
+
+
+def positive_int(doc, key, default):
+    val = doc.get(key,default)
+    if not isinstance(val,int) or isinstance(val,bool) or val < 1:
+        raise MdsManifestError("Manifest %s must be a positive integer." % key)
+    return val
+
+
+def merged_items(doc, key, noun):
+    # Returns the items listed under key with the manifest defaults applied
+    defaults = doc.get("defaults",dict())
+    if not isinstance(defaults,dict):
+        raise MdsManifestError("Manifest defaults must be an object.")
+    items = doc.get(key)
+    if not isinstance(items,list) or len(items) == 0:
+        raise MdsManifestError("The manifest must list at least one %s." % noun)
+
+    result = list()
+    for item in items:
+        merged = dict(defaults)
+        if isinstance(item,dict):
+            merged.update(item)
+        else:
+            merged = item
+        result.append(merged)
+    return result
+
+
+class MdsManifestEntry(object):
+
+    def __init__(self, item):
+        if not isinstance(item,dict):
+            raise MdsManifestError("Each database in the manifest must be an object.")
+        self._action = item.get("action",Mdsargs.RESIZE)
+        self._db_ocid = item.get("db_ocid")
+        self._shape_name = item.get("shape_name")
+        self._config_id = item.get("configuration_id")
+        self._config_name = item.get("configuration_name")
+        self._display_name = item.get("display_name")
+        self._address = item.get("address")
+        self._resize_method = item.get("resize_method",Mdsargs.REBUILD)
+        self._copy_source = item.get("copy_source",Mdsargs.ONLINE)
+
+        if self._action not in (Mdsargs.RESIZE, Mdsargs.LOCAL_COPY):
+            raise MdsManifestError("Unsupported batch action, %s. Use RESIZE or LOCAL_COPY." % self._action)
+        if not isinstance(self._db_ocid,str) or len(self._db_ocid) == 0:
+            raise MdsManifestError("Each database in the manifest must have a db_ocid.")
+        if self._action == Mdsargs.RESIZE and self._shape_name is None:
+            raise MdsManifestError("A shape_name is required to resize %s." % self._db_ocid)
+        if self._config_id is not None and self._config_name is not None:
+            raise MdsManifestError("Specify either configuration_id or configuration_name for %s, not both." % self._db_ocid)
+        if self._resize_method not in (Mdsargs.INPLACE, Mdsargs.REBUILD):
+            raise MdsManifestError("Unknown resize method, %s, for %s." % (self._resize_method,self._db_ocid))
+        if self._copy_source not in (Mdsargs.COLD, Mdsargs.ONLINE, Mdsargs.LATEST, Mdsargs.PITR):
+            raise MdsManifestError("Unknown copy source, %s, for %s." % (self._copy_source,self._db_ocid))
+
+    @property
+    def action(self):
+        return self._action
+
+    @property
+    def db_ocid(self):
+        return self._db_ocid
+
+    @property
+    def shape_name(self):
+        return self._shape_name
+
+    @property
+    def config_id(self):
+        return self._config_id
+
+    @property
+    def config_name(self):
+        return self._config_name
+
+    @property
+    def display_name(self):
+        return self._display_name
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def resize_method(self):
+        return self._resize_method
+
+    @property
+    def copy_source(self):
+        return self._copy_source
+
+
+class MdsManifest(object):
+    # A manifest is a JSON document of the form:
+    #
+    # {
+    #   "max_workers": 4,
+    #   "max_per_compartment": 2,
+    #   "defaults": { "action": "RESIZE", "shape_name": "MySQL.VM.Standard.E3.2.32GB" },
+    #   "databases": [
+    #     { "db_ocid": "ocid1.mysqldbsystem..." },
+    #     { "db_ocid": "ocid1.mysqldbsystem...", "action": "LOCAL_COPY", "display_name": "test" }
+    #   ]
+    # }
+    #
+    # Values in "defaults" apply to every database unless overridden.
+
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_MAX_PER_COMPARTMENT = 2
+
+    def __init__(self, fname):
+        doc = read_manifest(fname)
+        self._max_workers = positive_int(doc,"max_workers",self.DEFAULT_MAX_WORKERS)
+        self._max_per_compartment = positive_int(doc,"max_per_compartment",self.DEFAULT_MAX_PER_COMPARTMENT)
+
+        self._entries = list()
+        seen = set()
+        for item in merged_items(doc,"databases","database"):
+            entry = MdsManifestEntry(item)
+            if entry.db_ocid in seen:
+                raise MdsManifestError("Database %s is listed more than once." % entry.db_ocid)
+            seen.add(entry.db_ocid)
+            self._entries.append(entry)
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def max_per_compartment(self):
+        return self._max_per_compartment
+
+    @property
+    def entries(self):
+        return self._entries
+
+
+class MdsCloneEntry(object):
+
+    def __init__(self, item):
+        if not isinstance(item,dict):
+            raise MdsManifestError("Each clone in the manifest must be an object.")
+        self._display_name = item.get("display_name")
+        self._address = item.get("address")
+        self._comp_ocid = item.get("compartment_id")
+        self._subnet_ocid = item.get("subnet_id")
+        self._shape_name = item.get("shape_name")
+        self._config_id = item.get("configuration_id")
+        self._config_name = item.get("configuration_name")
+
+        if not isinstance(self._display_name,str) or len(self._display_name) == 0:
+            raise MdsManifestError("Each clone in the manifest must have a display_name.")
+        if self._comp_ocid is not None and self._subnet_ocid is None:
+            raise MdsManifestError("A subnet_id is required to clone %s into another compartment." % self._display_name)
+        if self._config_id is not None and self._config_name is not None:
+            raise MdsManifestError("Specify either configuration_id or configuration_name for %s, not both." % self._display_name)
+
+    @property
+    def display_name(self):
+        return self._display_name
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def comp_ocid(self):
+        return self._comp_ocid
+
+    @property
+    def subnet_ocid(self):
+        return self._subnet_ocid
+
+    @property
+    def shape_name(self):
+        return self._shape_name
+
+    @property
+    def config_id(self):
+        return self._config_id
+
+    @property
+    def config_name(self):
+        return self._config_name
+
+    def to_dict(self):
+        return {
+            "display_name": self._display_name,
+            "address": self._address,
+            "compartment_id": self._comp_ocid,
+            "subnet_id": self._subnet_ocid,
+            "shape_name": self._shape_name,
+            "configuration_id": self._config_id,
+            "configuration_name": self._config_name}
+
+
+class MdsCloneManifest(object):
+    # A clone manifest lists the copies to create from a single backup of
+    # one database:
+    #
+    # {
+    #   "max_workers": 8,
+    #   "max_per_compartment": 4,
+    #   "backup_id": "ocid1.mysqlbackup...",
+    #   "defaults": { "shape_name": "MySQL.VM.Standard.E3.1.8GB" },
+    #   "clones": [
+    #     { "display_name": "test1", "address": "10.0.1.21" },
+    #     { "display_name": "test2", "subnet_id": "ocid1.subnet...", "compartment_id": "ocid1.compartment..." }
+    #   ]
+    # }
+    #
+    # Values in "defaults" apply to every clone unless overridden. The
+    # optional backup_id reuses an existing backup of the database instead
+    # of taking one.
+
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_MAX_PER_COMPARTMENT = 4
+
+    def __init__(self, fname):
+        doc = read_manifest(fname)
+        self._max_workers = positive_int(doc,"max_workers",self.DEFAULT_MAX_WORKERS)
+        self._max_per_compartment = positive_int(doc,"max_per_compartment",self.DEFAULT_MAX_PER_COMPARTMENT)
+        self._backup_id = doc.get("backup_id")
+        if self._backup_id is not None and (not isinstance(self._backup_id,str) or len(self._backup_id) == 0):
+            raise MdsManifestError("Manifest backup_id must be a backup OCID.")
+
+        self._entries = list()
+        names = set()
+        addresses = set()
+        for item in merged_items(doc,"clones","clone"):
+            entry = MdsCloneEntry(item)
+            if entry.display_name in names:
+                raise MdsManifestError("Clone %s is listed more than once." % entry.display_name)
+            names.add(entry.display_name)
+            if entry.address is not None:
+                if entry.address in addresses:
+                    raise MdsManifestError("Address %s is given to more than one clone." % entry.address)
+                addresses.add(entry.address)
+            self._entries.append(entry)
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def max_per_compartment(self):
+        return self._max_per_compartment
+
+    @property
+    def backup_id(self):
+        return self._backup_id
+
+    @property
+    def entries(self):
+        return self._entries
@@ -0,0 +1,172 @@
+import contextlib
+import contextvars
+import json
+import math
+import os
+import tempfile
+import time
+
+def percentile(values, p):
+    # Nearest-rank percentile of a list of numbers
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1,int(math.ceil(p / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def write_atomic(fname, text):
+    # Writes to a temporary file in the same directory and renames it into
+    # place, as the Prometheus textfile collector requires.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)),prefix=".mdsac.",suffix=".tmp")
+    try:
+        with os.fdopen(fd,"w") as f:
+            f.write(text)
+        os.replace(tmp,fname)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class MdsMetrics(object):
+    # Records the duration of each phase of a run and the latency of every
+    # OCI API call it makes. Calls are also recorded in the parent, if there
+    # is one, so that a batch's report covers the calls made for all of its
+    # databases.
+
+    # Public constants
+    OK = "ok"
+    FAILED = "failed"
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, action, parent=None):
+        self._action = action
+        self._parent = parent
+        self._started = time.time()
+        self._start = time.monotonic()
+        self._phases = list()
+        self._calls = dict()
+
+    @property
+    def action(self):
+        return self._action
+
+    @property
+    def phases(self):
+        return list(self._phases)
+
+    def begin(self, name):
+        phase = {"name": name, "start": time.monotonic(), "seconds": None, "status": None}
+        self._phases.append(phase)
+        return phase
+
+    def end(self, phase, status=OK):
+        phase["seconds"] = time.monotonic() - phase["start"]
+        phase["status"] = status
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        phase = self.begin(name)
+        try:
+            yield phase
+        except BaseException:
+            self.end(phase,self.FAILED)
+            raise
+        self.end(phase)
+
+    def record_call(self, name, seconds, failed=False):
+        call = self._calls.setdefault(name,{"count": 0, "errors": 0, "latencies": list()})
+        call["count"] += 1
+        call["latencies"].append(seconds)
+        if failed:
+            call["errors"] += 1
+        if self._parent is not None:
+            self._parent.record_call(name,seconds,failed)
+
+    def report(self, success=None):
+        totals = dict()
+        phases = list()
+        for phase in self._phases:
+            seconds = phase["seconds"]
+            if seconds is None:
+                # Still running (e.g. interrupted by an exception elsewhere)
+                seconds = time.monotonic() - phase["start"]
+            phases.append({
+                "name": phase["name"],
+                "offset": round(phase["start"] - self._start,3),
+                "seconds": round(seconds,3),
+                "status": phase["status"]})
+            totals[phase["name"]] = round(totals.get(phase["name"],0.0) + seconds,3)
+
+        calls = dict()
+        for name, call in sorted(self._calls.items()):
+            calls[name] = {"count": call["count"], "errors": call["errors"]}
+            for p in self.PERCENTILES:
+                calls[name]["p%d" % p] = round(percentile(call["latencies"],p),3)
+            calls[name]["max"] = round(max(call["latencies"]),3)
+
+        return {
+            "action": self._action,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z",time.localtime(self._started)),
+            "seconds": round(time.monotonic() - self._start,3),
+            "success": success,
+            "phases": phases,
+            "phase_totals": totals,
+            "calls": calls,
+            "call_count": sum(call["count"] for call in self._calls.values()),
+            "call_errors": sum(call["errors"] for call in self._calls.values())
+        }
+
+    def write_report(self, fname, success=None):
+        write_atomic(fname,json.dumps(self.report(success),indent=2) + "\n")
+
+    def write_prometheus(self, fname, success=None):
+        report = self.report(success)
+        action = report["action"]
+        lines = list()
+
+        def metric(name, kind, help_text, samples):
+            lines.append("# HELP %s %s" % (name,help_text))
+            lines.append("# TYPE %s %s" % (name,kind))
+            for labels, value in samples:
+                labels = dict(labels,action=action)
+                label_text = ",".join("%s=\"%s\"" % (k,labels[k]) for k in sorted(labels))
+                lines.append("%s{%s} %s" % (name,label_text,repr(float(value))))
+
+        metric("mdsac_run_duration_seconds","gauge","Duration of the last run.",
+                [({},report["seconds"])])
+        metric("mdsac_run_success","gauge","Whether the last run succeeded (1) or not (0).",
+                [({},1 if success else 0)])
+        metric("mdsac_run_timestamp_seconds","gauge","Time the last run started.",
+                [({},self._started)])
+        metric("mdsac_phase_duration_seconds","gauge","Total duration of each phase of the last run.",
+                [({"phase": name},seconds) for name, seconds in sorted(report["phase_totals"].items())])
+        metric("mdsac_api_calls","gauge","OCI API calls made by the last run.",
+                [({"method": name},call["count"]) for name, call in report["calls"].items()])
+        metric("mdsac_api_call_errors","gauge","OCI API calls made by the last run that failed.",
+                [({"method": name},call["errors"]) for name, call in report["calls"].items()])
+        samples = list()
+        for name, call in report["calls"].items():
+            for p in self.PERCENTILES:
+                samples.append(({"method": name, "quantile": "%.2f" % (p / 100.0)},call["p%d" % p]))
+        metric("mdsac_api_call_latency_seconds","gauge","OCI API call latency percentiles for the last run.",samples)
+        write_atomic(fname,"\n".join(lines) + "\n")
+
+
+class MdsMetricsContext(object):
+    # Forwards calls to the MdsMetrics bound to the current execution
+    # context, in the same way as TioContext.
+
+    def __init__(self):
+        self._current = contextvars.ContextVar("metrics")
+
+    def bind(self,metrics):
+        self._current.set(metrics)
+        return metrics
+
+    def current(self):
+        return self._current.get()
+
+    def __getattr__(self,name):
+        return getattr(self._current.get(),name)
@@ -0,0 +1,102 @@
+import json
+from utils.mdsmetrics import write_atomic
+from utils.mdswaiter import format_elapsed
+
+class MdsPlan(object):
+    # The steps an action would take, in order, without taking any of them.
+    # Each step names the OCI operation it calls (None for a local step such
+    # as writing the revert file), the request it would send as a JSON
+    # ready dict, its expected duration in seconds (None if there is no
+    # history to predict it from) and whether the source database is offline
+    # during it. A step with a condition is only taken in the circumstance
+    # the condition describes, e.g. the rebuild that follows a rejected
+    # in-place resize, so it only counts towards the worst case.
+
+    # Public constants
+    FORMAT = 1
+
+    def __init__(self, action, database):
+        self._action = action
+        self._database = database
+        self._steps = list()
+
+    @property
+    def steps(self):
+        return self._steps
+
+    def add(self, step, description, operation=None, request=None, expected=None, offline=False, condition=None):
+        self._steps.append({
+            "step": step,
+            "description": description,
+            "operation": operation,
+            "request": request,
+            "expected_seconds": expected,
+            "source_offline": offline,
+            "condition": condition})
+
+    def __total(self, steps):
+        # Returns the expected duration of the steps and how many of them
+        # could not be estimated
+        seconds = sum(step["expected_seconds"] or 0 for step in steps)
+        unknown = len([step for step in steps if step["operation"] is not None and step["expected_seconds"] is None])
+        return seconds, unknown
+
+    def __count(self, steps, operation):
+        return len([step for step in steps if step["operation"] == operation])
+
+    def to_dict(self):
+        planned = [step for step in self._steps if step["condition"] is None]
+        expected, unknown = self.__total(planned)
+        worst, worst_unknown = self.__total(self._steps)
+        offline, offline_unknown = self.__total([step for step in planned if step["source_offline"]])
+        return {
+            "format": self.FORMAT,
+            "action": self._action,
+            "database": self._database,
+            "steps": self._steps,
+            "expected_seconds": expected,
+            "unestimated_steps": unknown,
+            "worst_case_seconds": worst,
+            "worst_case_unestimated_steps": worst_unknown,
+            "source_offline_seconds": offline,
+            "source_offline_unestimated_steps": offline_unknown,
+            "backups": self.__count(planned,"create_backup"),
+            "databases_created": self.__count(planned,"create_db_system"),
+            "databases_deleted": self.__count(planned,"delete_db_system")}
+
+    def text(self):
+        plan = self.to_dict()
+
+        def duration(seconds, unknown):
+            text = format_elapsed(seconds)
+            if unknown > 0:
+                text = text + " plus %d step%s without history" % (unknown,"" if unknown == 1 else "s")
+            return text
+
+        lines = ["Plan for %s of %s (%s)" % (self._action,self._database.get("display_name"),self._database.get("id")), ""]
+        for n, step in enumerate(self._steps,1):
+            expected = "-"
+            if step["expected_seconds"] is not None:
+                expected = format_elapsed(step["expected_seconds"])
+            elif step["operation"] is not None:
+                expected = "unknown"
+            lines.append("%2d. %-20s %-26s %-12s %s" % (n,step["step"],step["operation"] or "(local)",expected,"source offline" if step["source_offline"] else ""))
+            lines.append("    %s" % (step["description"]))
+            if step["condition"] is not None:
+                lines.append("    Only %s." % (step["condition"]))
+            if step["request"] is not None:
+                for line in json.dumps(step["request"],indent=2,sort_keys=True).split("\n"):
+                    lines.append("      " + line)
+        lines.append("")
+        lines.append("Expected duration:      %s" % duration(plan["expected_seconds"],plan["unestimated_steps"]))
+        if plan["worst_case_seconds"] != plan["expected_seconds"] or plan["worst_case_unestimated_steps"] != plan["unestimated_steps"]:
+            lines.append("Worst case duration:    %s" % duration(plan["worst_case_seconds"],plan["worst_case_unestimated_steps"]))
+        lines.append("Source offline for:     %s" % duration(plan["source_offline_seconds"],plan["source_offline_unestimated_steps"]))
+        lines.append("Backups taken:          %d" % plan["backups"])
+        lines.append("Databases created:      %d" % plan["databases_created"])
+        lines.append("Databases deleted:      %d" % plan["databases_deleted"])
+        return lines
+
+    def write(self, json_fname, text_fname):
+        write_atomic(json_fname,json.dumps(self.to_dict(),indent=2,sort_keys=True) + "\n")
+        write_atomic(text_fname,"\n".join(self.text()) + "\n")
@@ -0,0 +1,81 @@
+import time
+from utils.mdsimport import lazy_import
+
+asyncio = lazy_import("asyncio")
+
+class MdsPollCoordinator(object):
+    # Coalesces the polls of many in-flight operations into one list call per
+    # compartment. A poll joins the pending batch for its key (e.g. the kind
+    # of resource and its compartment) and the batch is fetched with a single
+    # list call once the window has passed and at most once per interval, so
+    # the number of API calls grows with the number of compartments rather
+    # than the number of resources being waited on. A resource missing from
+    # the list (e.g. one that has been deleted) is read individually.
+
+    def __init__(self, interval=5.0, window=0.5):
+        if window < 0 or interval < window:
+            raise ValueError("mdspollcoordinator init: window must not be negative and interval must not be less than window")
+        self._interval = interval
+        self._window = window
+        self._batches = dict()
+        self._last_fetch = dict()
+        self._tasks = set()
+        self._list_calls = 0
+        self._get_calls = 0
+
+    @property
+    def list_calls(self):
+        return self._list_calls
+
+    @property
+    def get_calls(self):
+        return self._get_calls
+
+    async def poll(self, key, resource_id, list_all, get_one):
+        # list_all is a callable returning an awaitable list of (summary)
+        # models for the key, and get_one a callable taking a resource id and
+        # returning an awaitable model for it. Returns the resource's model.
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = dict()
+            self._batches[key] = batch
+            task = loop.create_task(self.__fetch(key,list_all,get_one))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.setdefault(resource_id,list()).append(future)
+        return await future
+
+    async def __fetch(self, key, list_all, get_one):
+        delay = max(self._window,self._last_fetch.get(key,0.0) + self._interval - time.monotonic())
+        await asyncio.sleep(delay)
+        batch = self._batches.pop(key)
+        self._last_fetch[key] = time.monotonic()
+        try:
+            self._list_calls += 1
+            items = dict((item.id, item) for item in await list_all())
+        except Exception as e:
+            for futures in batch.values():
+                self.__resolve(futures,exception=e)
+            return
+
+        for resource_id, futures in batch.items():
+            if resource_id in items:
+                self.__resolve(futures,result=items[resource_id])
+                continue
+            try:
+                self._get_calls += 1
+                self.__resolve(futures,result=await get_one(resource_id))
+            except Exception as e:
+                self.__resolve(futures,exception=e)
+
+    def __resolve(self, futures, result=None, exception=None):
+        for future in futures:
+            # A waiter that has been cancelled no longer wants the result
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
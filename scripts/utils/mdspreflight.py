@@ -0,0 +1,142 @@
+import ipaddress
+from utils.mdsimport import lazy_import
+
+asyncio = lazy_import("asyncio")
+
+# The MySQL service limit on the storage of every database in a region
+STORAGE_LIMIT_NAME = "total-storage-gb"
+
+class MdsPreflightError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+class MdsPlannedDatabase(object):
+    # A database that an action is about to create or change. shape_name is
+    # the shape it will take up a new instance of, or None if it takes up no
+    # more of its shape (e.g. it is resized to the shape it already has), and
+    # storage_gb is the storage it adds. An address of None is assigned by
+    # OCI or already belongs to the database.
+
+    def __init__(self, comp_id, subnet_id, shape_name=None, storage_gb=0, highly_available=False, address=None):
+        self._comp_id = comp_id
+        self._subnet_id = subnet_id
+        self._shape_name = shape_name
+        self._storage_gb = storage_gb or 0
+        self._instances = 3 if highly_available else 1
+        self._address = address
+
+    @property
+    def comp_id(self):
+        return self._comp_id
+
+    @property
+    def subnet_id(self):
+        return self._subnet_id
+
+    @property
+    def shape_name(self):
+        return self._shape_name
+
+    @property
+    def storage_gb(self):
+        return self._storage_gb
+
+    @property
+    def instances(self):
+        return self._instances
+
+    @property
+    def address(self):
+        return self._address
+
+
+def shape_limit_key(shape_name):
+    # MySQL service limits name shapes without the MySQL prefix and with
+    # dashes, e.g. MySQL.VM.Standard.E3.1.8GB is vm-standard-e3-1-8gb.
+    key = shape_name.lower()
+    if key.startswith("mysql."):
+        key = key[len("mysql."):]
+    return key.replace(".","-")
+
+
+def shape_limit_name(shape_name):
+    # The MySQL service limit on the number of instances of a shape
+    return shape_limit_key(shape_name) + "-count"
+
+
+def check_subnet_address(address, subnet):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        raise MdsPreflightError("%s is not a valid IP address." % address)
+    if subnet.cidr_block is not None and ip not in ipaddress.ip_network(subnet.cidr_block):
+        raise MdsPreflightError("IP address %s is outside subnet %s (%s)." % (address,subnet.display_name,subnet.cidr_block))
+
+
+def free_addresses(subnet, in_use, count=1):
+    # Returns up to count of the highest addresses in the subnet that are not
+    # in use, highest first. OCI reserves the first two and the last address
+    # of a subnet and assigns addresses from the bottom, so the top of the
+    # range is least contended.
+    if subnet.cidr_block is None:
+        raise MdsPreflightError("Subnet %s has no IPv4 CIDR block." % subnet.display_name)
+    network = ipaddress.ip_network(subnet.cidr_block)
+    used = set(ipaddress.ip_address(address) for address in in_use)
+    addresses = list()
+    address = network.broadcast_address - 1
+    while address > network.network_address + 1 and len(addresses) < count:
+        if address not in used:
+            addresses.append(str(address))
+        address -= 1
+    if not addresses:
+        raise MdsPreflightError("Subnet %s has no free IP address." % subnet.display_name)
+    return addresses
+
+
+def limit_demand(limit_name, planned):
+    # Returns how much of the named service limit the planned databases
+    # need, or None if they need none of it. Limit names are matched
+    # exactly, so that no demand is counted against a limit that merely
+    # shares a prefix with the one it belongs to.
+    name = limit_name.lower()
+    if name == STORAGE_LIMIT_NAME:
+        demand = sum(db.storage_gb * db.instances for db in planned)
+    else:
+        demand = sum(db.instances for db in planned
+                if db.shape_name is not None and shape_limit_name(db.shape_name) == name)
+    if demand == 0:
+        return None
+    return demand
+
+
+class MdsPreflight(object):
+    # Runs independent checks concurrently. A check is a coroutine that
+    # raises MdsPreflightError for a problem and may return a warning. Every
+    # check is run to completion, so all of the problems with a plan are
+    # reported together rather than one per attempt.
+
+    def __init__(self):
+        self._checks = list()
+
+    def add(self, check):
+        self._checks.append(check)
+
+    async def run(self):
+        # Returns the warnings, or raises MdsPreflightError listing every
+        # problem found
+        checks = self._checks
+        self._checks = list()
+        results = await asyncio.gather(*checks,return_exceptions=True)
+        problems = list()
+        warnings = list()
+        for result in results:
+            if isinstance(result,MdsPreflightError):
+                problems.append(result.__str__())
+            elif isinstance(result,BaseException):
+                raise result
+            elif result is not None:
+                warnings.append(result)
+        if problems:
+            raise MdsPreflightError("Pre-flight checks failed:\n  " + "\n  ".join(problems))
+        return warnings
@@ -0,0 +1,55 @@
+import random
+from utils.mdsimport import lazy_import
+
+oci = lazy_import("oci")
+uuid = lazy_import("uuid")
+
+def retry_token():
+    # An opc-retry-token for a non-idempotent request. The same token must be
+    # sent with every attempt of the request so that the service applies it
+    # at most once.
+    return uuid.uuid4().hex
+
+
+class MdsRetryPolicy(object):
+    # Decides which failed OCI calls are retried and how long to wait before
+    # each retry. Throttling (429), transient service errors (5xx) and
+    # connection failures are retried with exponential backoff and jitter;
+    # anything else is returned to the caller immediately. A Retry-After
+    # header from the service takes precedence over the backoff.
+
+    def __init__(self, max_attempts=8, first_delay=1.0, max_delay=60.0, backoff=2.0, jitter=0.2):
+        if max_attempts < 1:
+            raise ValueError("mdsretrypolicy init: max_attempts must be at least 1")
+        if first_delay <= 0 or max_delay < first_delay:
+            raise ValueError("mdsretrypolicy init: delays must be positive and max_delay must not be less than first_delay")
+        if jitter < 0.0 or jitter >= 1.0:
+            raise ValueError("mdsretrypolicy init: jitter must be in the range [0.0, 1.0)")
+        self._max_attempts = max_attempts
+        self._first_delay = first_delay
+        self._max_delay = max_delay
+        self._backoff = backoff
+        self._jitter = jitter
+
+    @property
+    def max_attempts(self):
+        return self._max_attempts
+
+    def retryable(self, e):
+        if isinstance(e,oci.exceptions.ServiceError):
+            return e.status == 429 or e.status >= 500
+        return isinstance(e,(oci.exceptions.RequestException, ConnectionError))
+
+    def delay(self, attempt, e=None):
+        # attempt is the number of attempts made so far
+        retry_after = None
+        headers = getattr(e,"headers",None)
+        if headers:
+            retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after),self._max_delay)
+            except ValueError:
+                pass
+        delay = min(self._first_delay * (self._backoff ** (attempt - 1)),self._max_delay)
+        return delay * random.uniform(1.0 - self._jitter,1.0 + self._jitter)
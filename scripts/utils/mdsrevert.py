@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+from utils.mdsimport import lazy_import
+
+sqlite3 = lazy_import("sqlite3")
+
+class MdsRevertError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+def write_revert_file(fname, doc):
+    # The document is written to a temporary file in the same directory and
+    # renamed over fname, so fname only ever holds a complete document.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)),prefix=".revert.",suffix=".tmp")
+    try:
+        with os.fdopen(fd,"w") as f:
+            json.dump(doc,f,indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp,fname)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_revert_file(fname):
+    # Returns the revert document, or raises MdsRevertError if the action
+    # that wrote it did not complete.
+    try:
+        with open(fname,"r") as f:
+            doc = json.load(f)
+    except ValueError:
+        raise MdsRevertError("Revert file %s is not valid JSON." % fname)
+    if not isinstance(doc,dict) or "metadata" not in doc:
+        raise MdsRevertError("Revert file %s is incomplete; the action that wrote it did not finish." % fname)
+    return doc
+
+
+class MdsRevertIndex(object):
+    # A SQLite index of the revert files in a directory and its immediate
+    # sub-directories (where BATCH writes them). Each file is keyed by the
+    # OCID and display name of the database it reverts and the time it was
+    # created. refresh() only parses files that are new or have changed
+    # since they were last indexed.
+
+    # Public constants
+    INDEX_FILE = "revert-index.db"
+
+    def __init__(self, directory):
+        self._directory = directory
+        self._conn = sqlite3.connect(os.path.join(directory,self.INDEX_FILE))
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS revert_files ("
+                "fname TEXT PRIMARY KEY, mtime REAL, db_ocid TEXT, "
+                "source_ocid TEXT, display_name TEXT, created TEXT)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS revert_files_db_ocid ON revert_files (db_ocid, created)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS revert_files_display_name ON revert_files (display_name, created)")
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def close(self):
+        self._conn.close()
+
+    def __revert_files(self):
+        dirs = [self._directory]
+        for entry in os.scandir(self._directory):
+            if entry.is_dir():
+                dirs.append(entry.path)
+        for dirname in dirs:
+            for entry in os.scandir(dirname):
+                if entry.name.startswith("revert.") and entry.is_file():
+                    yield entry.path
+
+    def add(self, fname, doc):
+        # Incomplete documents are indexed too, without keys, so that they
+        # are not parsed again until they change.
+        db_ocid = source_ocid = display_name = created = None
+        if doc is not None:
+            db_ocid = doc["metadata"]["to"]["id"]
+            source_ocid = doc["database"]["id"]
+            display_name = doc["metadata"]["display_name"]
+            created = doc["metadata"]["created"]
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO revert_files VALUES (?, ?, ?, ?, ?, ?)",
+                (fname,os.stat(fname).st_mtime,db_ocid,source_ocid,display_name,created))
+
+    def refresh(self):
+        known = dict(self._conn.execute("SELECT fname, mtime FROM revert_files"))
+        seen = set()
+        for fname in self.__revert_files():
+            seen.add(fname)
+            if known.get(fname) == os.stat(fname).st_mtime:
+                continue
+            try:
+                self.add(fname,read_revert_file(fname))
+            except (KeyError, MdsRevertError):
+                self.add(fname,None)
+        with self._conn:
+            for fname in set(known) - seen:
+                self._conn.execute("DELETE FROM revert_files WHERE fname = ?",(fname,))
+
+    def latest(self, db_ocid=None, display_name=None):
+        # Returns the name of the most recent complete revert file for the
+        # database with the given OCID and/or display name, or None.
+        if db_ocid is None and display_name is None:
+            raise MdsRevertError("A database OCID or display name is required to find a revert file.")
+        query = "SELECT fname FROM revert_files WHERE created IS NOT NULL"
+        params = list()
+        if db_ocid is not None:
+            query = query + " AND db_ocid = ?"
+            params.append(db_ocid)
+        if display_name is not None:
+            query = query + " AND display_name = ?"
+            params.append(display_name)
+        row = self._conn.execute(query + " ORDER BY created DESC LIMIT 1",params).fetchone()
+        if row is None:
+            return None
+        return row[0]
@@ -0,0 +1,762 @@
+import copy
+import datetime
+import itertools
+import oci
+import threading
+import time
+from utils.mdspreflight import STORAGE_LIMIT_NAME
+from utils.mdspreflight import shape_limit_name
+
+# An OCI config that passes the SDK's validation. It is only used to build
+# the simulated clients and is never used to sign a request.
+SIM_CONFIG = {
+    "user": "ocid1.user.oc1..simulated",
+    "fingerprint": ":".join(["00"] * 16),
+    "key_file": "/dev/null",
+    "tenancy": "ocid1.tenancy.oc1..simulated",
+    "region": "sim-region-1"
+}
+
+
+def summarize(model, summary_class):
+    # Builds a summary model (e.g. DbSystemSummary) from the attributes it
+    # shares with the full model.
+    summary = summary_class()
+    for attr in summary.swagger_types:
+        if hasattr(model,attr):
+            setattr(summary,attr,getattr(model,attr))
+    return summary
+
+
+class MdsSimClient(object):
+    # A simulated service client. Every method of the simulator that the
+    # real client class also has is available on it, so it can be used
+    # wherever mdsac uses the real client.
+
+    def __init__(self, simulator, client_class, oci_cfg):
+        self._simulator = simulator
+        self._client_class = client_class
+        # A real client provides the (de)serialisation used by the catalog
+        # cache and the journal. It is never used to make a request.
+        self.base_client = client_class(oci_cfg,signer=object()).base_client
+
+    def __getattr__(self,name):
+        if not hasattr(self._client_class,name) or not hasattr(self._simulator,"op_" + name):
+            raise AttributeError("%s has no simulated operation %s" % (self._client_class.__name__,name))
+        operation = getattr(self._simulator,"op_" + name)
+
+        def method(*args, **kwargs):
+            return self._simulator.call(name,operation,*args,**kwargs)
+        # Named like the real method, for the metrics and run reports
+        method.__name__ = name
+        return method
+
+
+class MdsSimulator(object):
+    # An in-process fake of the parts of the OCI MySQL (including inbound
+    # replication channels), Identity, Limits and Virtual Network services
+    # that mdsac uses, for running whole actions offline in
+    # seconds. Resources move through their lifecycle states once the
+    # configured latencies have passed; the states are brought up to date on
+    # each call, so no background thread is needed. Calls can be made to fail
+    # (fail()), throttled (throttle()) and delayed (call_latency), and
+    # lifecycle operations can be made to end in the FAILED state
+    # (fail_lifecycle()). Requests with an opc_retry_token are applied at most
+    # once. calls counts the calls of each method and transitions records how
+    # long each lifecycle transition went unseen by the caller. Service
+    # limits are unlimited unless set with set_limit(). Addresses can be
+    # taken without appearing among a subnet's private IPs (reserve_address())
+    # and channel statuses can be made to stop refreshing (stale_channels()).
+    # install() makes a MdsClientFactory build simulated clients.
+
+    # Public constants
+    DEFAULT_LATENCIES = {
+        "backup": 2.0,
+        "create": 3.0,
+        "delete": 1.0,
+        "shutdown": 1.0,
+        "start": 1.0,
+        "update": 2.0,
+        "channel": 1.0
+    }
+    DEFAULT_SHAPES = (
+        ("MySQL.VM.Standard.E3.1.8GB", 1, 8),
+        ("MySQL.VM.Standard.E3.1.16GB", 1, 16),
+        ("MySQL.VM.Standard.E3.2.32GB", 2, 32),
+        ("MySQL.VM.Standard.E3.4.64GB", 4, 64),
+        ("MySQL.VM.Standard.E3.8.128GB", 8, 128)
+    )
+
+    def __init__(self, latencies=None, call_latency=0.0, page_size=50):
+        self._latencies = dict(self.DEFAULT_LATENCIES)
+        if latencies is not None:
+            self._latencies.update(latencies)
+        self._call_latency = call_latency
+        self._page_size = page_size
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._db_systems = dict()
+        self._backups = dict()
+        self._configurations = dict()
+        self._shapes = list()
+        self._compartments = dict()
+        self._subnets = dict()
+        self._limits = dict()
+        self._work_requests = dict()
+        self._channels = dict()
+        self._reserved = set()
+        self._stale_channels = False
+        self._transitions = list()
+        self._history = list()
+        self._unobserved = dict()
+        self._failures = dict()
+        self._failed_lifecycles = dict()
+        self._retry_tokens = dict()
+        self._throttle = None
+        self._calls = dict()
+
+    # Set up and inspection
+
+    def install(self, factory):
+        factory.clear()
+        factory.builder = self.client
+        return factory
+
+    def client(self, client_class, oci_cfg):
+        return MdsSimClient(self,client_class,oci_cfg)
+
+    @property
+    def calls(self):
+        with self._lock:
+            return dict(self._calls)
+
+    @property
+    def transitions(self):
+        # The lifecycle transitions that have happened. waste is the time
+        # from the transition until a call first returned the resource in its
+        # new state (None if no call has yet).
+        with self._lock:
+            self.__advance()
+            return [{
+                "operation": t["operation"],
+                "resource_id": t["resource_id"],
+                "latency": t["latency"],
+                "waste": None if t["observed"] is None else t["observed"] - t["due"]
+            } for t in self._history]
+
+    def latency(self, operation, seconds):
+        self._latencies[operation] = seconds
+
+    def fail(self, method, status=500, count=1, code="InternalServerError", message=None):
+        # The next count calls of method raise a ServiceError with status
+        with self._lock:
+            self._failures.setdefault(method,list()).extend([(status,code,message)] * count)
+
+    def fail_lifecycle(self, operation, count=1):
+        # The next count operations (e.g. "backup") end in the FAILED state
+        with self._lock:
+            self._failed_lifecycles[operation] = self._failed_lifecycles.get(operation,0) + count
+
+    def reserve_address(self, address):
+        # The address is in use, e.g. by an endpoint that is not listed among
+        # the subnet's private IPs, so it cannot be given to a database
+        with self._lock:
+            self._reserved.add(address)
+
+    def stale_channels(self, stale=True):
+        # Channel statuses are no longer regenerated, so every status read is
+        # the one gathered when the channel was created
+        with self._lock:
+            self._stale_channels = stale
+
+    def throttle(self, rate, burst=None):
+        # Calls beyond rate per second (after a burst) raise a 429. A rate of
+        # None removes the throttle.
+        with self._lock:
+            if rate is None:
+                self._throttle = None
+            else:
+                self._throttle = {"rate": rate, "burst": burst or rate, "tokens": burst or rate, "updated": time.monotonic()}
+
+    def add_compartment(self, name):
+        compartment = oci.identity.models.Compartment(
+            id = self.__new_id("compartment"),
+            name = name,
+            lifecycle_state = oci.identity.models.Compartment.LIFECYCLE_STATE_ACTIVE)
+        self._compartments[compartment.id] = compartment
+        return compartment.id
+
+    def set_limit(self, name, value, scope_type="REGION"):
+        # A MySQL service limit, e.g. vm-standard-e3-1-8gb-count or
+        # total-storage-gb. Its usage is that of every database not deleted.
+        definition = oci.limits.models.LimitDefinitionSummary(
+            name = name,
+            service_name = "mysql",
+            scope_type = scope_type,
+            is_resource_availability_supported = True,
+            is_deprecated = False)
+        self._limits[name] = (definition,value)
+
+    def add_subnet(self, compartment_id, name, cidr_block="10.0.0.0/16", availability_domain=None):
+        subnet = oci.core.models.Subnet(
+            id = self.__new_id("subnet"),
+            compartment_id = compartment_id,
+            display_name = name,
+            cidr_block = cidr_block,
+            availability_domain = availability_domain,
+            lifecycle_state = oci.core.models.Subnet.LIFECYCLE_STATE_AVAILABLE)
+        self._subnets[subnet.id] = subnet
+        return subnet.id
+
+    def add_shape(self, name, cpu_core_count, memory_size_in_gbs):
+        self._shapes.append(oci.mysql.models.ShapeSummary(
+            name = name,
+            cpu_core_count = cpu_core_count,
+            memory_size_in_gbs = memory_size_in_gbs,
+            is_supported_for = ["DBSYSTEM"]))
+
+    def add_configuration(self, compartment_id, shape_name, display_name, variables=None, config_type=oci.mysql.models.Configuration.TYPE_DEFAULT, freeform_tags=None):
+        cfg = oci.mysql.models.Configuration(
+            id = self.__new_id("mysqlconfiguration"),
+            compartment_id = compartment_id,
+            shape_name = shape_name,
+            display_name = display_name,
+            description = display_name,
+            type = config_type,
+            variables = variables or oci.mysql.models.ConfigurationVariables(),
+            freeform_tags = freeform_tags or dict(),
+            defined_tags = dict(),
+            lifecycle_state = oci.mysql.models.Configuration.LIFECYCLE_STATE_ACTIVE,
+            time_created = self.__now())
+        self._configurations[cfg.id] = cfg
+        return cfg.id
+
+    def add_db_system(self, compartment_id, subnet_id, shape_name, configuration_id, display_name, storage_gb=50, is_highly_available=False, pitr=False):
+        db = oci.mysql.models.DbSystem(
+            id = self.__new_id("mysqldbsystem"),
+            display_name = display_name,
+            description = None,
+            compartment_id = compartment_id,
+            subnet_id = subnet_id,
+            availability_domain = "SIM:AD-1",
+            fault_domain = "FAULT-DOMAIN-1",
+            shape_name = shape_name,
+            configuration_id = configuration_id,
+            data_storage_size_in_gbs = storage_gb,
+            hostname_label = None,
+            ip_address = self.__new_address(),
+            is_highly_available = is_highly_available,
+            database_mode = oci.mysql.models.DbSystem.DATABASE_MODE_READ_WRITE,
+            mysql_version = "8.0.35",
+            port = 3306,
+            port_x = 33060,
+            backup_policy = oci.mysql.models.BackupPolicy(
+                is_enabled = True,
+                window_start_time = "00:00",
+                retention_in_days = 7,
+                defined_tags = dict(),
+                freeform_tags = dict(),
+                pitr_policy = oci.mysql.models.PitrPolicy(is_enabled = pitr)),
+            maintenance = oci.mysql.models.MaintenanceDetails(window_start_time = "SUNDAY 00:00"),
+            defined_tags = dict(),
+            freeform_tags = dict(),
+            lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE,
+            time_created = self.__now(),
+            time_updated = self.__now())
+        self._db_systems[db.id] = db
+        return db.id
+
+    def seed(self, databases=1, compartments=1, storage_gb=50):
+        # A typical tenancy: the default shapes, each with standalone and HA
+        # default configurations, and databases spread across compartments.
+        # Returns the OCIDs of the databases.
+        for name, cpus, memory in self.DEFAULT_SHAPES:
+            self.add_shape(name,cpus,memory)
+        db_ids = list()
+        for c in range(compartments):
+            comp_id = self.add_compartment("compartment-%d" % c)
+            subnet_id = self.add_subnet(comp_id,"subnet-%d" % c)
+            for name, cpus, memory in self.DEFAULT_SHAPES:
+                for suffix in (".Standalone", ".HA"):
+                    self.add_configuration(comp_id,name,name + suffix,oci.mysql.models.ConfigurationVariables(
+                        innodb_buffer_pool_size = memory * 1024 * 1024 * 1024 * 3 // 4,
+                        max_connections = 1000 * cpus))
+        compartment_ids = list(self._compartments)
+        shape_name = self.DEFAULT_SHAPES[0][0]
+        for n in range(databases):
+            comp_id = compartment_ids[n % compartments]
+            subnet_id = [s.id for s in self._subnets.values() if s.compartment_id == comp_id][0]
+            cfg_id = [c.id for c in self._configurations.values() if c.compartment_id == comp_id and c.display_name == shape_name + ".Standalone"][0]
+            db_ids.append(self.add_db_system(comp_id,subnet_id,shape_name,cfg_id,"db-%03d" % n,storage_gb))
+        return db_ids
+
+    # Call handling
+
+    def call(self, method, operation, *args, **kwargs):
+        if self._call_latency > 0:
+            time.sleep(self._call_latency)
+        with self._lock:
+            self._calls[method] = self._calls.get(method,0) + 1
+            self.__check_throttle(method)
+            failures = self._failures.get(method)
+            if failures:
+                status, code, message = failures.pop(0)
+                raise self.__error(status,code,message or "Simulated failure of %s." % method)
+            token = kwargs.pop("opc_retry_token",None)
+            if token is not None and (method, token) in self._retry_tokens:
+                return self._retry_tokens[(method,token)]
+            self.__advance()
+            result = operation(*args,**kwargs)
+            # Like the real SDK, each response holds its own copy of the
+            # data, so a caller never sees a later change to a resource
+            # without reading it again
+            if isinstance(result,oci.response.Response):
+                response = oci.response.Response(result.status,result.headers,copy.deepcopy(result.data),None)
+            else:
+                response = oci.response.Response(200,dict(),copy.deepcopy(result),None)
+            if token is not None:
+                self._retry_tokens[(method,token)] = response
+            self.__observe(response.data)
+            return response
+
+    def __check_throttle(self, method):
+        if self._throttle is None:
+            return
+        bucket = self._throttle
+        now = time.monotonic()
+        bucket["tokens"] = min(bucket["burst"],bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+        bucket["updated"] = now
+        if bucket["tokens"] < 1:
+            retry_after = (1 - bucket["tokens"]) / bucket["rate"]
+            raise self.__error(429,"TooManyRequests","Simulated throttling of %s." % method,{"retry-after": "%.3f" % retry_after})
+        bucket["tokens"] -= 1
+
+    def __error(self, status, code, message, headers=None):
+        return oci.exceptions.ServiceError(status,code,headers or dict(),message)
+
+    def __not_found(self, ocid):
+        return self.__error(404,"NotAuthorizedOrNotFound","Resource %s not found." % ocid)
+
+    def __conflict(self, ocid, state):
+        return self.__error(409,"IncorrectState","Resource %s is in state %s." % (ocid,state))
+
+    def __new_id(self, kind):
+        return "ocid1.%s.oc1..sim%06d" % (kind,next(self._ids))
+
+    def __new_address(self):
+        n = next(self._ids)
+        return "10.0.%d.%d" % ((n // 250) % 250,n % 250 + 2)
+
+    def __now(self):
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def __schedule(self, operation, resource_id, apply, fail=None):
+        # Runs apply once the operation's latency has passed, or fail if the
+        # operation has been set to fail.
+        if self._failed_lifecycles.get(operation,0) > 0 and fail is not None:
+            self._failed_lifecycles[operation] -= 1
+            apply = fail
+        latency = self._latencies.get(operation,0.0)
+        self._transitions.append({
+            "operation": operation,
+            "resource_id": resource_id,
+            "latency": latency,
+            "due": time.monotonic() + latency,
+            "apply": apply,
+            "observed": None})
+
+    def __advance(self):
+        now = time.monotonic()
+        due = [t for t in self._transitions if t["due"] <= now]
+        self._transitions = [t for t in self._transitions if t["due"] > now]
+        for transition in sorted(due,key=lambda t: t["due"]):
+            transition.pop("apply")()
+            self._history.append(transition)
+            self._unobserved[transition["resource_id"]] = transition
+
+    def __observe(self, data):
+        if not self._unobserved or data is None:
+            return
+        now = time.monotonic()
+        for item in (data if isinstance(data,list) else [data]):
+            transition = self._unobserved.pop(getattr(item,"id",None),None)
+            if transition is not None:
+                transition["observed"] = now
+
+    def __set_state(self, model, state):
+        def apply():
+            model.lifecycle_state = state
+            if hasattr(model,"time_updated"):
+                model.time_updated = self.__now()
+        return apply
+
+    def __page(self, items, page=None, limit=None):
+        start = int(page) if page else 0
+        size = min(limit or self._page_size,self._page_size)
+        headers = dict()
+        if start + size < len(items):
+            headers["opc-next-page"] = str(start + size)
+        return oci.response.Response(200,headers,items[start:start + size],None)
+
+    def __db_system(self, db_system_id):
+        db = self._db_systems.get(db_system_id)
+        if db is None:
+            raise self.__not_found(db_system_id)
+        return db
+
+    def __check_address(self, address):
+        if address is None:
+            return
+        if address in self._reserved:
+            raise self.__error(409,"Conflict","IP address %s is in use." % address)
+        for db in self._db_systems.values():
+            if db.ip_address == address and db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED:
+                raise self.__error(409,"Conflict","IP address %s is in use." % address)
+
+    def __channel(self, channel_id):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            raise self.__not_found(channel_id)
+        return channel
+
+    def __backup(self, backup_id):
+        backup = self._backups.get(backup_id)
+        if backup is None:
+            raise self.__not_found(backup_id)
+        return backup
+
+    # DbSystemClient
+
+    def op_get_db_system(self, db_system_id, **kwargs):
+        return self.__db_system(db_system_id)
+
+    def op_list_db_systems(self, compartment_id, page=None, limit=None, lifecycle_state=None, **kwargs):
+        items = [summarize(db,oci.mysql.models.DbSystemSummary) for db in self._db_systems.values()
+                if db.compartment_id == compartment_id and (lifecycle_state is None or db.lifecycle_state == lifecycle_state)]
+        return self.__page(items,page,limit)
+
+    def op_create_db_system(self, details, **kwargs):
+        backup = None
+        source_db = None
+        if isinstance(details.source,oci.mysql.models.CreateDbSystemSourceFromBackupDetails):
+            backup = self.__backup(details.source.backup_id)
+            if backup.lifecycle_state != oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE:
+                raise self.__conflict(backup.id,backup.lifecycle_state)
+        elif isinstance(details.source,oci.mysql.models.CreateDbSystemSourceFromPitrDetails):
+            source_db = self.__db_system(details.source.db_system_id)
+        self.__check_address(details.ip_address)
+        storage_gb = details.data_storage_size_in_gbs
+        if storage_gb is None and backup is not None:
+            storage_gb = backup.data_storage_size_in_gbs
+        if storage_gb is None and source_db is not None:
+            storage_gb = source_db.data_storage_size_in_gbs
+        db = oci.mysql.models.DbSystem(
+            id = self.__new_id("mysqldbsystem"),
+            display_name = details.display_name,
+            description = details.description,
+            compartment_id = details.compartment_id,
+            subnet_id = details.subnet_id,
+            availability_domain = details.availability_domain,
+            fault_domain = details.fault_domain or "FAULT-DOMAIN-1",
+            shape_name = details.shape_name,
+            configuration_id = details.configuration_id,
+            data_storage_size_in_gbs = storage_gb or 50,
+            hostname_label = details.hostname_label,
+            ip_address = details.ip_address or self.__new_address(),
+            is_highly_available = details.is_highly_available,
+            database_mode = details.database_mode or oci.mysql.models.DbSystem.DATABASE_MODE_READ_WRITE,
+            mysql_version = details.mysql_version,
+            port = details.port or 3306,
+            port_x = details.port_x or 33060,
+            backup_policy = oci.mysql.models.BackupPolicy(
+                is_enabled = details.backup_policy.is_enabled if details.backup_policy else True,
+                window_start_time = details.backup_policy.window_start_time if details.backup_policy else "00:00",
+                retention_in_days = details.backup_policy.retention_in_days if details.backup_policy else 7,
+                defined_tags = dict(),
+                freeform_tags = dict(),
+                pitr_policy = oci.mysql.models.PitrPolicy(is_enabled = False)),
+            maintenance = oci.mysql.models.MaintenanceDetails(
+                window_start_time = details.maintenance.window_start_time if details.maintenance else "SUNDAY 00:00"),
+            defined_tags = details.defined_tags or dict(),
+            freeform_tags = details.freeform_tags or dict(),
+            lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_CREATING,
+            time_created = self.__now(),
+            time_updated = self.__now())
+        self._db_systems[db.id] = db
+        self.__schedule("create",db.id,
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE),
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_FAILED))
+        return db
+
+    def op_stop_db_system(self, db_system_id, details, **kwargs):
+        db = self.__db_system(db_system_id)
+        if db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE:
+            raise self.__conflict(db.id,db.lifecycle_state)
+        db.lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING
+        self.__schedule("shutdown",db.id,
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_INACTIVE),
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_FAILED))
+        return None
+
+    def op_start_db_system(self, db_system_id, **kwargs):
+        db = self.__db_system(db_system_id)
+        if db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_INACTIVE:
+            raise self.__conflict(db.id,db.lifecycle_state)
+        db.lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING
+        self.__schedule("start",db.id,
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE),
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_FAILED))
+        return None
+
+    def op_update_db_system(self, db_system_id, details, **kwargs):
+        db = self.__db_system(db_system_id)
+        if db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE:
+            raise self.__conflict(db.id,db.lifecycle_state)
+        if details.ip_address != db.ip_address:
+            self.__check_address(details.ip_address)
+        db.lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_UPDATING
+        work_request = oci.mysql.models.WorkRequest(
+            id = self.__new_id("mysqlworkrequest"),
+            operation_type = "UPDATE_DBSYSTEM",
+            status = oci.mysql.models.WorkRequest.STATUS_IN_PROGRESS,
+            compartment_id = db.compartment_id,
+            percent_complete = 0.0,
+            time_accepted = self.__now())
+        self._work_requests[work_request.id] = work_request
+
+        def apply():
+            if details.shape_name is not None:
+                db.shape_name = details.shape_name
+            if details.configuration_id is not None:
+                db.configuration_id = details.configuration_id
+            for attr in ("ip_address", "display_name", "database_mode"):
+                if getattr(details,attr) is not None:
+                    setattr(db,attr,getattr(details,attr))
+            db.time_updated = self.__now()
+            db.lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE
+            work_request.status = oci.mysql.models.WorkRequest.STATUS_SUCCEEDED
+            work_request.percent_complete = 100.0
+
+        def fail():
+            db.lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE
+            work_request.status = oci.mysql.models.WorkRequest.STATUS_FAILED
+
+        self.__schedule("update",work_request.id,apply,fail)
+        return oci.response.Response(202,{"opc-work-request-id": work_request.id},None,None)
+
+    def op_delete_db_system(self, db_system_id, **kwargs):
+        db = self.__db_system(db_system_id)
+        if db.lifecycle_state in (oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETING, oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED):
+            raise self.__conflict(db.id,db.lifecycle_state)
+        db.lifecycle_state = oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETING
+        self.__schedule("delete",db.id,
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED),
+                self.__set_state(db,oci.mysql.models.DbSystem.LIFECYCLE_STATE_FAILED))
+        return None
+
+    # DbBackupsClient
+
+    def op_get_backup(self, backup_id, **kwargs):
+        return self.__backup(backup_id)
+
+    def op_list_backups(self, compartment_id, page=None, limit=None, db_system_id=None, lifecycle_state=None, creation_type=None, sort_by=None, sort_order=None, **kwargs):
+        backups = [b for b in self._backups.values()
+                if b.compartment_id == compartment_id
+                and (db_system_id is None or b.db_system_id == db_system_id)
+                and (lifecycle_state is None or b.lifecycle_state == lifecycle_state)
+                and (creation_type is None or b.creation_type == creation_type)]
+        backups.sort(key=lambda b: b.time_created,reverse=(sort_order == "DESC"))
+        return self.__page([summarize(b,oci.mysql.models.BackupSummary) for b in backups],page,limit)
+
+    def op_create_backup(self, details, **kwargs):
+        db = self.__db_system(details.db_system_id)
+        if db.lifecycle_state not in (oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE, oci.mysql.models.DbSystem.LIFECYCLE_STATE_INACTIVE):
+            raise self.__conflict(db.id,db.lifecycle_state)
+        backup = oci.mysql.models.Backup(
+            id = self.__new_id("mysqlbackup"),
+            display_name = details.display_name,
+            description = details.description,
+            compartment_id = db.compartment_id,
+            db_system_id = db.id,
+            backup_type = details.backup_type,
+            creation_type = oci.mysql.models.Backup.CREATION_TYPE_MANUAL,
+            retention_in_days = details.retention_in_days,
+            data_storage_size_in_gbs = db.data_storage_size_in_gbs,
+            backup_size_in_gbs = db.data_storage_size_in_gbs // 10 + 1,
+            mysql_version = db.mysql_version,
+            shape_name = db.shape_name,
+            freeform_tags = details.freeform_tags or dict(),
+            defined_tags = details.defined_tags or dict(),
+            lifecycle_state = oci.mysql.models.Backup.LIFECYCLE_STATE_CREATING,
+            time_created = self.__now(),
+            time_updated = self.__now())
+        self._backups[backup.id] = backup
+        self.__schedule("backup",backup.id,
+                self.__set_state(backup,oci.mysql.models.Backup.LIFECYCLE_STATE_ACTIVE),
+                self.__set_state(backup,oci.mysql.models.Backup.LIFECYCLE_STATE_FAILED))
+        return backup
+
+    def op_change_backup_compartment(self, backup_id, details, **kwargs):
+        backup = self.__backup(backup_id)
+        backup.compartment_id = details.compartment_id
+        return None
+
+    # MysqlaasClient
+
+    def op_list_shapes(self, compartment_id, **kwargs):
+        return list(self._shapes)
+
+    def op_list_configurations(self, compartment_id, page=None, limit=None, lifecycle_state=None, **kwargs):
+        items = [summarize(c,oci.mysql.models.ConfigurationSummary) for c in self._configurations.values()
+                if (c.compartment_id == compartment_id or c.type == oci.mysql.models.Configuration.TYPE_DEFAULT)
+                and (lifecycle_state is None or c.lifecycle_state == lifecycle_state)]
+        return self.__page(items,page,limit)
+
+    def op_get_configuration(self, configuration_id, **kwargs):
+        cfg = self._configurations.get(configuration_id)
+        if cfg is None:
+            raise self.__not_found(configuration_id)
+        return cfg
+
+    def op_create_configuration(self, details, **kwargs):
+        cfg_id = self.add_configuration(
+                details.compartment_id,
+                details.shape_name,
+                details.display_name,
+                details.variables,
+                oci.mysql.models.Configuration.TYPE_CUSTOM,
+                details.freeform_tags)
+        return self._configurations[cfg_id]
+
+    # ChannelsClient
+
+    def op_create_channel(self, details, **kwargs):
+        target = self.__db_system(details.target.db_system_id)
+        if target.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_ACTIVE:
+            raise self.__conflict(target.id,target.lifecycle_state)
+        channel = oci.mysql.models.Channel(
+            id = self.__new_id("mysqlchannel"),
+            compartment_id = details.compartment_id,
+            display_name = details.display_name,
+            description = details.description,
+            is_enabled = details.is_enabled,
+            source = oci.mysql.models.ChannelSourceMysql(
+                source_type = details.source.source_type,
+                hostname = details.source.hostname,
+                port = details.source.port,
+                username = details.source.username,
+                ssl_mode = details.source.ssl_mode),
+            target = oci.mysql.models.ChannelTargetDbSystem(
+                target_type = details.target.target_type,
+                db_system_id = details.target.db_system_id,
+                channel_name = details.target.channel_name or "replication_channel",
+                applier_username = details.target.applier_username),
+            defined_tags = dict(),
+            freeform_tags = dict(),
+            lifecycle_state = oci.mysql.models.Channel.LIFECYCLE_STATE_CREATING,
+            time_created = self.__now(),
+            time_updated = self.__now())
+        self._channels[channel.id] = channel
+        self.__schedule("channel",channel.id,
+                self.__set_state(channel,oci.mysql.models.Channel.LIFECYCLE_STATE_ACTIVE),
+                self.__set_state(channel,oci.mysql.models.Channel.LIFECYCLE_STATE_FAILED))
+        return channel
+
+    def op_get_channel(self, channel_id, **kwargs):
+        return self.__channel(channel_id)
+
+    def op_delete_channel(self, channel_id, **kwargs):
+        channel = self.__channel(channel_id)
+        if channel.lifecycle_state in (oci.mysql.models.Channel.LIFECYCLE_STATE_DELETING, oci.mysql.models.Channel.LIFECYCLE_STATE_DELETED):
+            raise self.__conflict(channel.id,channel.lifecycle_state)
+        channel.lifecycle_state = oci.mysql.models.Channel.LIFECYCLE_STATE_DELETING
+        self.__schedule("channel",channel.id,
+                self.__set_state(channel,oci.mysql.models.Channel.LIFECYCLE_STATE_DELETED),
+                self.__set_state(channel,oci.mysql.models.Channel.LIFECYCLE_STATE_FAILED))
+        return None
+
+    def op_generate_channel_status(self, channel_id, **kwargs):
+        self.__channel(channel_id)
+        return oci.response.Response(202,dict(),None,None)
+
+    def op_get_channel_status(self, channel_id, **kwargs):
+        # A channel has applied everything it received once its source
+        # stops taking writes, i.e. once the source is read-only
+        channel = self.__channel(channel_id)
+        sources = [db for db in self._db_systems.values()
+                if db.ip_address == channel.source.hostname and db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED]
+        healthy = channel.lifecycle_state == oci.mysql.models.Channel.LIFECYCLE_STATE_ACTIVE and len(sources) == 1
+        if self._stale_channels:
+            return oci.mysql.models.ChannelStatus(
+                time_created = channel.time_created,
+                time_updated = channel.time_created,
+                channel_status_result = oci.mysql.models.ChannelStatusResult(
+                    channel_id = channel.id,
+                    is_healthy = True,
+                    is_received_gtid_set_applied = True,
+                    errors = []))
+        return oci.mysql.models.ChannelStatus(
+            time_created = self.__now(),
+            time_updated = self.__now(),
+            channel_status_result = oci.mysql.models.ChannelStatusResult(
+                channel_id = channel.id,
+                is_healthy = healthy,
+                is_received_gtid_set_applied = healthy and sources[0].database_mode == oci.mysql.models.DbSystem.DATABASE_MODE_READ_ONLY,
+                errors = [] if healthy else ["Cannot connect to source %s." % channel.source.hostname]))
+
+    # WorkRequestsClient
+
+    def op_get_work_request(self, work_request_id, **kwargs):
+        work_request = self._work_requests.get(work_request_id)
+        if work_request is None:
+            raise self.__not_found(work_request_id)
+        return work_request
+
+    # IdentityClient
+
+    def op_get_compartment(self, compartment_id, **kwargs):
+        compartment = self._compartments.get(compartment_id)
+        if compartment is None:
+            raise self.__not_found(compartment_id)
+        return compartment
+
+    # VirtualNetworkClient
+
+    def op_get_subnet(self, subnet_id, **kwargs):
+        subnet = self._subnets.get(subnet_id)
+        if subnet is None:
+            raise self.__not_found(subnet_id)
+        return subnet
+
+    def op_list_private_ips(self, subnet_id=None, ip_address=None, page=None, limit=None, **kwargs):
+        items = [oci.core.models.PrivateIp(
+                    id = self.__new_id("privateip"),
+                    subnet_id = db.subnet_id,
+                    ip_address = db.ip_address,
+                    display_name = db.display_name)
+                for db in self._db_systems.values()
+                if db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED
+                    and (subnet_id is None or db.subnet_id == subnet_id)
+                    and (ip_address is None or db.ip_address == ip_address)]
+        return self.__page(items,page,limit)
+
+    # LimitsClient
+
+    def op_list_limit_definitions(self, compartment_id, service_name=None, page=None, limit=None, **kwargs):
+        items = [d for d, value in self._limits.values() if service_name is None or d.service_name == service_name]
+        return self.__page(items,page,limit)
+
+    def op_get_resource_availability(self, service_name, limit_name, compartment_id, **kwargs):
+        if limit_name not in self._limits or self._limits[limit_name][0].service_name != service_name:
+            raise self.__not_found(limit_name)
+        value = self._limits[limit_name][1]
+        databases = [db for db in self._db_systems.values()
+                if db.lifecycle_state != oci.mysql.models.DbSystem.LIFECYCLE_STATE_DELETED]
+        instances = lambda db: 3 if db.is_highly_available else 1
+        if limit_name == STORAGE_LIMIT_NAME:
+            used = sum(db.data_storage_size_in_gbs * instances(db) for db in databases)
+        else:
+            used = sum(instances(db) for db in databases if shape_limit_name(db.shape_name) == limit_name)
+        return oci.limits.models.ResourceAvailability(
+            used = used,
+            available = max(value - used,0))
@@ -0,0 +1,147 @@
+import random
+import time
+from utils.mdsimport import lazy_import
+
+asyncio = lazy_import("asyncio")
+
+class MdsWaiterError(Exception):
+    def __init__(self,message):
+        super().__init__(message)
+
+
+def format_elapsed(seconds):
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds,3600)
+    minutes, seconds = divmod(seconds,60)
+    if hours > 0:
+        return "%dh %02dm %02ds" % (hours,minutes,seconds)
+    if minutes > 0:
+        return "%dm %02ds" % (minutes,seconds)
+    return "%ds" % (seconds)
+
+
+class MdsWaiter(object):
+    # Polls a resource until its state leaves a set of pending states. The
+    # first poll happens quickly, after which the delay between polls grows
+    # exponentially (with jitter) up to a ceiling. An optional deadline bounds
+    # the total time spent waiting; the resource is polled at the deadline
+    # before the wait is given up.
+    # If an estimate is given it is called with the first data model polled
+    # and returns the expected duration (or None). The delay is then half the
+    # time remaining until the expected finish, so polls are sparse early on
+    # and denser as the finish approaches. The first poll is still a quick
+    # one, and the delay grows from it by at most the backoff at each poll,
+    # so an operation that finishes well before its estimate is not left
+    # waiting for a distant poll. Once the expected finish has passed the
+    # delay grows exponentially again.
+
+    # Public constants
+    LIFECYCLE_STATE = "lifecycle_state"
+    STATUS = "status"
+
+    def __init__(self, deadline=None, first_delay=2.0, max_delay=60.0, backoff=2.0, jitter=0.2, attribute=LIFECYCLE_STATE, estimate=None, max_sparse_delay=300.0):
+        if first_delay <= 0 or max_delay < first_delay:
+            raise ValueError("mdswaiter init: delays must be positive and max_delay must not be less than first_delay")
+        if backoff < 1.0:
+            raise ValueError("mdswaiter init: backoff must be at least 1.0")
+        if jitter < 0.0 or jitter >= 1.0:
+            raise ValueError("mdswaiter init: jitter must be in the range [0.0, 1.0)")
+        self._deadline = deadline
+        self._first_delay = first_delay
+        self._max_delay = max_delay
+        self._backoff = backoff
+        self._jitter = jitter
+        self._attribute = attribute
+        self._estimate = estimate
+        self._max_sparse_delay = max(max_sparse_delay,max_delay)
+        self._expected = None
+        self._start = None
+        self._elapsed = 0.0
+        self._polls = 0
+
+    @property
+    def elapsed(self):
+        return self._elapsed
+
+    @property
+    def polls(self):
+        return self._polls
+
+    @property
+    def expected(self):
+        return self._expected
+
+    @property
+    def remaining(self):
+        # Seconds until the expected finish (negative if it has passed), or
+        # None if there is no estimate.
+        if self._expected is None or self._start is None:
+            return None
+        return self._expected - (time.monotonic() - self._start)
+
+    def state(self, data):
+        # attribute is the name of the attribute holding the state, or a
+        # callable that derives the state from the data model
+        if callable(self._attribute):
+            return self._attribute(data)
+        return getattr(data,self._attribute)
+
+    def next_delay(self, delay, elapsed=0.0):
+        if self._expected is not None and self._expected - elapsed > 2 * self._first_delay:
+            return min((self._expected - elapsed) / 2.0,self._max_sparse_delay,delay * self._backoff)
+        if self._expected is not None and self._expected > elapsed:
+            return self._first_delay
+        return min(delay * self._backoff,self._max_delay)
+
+    def sleep_time(self, delay):
+        return delay * random.uniform(1.0 - self._jitter,1.0 + self._jitter)
+
+    async def wait(self, poll, pending, success=None, initial=None, description="resource", refresh=None):
+        # poll is a callable returning an awaitable that resolves to the
+        # resource's current data model. If initial is provided it is used in
+        # place of the first poll (e.g. the data returned by a create call).
+        # If refresh is provided it is called in the same way once the
+        # resource has left the pending states, to read its full data model
+        # when poll only returns a summary of it.
+        # Returns the final data model, or raises MdsWaiterError if the
+        # deadline passes or the final state is not one of the success states.
+        # No thread is held between polls so many waits can share one loop.
+        start = time.monotonic()
+        self._start = start
+        self._expected = None
+        self._polls = 0
+        self._elapsed = 0.0
+        data = initial
+        if data is None:
+            data = await poll()
+            self._polls += 1
+        if self._estimate is not None:
+            self._expected = self._estimate(data)
+
+        delay = self._first_delay
+        while self.state(data) in pending:
+            sleep_time = self.sleep_time(delay)
+            if self._deadline is not None:
+                # The last sleep ends at the deadline, so the resource is
+                # polled once more then rather than given up on early
+                remaining = self._deadline - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._elapsed = time.monotonic() - start
+                    raise MdsWaiterError("Timed out after %s waiting for %s (last state: %s)." % (format_elapsed(self._elapsed),description,self.state(data)))
+                sleep_time = min(sleep_time,remaining)
+            await asyncio.sleep(sleep_time)
+            data = await poll()
+            self._polls += 1
+            delay = self.next_delay(delay,time.monotonic() - start)
+        if refresh is not None:
+            data = await refresh()
+            self._polls += 1
+        self._elapsed = time.monotonic() - start
+
+        if success is not None and self.state(data) not in success:
+            details = getattr(data,"lifecycle_details",None)
+            message = "%s ended in state %s" % (description.capitalize(),self.state(data))
+            if details:
+                message = message + ": " + details
+            raise MdsWaiterError(message + ".")
+        return data
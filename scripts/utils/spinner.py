@@ -1,26 +1,60 @@
 import itertools
 import sys
-import threading
-import time
+from utils.mdswaiter import format_elapsed
+from utils.mdsimport import lazy_import
+
+asyncio = lazy_import("asyncio")
 
 class Spinner(object):
+    # Runs as a task on the current event loop rather than in its own thread,
+    # so a spinner costs nothing while the loop is waiting on other work.
     spinner_cycle = itertools.cycle(['-', '/', '|', '\\'])
 
-    def __init__(self):
-        self.stop_running = threading.Event()
-        self.spin_thread = threading.Thread(target=self.init_spin)
+    def __init__(self, enabled=True, eta=None):
+        # eta, if given, is a callable returning the seconds remaining until
+        # the operation is expected to finish (or None), shown beside the
+        # spinner.
+        self.enabled = enabled
+        self.eta = eta
+        self.spin_task = None
 
     def start(self):
-        self.spin_thread.daemon = True
-        self.spin_thread.start()
+        if not self.enabled:
+            return
+        self.spin_task = asyncio.get_running_loop().create_task(self.init_spin())
+
+    async def stop(self):
+        if self.spin_task is None:
+            return
+        self.spin_task.cancel()
+        try:
+            await self.spin_task
+        except asyncio.CancelledError:
+            pass
+        self.spin_task = None
 
-    def stop(self):
-        self.stop_running.set()
-        self.spin_thread.join()
+    def text(self):
+        text = next(self.spinner_cycle)
+        remaining = None
+        if self.eta is not None:
+            remaining = self.eta()
+        if remaining is not None and remaining > 0:
+            text = text + " (ETA " + format_elapsed(remaining) + ")"
+        elif remaining is not None:
+            text = text + " (overdue " + format_elapsed(-remaining) + ")"
+        return text
 
-    def init_spin(self):
-        while not self.stop_running.is_set():
-            sys.stdout.write(next(self.spinner_cycle))
+    async def init_spin(self):
+        text = ""
+        try:
+            while True:
+                text = self.text()
+                sys.stdout.write(text)
+                sys.stdout.flush()
+                await asyncio.sleep(0.25)
+                sys.stdout.write('\b' * len(text) + ' ' * len(text) + '\b' * len(text))
+                text = ""
+        except asyncio.CancelledError:
+            sys.stdout.write('\b' * len(text) + ' ' * len(text) + '\b' * len(text))
             sys.stdout.flush()
-            time.sleep(0.25)
-            sys.stdout.write('\b')
+            raise
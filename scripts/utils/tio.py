@@ -1,18 +1,155 @@
+import atexit
+import collections
+import contextvars
+import datetime
+import json
+import os
 import sys
 import getpass
+import threading
+
+class TioWriter(object):
+    # Writes session logs from a background thread so that operations never
+    # wait on the file system to log. Messages are batched, and the thread
+    # writes and flushes them every interval seconds, as soon as max_bytes
+    # are pending, when flush() is called, and at exit. Callers flush at the
+    # end of each step and after an error, so those lines reach the
+    # operating system before the process moves on, and a durable flush
+    # also syncs the logs to disk. Only the progress written since the last
+    # step can be lost by a process that is killed outright.
+
+    def __init__(self, interval=0.2, max_bytes=64 * 1024):
+        self._interval = interval
+        self._max_bytes = max_bytes
+        # Unlike a queue, the pending messages do not wake the writer for
+        # every message. They and their size are guarded by the lock.
+        self._pending = collections.deque()
+        self._pending_bytes = 0
+        self._files = set()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closing = False
+
+    def write(self, file_handle, text):
+        if self._closing:
+            # Once closed (i.e. at exit) messages are written synchronously
+            self.__write({file_handle: [text]})
+            return
+        if self._thread is None:
+            self.__start()
+        with self._lock:
+            self._pending.append((file_handle,text))
+            self._pending_bytes += len(text)
+            full = self._pending_bytes >= self._max_bytes
+        if full:
+            self._wake.set()
+
+    def flush(self, durable=False):
+        # Returns once everything written so far has been flushed and, if
+        # durable, synced to disk
+        if self._thread is None or self._closing:
+            return
+        flushed = threading.Event()
+        with self._lock:
+            self._pending.append((None,(flushed,durable)))
+        self._wake.set()
+        flushed.wait()
+
+    def close(self):
+        with self._lock:
+            thread = self._thread
+            self._closing = True
+        if thread is not None:
+            self._wake.set()
+            thread.join()
+
+    def __start(self):
+        with self._lock:
+            if self._thread is None and not self._closing:
+                self._thread = threading.Thread(target=self.__run,name="tio-writer",daemon=True)
+                self._thread.start()
+
+    def __run(self):
+        while True:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            self.__drain()
+            if self._closing:
+                self.__drain()
+                return
+
+    def __drain(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = collections.deque()
+            self._pending_bytes = 0
+        batches = dict()
+        for file_handle, item in pending:
+            if file_handle is not None:
+                batches.setdefault(file_handle,list()).append(item)
+                continue
+            # A flush() marker: everything before it must be written first
+            flushed, durable = item
+            self.__write(batches)
+            batches = dict()
+            if durable:
+                self.__sync()
+            flushed.set()
+        self.__write(batches)
+
+    def __write(self, batches):
+        for file_handle, texts in batches.items():
+            self._files.add(file_handle)
+            try:
+                file_handle.write("".join(texts))
+                file_handle.flush()
+            except (OSError, ValueError):
+                # A log that can no longer be written (e.g. a full disk or a
+                # closed file) must not stop the operation being logged
+                pass
+
+    def __sync(self):
+        for file_handle in list(self._files):
+            try:
+                os.fsync(file_handle.fileno())
+            except (OSError, ValueError, AttributeError):
+                # Closed files, and streams such as pipes that cannot be
+                # synced, are left to the operating system
+                self._files.discard(file_handle)
+
+
+# Global: the writer shared by every Tio, flushed when the process exits
+writer = TioWriter()
+atexit.register(writer.close)
+
 
 class Tio(object):
+    # Writes to the screen and a session log. If records, a file handle, is
+    # given then each line is also written to it as a JSON record tagged
+    # with the operation, so that the records of concurrent operations
+    # sharing the file can be told apart.
 
     SCREEN = "screen"
     FILE = "output-file"
     ON = True
     OFF = False
 
-    def __init__(self,file_handle):
+    def __init__(self,file_handle,records=None,operation=None):
         self._screen = True
         self._output_file = True
         self._file_handle = file_handle
+        self._records = records
+        self._operation = operation
+        self._partial = ""
+
+    @property
+    def records(self):
+        return self._records
 
+    @property
+    def operation(self):
+        return self._operation
 
     def set_mode(self,dest,mode):
         mode_set = True
@@ -28,32 +165,81 @@ class Tio(object):
 
         return mode_set
 
+    def get_mode(self,dest):
+        if dest == self.SCREEN:
+            return self._screen
+        elif dest == self.FILE:
+            return self._output_file
+        return None
+
+    def record(self,kind,text):
+        if self._records is None:
+            return
+        writer.write(self._records,json.dumps({
+            "time": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "operation": self._operation,
+            "kind": kind,
+            "text": text}) + "\n")
+
+    def __log(self,message):
+        writer.write(self._file_handle,message)
+        # Records are whole lines, so text written without a newline waits
+        # for the rest of its line
+        lines = (self._partial + message).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.record("output",line)
+
     def write(self,message):
         if self._screen:
             print(message,end="")
         if self._output_file:
-            self._file_handle.write(message)
-            self._file_handle.flush()
+            self.__log(message)
 
     def writeln(self,message):
         if self._screen:
             print(message)
         if self._output_file:
-            self._file_handle.write(message + "\n")
-            self._file_handle.flush()
-    
+            self.__log(message + "\n")
+
+    def flush(self,durable=False):
+        if self._partial:
+            self.record("output",self._partial)
+            self._partial = ""
+        writer.flush(durable)
+
     def input(self,message):
+        # The log is brought up to date while waiting for the user
+        self.flush()
         val = input(message) # prints message to screen
         if self._output_file:
-            self._file_handle.write(message + val + "\n")
-            self._file_handle.flush()
+            writer.write(self._file_handle,message + val + "\n")
+            self.record("input",message + val)
         return val
 
     def password_input(self,prompt_message):
+        self.flush()
         passwd = getpass.getpass(prompt_message)
         if self._output_file:
-            self._file_handle.write(prompt_message + "\n")
-            self._file_handle.flush()
+            writer.write(self._file_handle,prompt_message + "\n")
+            self.record("input",prompt_message)
         return passwd
 
 
+class TioContext(object):
+    # Forwards calls to the Tio bound to the current execution context. This
+    # lets concurrent operations (threads or asyncio tasks) each write to their
+    # own session log while sharing a single module level tio object.
+
+    def __init__(self):
+        self._current = contextvars.ContextVar("tio")
+
+    def bind(self,tio):
+        self._current.set(tio)
+        return tio
+
+    def current(self):
+        return self._current.get()
+
+    def __getattr__(self,name):
+        return getattr(self._current.get(),name)